@@ -0,0 +1,339 @@
+# cache.py
+# 동영상 메타데이터 결과 캐시 (DB 조회 결과를 직렬화해서 저장)
+#
+# - 백엔드: memory (프로세스 내 TTL + LRU, 기본값) / redis (워커 여러 개가 같은 캐시 공유) / none
+# - 저장 내용
+#     video:{id}                      → VideoResponse JSON (좋아요/댓글 개수 포함, is_liked 제외)
+#     videos:{세대}:first:{limit}:{t} → 첫 페이지의 동영상 id 목록 + 전체 개수 + 다음 커서
+#   목록은 id만 저장하고 동영상 내용은 video:{id} 에서 가져오므로,
+#   좋아요/댓글/이름 변경은 해당 동영상 키 하나만 지우면 되고
+#   업로드/삭제처럼 목록 구성이 바뀔 때만 세대 번호를 올려 목록 키 전체를 무효화
+# - 무효화는 DB commit 이후에 호출 (commit 전에 지우면 다른 요청이 옛 값을 다시 채울 수 있음)
+#   DB를 읽는 사이에 무효화된 키는 저장하지 않음 (같은 프로세스 안에서, read_epoch 참고)
+#   다른 워커에서 일어난 경쟁은 CACHE_TTL 안에서 정리됨
+# - 적중/미스 통계: GET /cache/metadata/stats
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models import Video
+from app.schemas import VideoResponse
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+CACHE_TTL = int(os.getenv("CACHE_TTL", 30))  # 초
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 10000))  # memory 백엔드 최대 항목 수
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+CACHE_KEY_PREFIX = "shorts:"
+
+_LIST_GENERATION_KEY = "videos:generation"
+_DELETED_AT_MAX_ENTRIES = 10000  # 무효화 기록 최대 개수 (넘으면 오래된 것부터 버림)
+
+
+class MemoryBackend:
+    """프로세스 내 TTL + LRU 캐시 (값은 문자열)"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # 키 -> (만료 시각, 값)
+        self._counters = {}  # 세대 번호 (만료/LRU 대상 아님)
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        now = time.monotonic()
+        values = []
+        with self._lock:
+            for key in keys:
+                if key in self._counters:
+                    values.append(str(self._counters[key]))
+                    continue
+                entry = self._entries.get(key)
+                if entry is None or entry[0] <= now:
+                    if entry is not None:
+                        del self._entries[key]
+                    values.append(None)
+                    continue
+                self._entries.move_to_end(key)
+                values.append(entry[1])
+        return values
+
+    def set_many(self, items: Dict[str, str], ttl: int):
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            for key, value in items.items():
+                self._entries[key] = (expires_at, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class RedisBackend:
+    """
+    Redis 호환 서버 캐시 (redis 패키지 필요: pip install redis)
+    - client를 넘기면 그대로 사용 (예: 테스트에서 fakeredis.FakeRedis())
+    """
+
+    def __init__(self, url: str = None, client=None):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("CACHE_BACKEND=redis 를 쓰려면 redis 패키지를 설치하세요 (pip install redis)")
+            client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._client = client
+
+    def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        values = self._client.mget([CACHE_KEY_PREFIX + key for key in keys])
+        return [value.decode() if isinstance(value, bytes) else value for value in values]
+
+    def set_many(self, items: Dict[str, str], ttl: int):
+        pipe = self._client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.set(CACHE_KEY_PREFIX + key, value, ex=ttl)
+        pipe.execute()
+
+    def delete(self, *keys: str):
+        self._client.delete(*[CACHE_KEY_PREFIX + key for key in keys])
+
+    def incr(self, key: str) -> int:
+        return int(self._client.incr(CACHE_KEY_PREFIX + key))
+
+    def size(self) -> int:
+        return int(self._client.dbsize())
+
+
+class MetadataCache:
+    """
+    백엔드 위에 얹는 통계 + 장애 격리 계층
+    - 백엔드 오류(예: Redis 연결 실패)는 미스로 처리하고 DB로 진행
+    """
+
+    def __init__(self, backend, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.invalidations = 0
+        self.errors = 0
+        self._epoch = 0
+        self._deleted_at = OrderedDict()  # 키 -> 마지막으로 무효화된 epoch (오래된 순서)
+        self._pruned_epoch = 0  # 버린 무효화 기록 중 가장 최근 epoch (기록이 없는 키는 이때 무효화된 것으로 봄)
+        self._epoch_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    @property
+    def shared(self) -> bool:
+        """다른 프로세스(API 워커, 변환 워커)와 같은 캐시를 쓰는지 (redis 백엔드)"""
+        return isinstance(self.backend, RedisBackend)
+
+    def get_many(self, keys: List[str], count: bool = True) -> List[Optional[str]]:
+        """count=False 이면 적중률 통계에 넣지 않음 (세대 번호 같은 내부 키)"""
+        if not self.enabled or not keys:
+            return [None] * len(keys)
+        try:
+            values = self.backend.get_many(keys)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"⚠️ 캐시 조회 실패: {e}")
+            values = [None] * len(keys)
+        if not count:
+            return values
+        hits = sum(1 for value in values if value is not None)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        return values
+
+    def get(self, key: str) -> Optional[str]:
+        return self.get_many([key])[0]
+
+    def read_epoch(self) -> int:
+        """DB 조회 직전에 받아 두었다가 set_many에 넘기면, 그사이 무효화된 키는 저장하지 않음"""
+        return self._epoch
+
+    def set_many(self, items: Dict[str, str], read_epoch: Optional[int] = None):
+        if not self.enabled or not items:
+            return
+        if read_epoch is not None:
+            items = {
+                key: value for key, value in items.items()
+                if self._deleted_at.get(key, self._pruned_epoch) <= read_epoch
+            }
+            if not items:
+                return
+        try:
+            self.backend.set_many(items, self.ttl)
+            self.sets += len(items)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"⚠️ 캐시 저장 실패: {e}")
+
+    def delete(self, *keys: str):
+        if not self.enabled or not keys:
+            return
+        with self._epoch_lock:
+            self._epoch += 1
+            for key in keys:
+                self._deleted_at[key] = self._epoch
+                self._deleted_at.move_to_end(key)
+            # 오래된 기록을 버려도 그보다 먼저 시작한 조회는 저장하지 않으므로 안전 (미스가 조금 늘 뿐)
+            while len(self._deleted_at) > _DELETED_AT_MAX_ENTRIES:
+                _, self._pruned_epoch = self._deleted_at.popitem(last=False)
+        try:
+            self.backend.delete(*keys)
+            self.invalidations += len(keys)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"⚠️ 캐시 무효화 실패: {e}")
+
+    def incr(self, key: str) -> Optional[int]:
+        if not self.enabled:
+            return None
+        try:
+            return self.backend.incr(key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"⚠️ 캐시 세대 증가 실패: {e}")
+            return None
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        size = None
+        if self.enabled:
+            try:
+                size = self.backend.size()
+            except Exception:
+                pass
+        return {
+            "backend": type(self.backend).__name__ if self.enabled else None,
+            "ttl": self.ttl,
+            "entries": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "sets": self.sets,
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+        }
+
+
+def _make_backend():
+    if CACHE_BACKEND == "none":
+        return None
+    if CACHE_BACKEND == "redis":
+        return RedisBackend(CACHE_REDIS_URL)
+    return MemoryBackend(CACHE_MAX_ENTRIES)
+
+
+metadata_cache = MetadataCache(_make_backend(), CACHE_TTL)
+
+
+# ---- 동영상 메타데이터 ----
+
+def _video_key(video_id: int) -> str:
+    return f"video:{video_id}"
+
+
+def _serialize(video: Video) -> str:
+    return VideoResponse.model_validate(video).model_dump_json(exclude={"is_liked"})
+
+
+def get_cached_videos(db: Session, video_ids: List[int]) -> List[VideoResponse]:
+    """
+    id 목록 순서대로 동영상 조회 (캐시 미스만 한 번의 IN 쿼리로 DB에서 가져와 채움)
+    - 없는 id는 결과에서 빠짐
+    """
+    values = metadata_cache.get_many([_video_key(video_id) for video_id in video_ids])
+    found = {
+        video_id: VideoResponse.model_validate_json(value)
+        for video_id, value in zip(video_ids, values)
+        if value is not None
+    }
+
+    missing = [video_id for video_id in video_ids if video_id not in found]
+    if missing:
+        epoch = metadata_cache.read_epoch()
+        rows = db.query(Video).filter(Video.id.in_(missing)).all()
+        fresh = {}
+        for video in rows:
+            found[video.id] = VideoResponse.model_validate(video)
+            fresh[_video_key(video.id)] = _serialize(video)
+        metadata_cache.set_many(fresh, epoch)
+
+    return [found[video_id] for video_id in video_ids if video_id in found]
+
+
+def remember_videos(videos: Iterable[Video], read_epoch: Optional[int] = None):
+    """DB에서 이미 읽은 동영상들을 캐시에 저장 (목록 조회 후 단건/피드 조회가 바로 적중하도록)"""
+    metadata_cache.set_many({_video_key(video.id): _serialize(video) for video in videos}, read_epoch)
+
+
+def get_cached_video(db: Session, video_id: int) -> Optional[VideoResponse]:
+    """단일 동영상 조회 (없으면 None)"""
+    videos = get_cached_videos(db, [video_id])
+    return videos[0] if videos else None
+
+
+def invalidate_video(*video_ids: int):
+    """동영상 내용(이름, 파일, 좋아요/댓글 수)이 바뀐 뒤 호출"""
+    metadata_cache.delete(*[_video_key(video_id) for video_id in video_ids])
+
+
+# ---- 목록 첫 페이지 ----
+
+def first_page_key(kind: str, limit: int, include_total: bool) -> Optional[str]:
+    """
+    첫 페이지 캐시 키 (현재 목록 세대 포함)
+    - DB 조회 전에 만들어 두고 get/set 에 같은 키를 써야, 조회 중에 업로드/삭제가 일어나도
+      옛 목록이 새 세대 키로 저장되지 않음
+    - kind: 목록 종류 (같은 정렬이면 같은 값을 써도 됨)
+    """
+    if not metadata_cache.enabled:
+        return None
+    generation = metadata_cache.get_many([_LIST_GENERATION_KEY], count=False)[0] or "0"
+    return f"videos:{generation}:{kind}:{limit}:{int(include_total)}"
+
+
+def get_cached_first_page(key: Optional[str]) -> Optional[dict]:
+    """캐시된 첫 페이지 ({"ids", "total", "next_cursor"}) 또는 None"""
+    if key is None:
+        return None
+    value = metadata_cache.get(key)
+    return json.loads(value) if value is not None else None
+
+
+def set_cached_first_page(key: Optional[str], ids: Iterable[int], total, next_cursor):
+    if key is None:
+        return
+    page = {"ids": list(ids), "total": total, "next_cursor": next_cursor}
+    metadata_cache.set_many({key: json.dumps(page)})
+
+
+def invalidate_video_lists():
+    """목록 구성이 바뀐 뒤 호출 (업로드, 삭제) - 세대 번호를 올려 모든 목록 키를 무효화"""
+    if metadata_cache.incr(_LIST_GENERATION_KEY) is not None:
+        metadata_cache.invalidations += 1
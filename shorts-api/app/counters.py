@@ -0,0 +1,75 @@
+# counters.py
+# videos 테이블의 비정규화 카운터(like_count, comment_count) 관리
+#
+# - 좋아요/댓글 추가·삭제와 같은 트랜잭션 안에서 원자적으로 증감 (UPDATE ... SET x = x + 1)
+# - 카운터 변경은 동영상 수정이 아니므로 updated_at(onupdate)은 그대로 유지 (ETag/Last-Modified 기준)
+# - 카운터가 어긋났을 때는 원본 테이블에서 다시 계산:
+#     python -m app.counters
+
+from sqlalchemy import update, select, func
+from sqlalchemy.orm import Session
+
+from app.models import Video, Like, Comments
+
+
+def adjust_like_count(db: Session, video_id: int, delta: int) -> int:
+    """
+    좋아요 개수 증감 (commit은 호출한 쪽에서)
+    Returns: 변경된 좋아요 개수
+    """
+    return db.execute(
+        update(Video)
+        .where(Video.id == video_id)
+        .values(like_count=Video.like_count + delta, updated_at=Video.updated_at)
+        .returning(Video.like_count)
+    ).scalar_one()
+
+
+def adjust_comment_count(db: Session, video_id: int, delta: int) -> int:
+    """
+    댓글 개수 증감 (commit은 호출한 쪽에서)
+    Returns: 변경된 댓글 개수
+    """
+    return db.execute(
+        update(Video)
+        .where(Video.id == video_id)
+        .values(comment_count=Video.comment_count + delta, updated_at=Video.updated_at)
+        .returning(Video.comment_count)
+    ).scalar_one()
+
+
+def reconcile_counters(db: Session) -> int:
+    """
+    likes / comments 테이블에서 카운터를 다시 계산해서 덮어쓰기
+    Returns: 값이 바뀐 동영상 수
+    """
+    like_total = (
+        select(func.count(Like.id))
+        .where(Like.video_id == Video.id)
+        .scalar_subquery()
+    )
+    comment_total = (
+        select(func.count(Comments.id))
+        .where(Comments.video_id == Video.id)
+        .scalar_subquery()
+    )
+
+    result = db.execute(
+        update(Video)
+        .where((Video.like_count != like_total) | (Video.comment_count != comment_total))
+        .values(like_count=like_total, comment_count=comment_total, updated_at=Video.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
+
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        changed = reconcile_counters(db)
+        print(f"카운터 재계산 완료: {changed}개 동영상 수정")
+    finally:
+        db.close()
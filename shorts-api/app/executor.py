@@ -0,0 +1,64 @@
+# executor.py
+# 블로킹 호출(SQLAlchemy, boto3)을 이벤트 루프 밖에서 실행하기 위한 스레드풀
+#
+# - DB 풀: anyio 기본 스레드풀 (def 엔드포인트, get_db 같은 동기 의존성도 여기서 실행됨)
+# - S3 풀: S3 전용 스레드풀 (느린 S3 호출이 DB 작업용 스레드를 다 잡아먹지 않도록 분리)
+#
+# async def 핸들러 안에서는 db.query(...) / s3_client.xxx(...) 를 직접 부르지 말고
+# run_db / run_s3 / iterate_s3 를 거쳐서 호출합니다.
+
+import os
+from functools import partial
+from typing import AsyncIterator, Callable, Iterator, Optional, TypeVar
+
+import anyio
+from anyio import to_thread
+
+T = TypeVar("T")
+
+# 스레드풀 크기 (uvicorn 워커 1개 기준)
+DB_THREADPOOL_SIZE = int(os.getenv("DB_THREADPOOL_SIZE", 40))
+S3_THREADPOOL_SIZE = int(os.getenv("S3_THREADPOOL_SIZE", 40))
+
+_s3_limiter: Optional[anyio.CapacityLimiter] = None
+
+
+def configure_threadpools():
+    """
+    스레드풀 크기 설정 (이벤트 루프 안에서, 서버 시작 시 한 번 호출)
+    """
+    global _s3_limiter
+    to_thread.current_default_thread_limiter().total_tokens = DB_THREADPOOL_SIZE
+    _s3_limiter = anyio.CapacityLimiter(S3_THREADPOOL_SIZE)
+
+
+def _get_s3_limiter() -> anyio.CapacityLimiter:
+    global _s3_limiter
+    if _s3_limiter is None:
+        _s3_limiter = anyio.CapacityLimiter(S3_THREADPOOL_SIZE)
+    return _s3_limiter
+
+
+async def run_db(func: Callable[..., T], *args, **kwargs) -> T:
+    """DB 작업을 DB 스레드풀에서 실행"""
+    return await to_thread.run_sync(partial(func, *args, **kwargs))
+
+
+async def run_s3(func: Callable[..., T], *args, **kwargs) -> T:
+    """S3 호출을 S3 스레드풀에서 실행"""
+    return await to_thread.run_sync(partial(func, *args, **kwargs), limiter=_get_s3_limiter())
+
+
+_DONE = object()
+
+
+async def iterate_s3(iterator: Iterator[T]) -> AsyncIterator[T]:
+    """
+    동기 이터레이터(예: S3 Body.iter_chunks())를 S3 스레드풀에서 한 조각씩 읽는 async 이터레이터
+    - StreamingResponse에 그대로 넘길 수 있음
+    """
+    while True:
+        chunk = await run_s3(next, iterator, _DONE)
+        if chunk is _DONE:
+            break
+        yield chunk
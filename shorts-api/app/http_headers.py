@@ -0,0 +1,220 @@
+# http_headers.py
+# HTTP Range / 조건부 요청 헤더 처리 (RFC 9110)
+#
+# - Range: bytes=a-b / a- / -n, 여러 구간(multipart/byteranges), 파일 끝을 넘는 구간은 잘라서 응답
+# - If-Range: ETag 또는 Last-Modified가 일치할 때만 Range 적용 (아니면 전체 응답)
+# - If-None-Match / If-Modified-Since: 바뀌지 않았으면 304 (본문, S3 호출 없음)
+# - 검증자: 동영상 파일은 업로드마다 새 uuid 키를 쓰므로 S3 키 기반 ETag는 강한(strong) ETag
+
+import hashlib
+import uuid
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import List, Optional, Tuple
+
+from fastapi import Response
+
+# 한 요청에서 허용하는 최대 구간 수 (넘으면 Range를 무시하고 전체 응답)
+MAX_RANGES = 16
+
+# Cache-Control 정책
+# - 메타데이터: 저장은 하되 매번 재검증 (바뀌지 않았으면 304)
+# - 동영상 본문: 같은 id로 파일이 교체될 수 있으므로 짧게 캐시 후 재검증
+METADATA_CACHE_CONTROL = "no-cache"
+VIDEO_CACHE_CONTROL = "public, max-age=60, must-revalidate"
+
+
+class RangeNotSatisfiable(Exception):
+    """요청한 구간이 모두 파일 범위를 벗어난 경우 (416)"""
+    pass
+
+
+def parse_range_header(range_header: str, file_size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Range 헤더 파싱
+    Returns:
+        [(start, end), ...] - 끝 위치 포함, 겹치거나 붙어 있는 구간은 합침
+        None - 헤더를 무시하고 전체 응답해야 하는 경우 (bytes 단위가 아님, 문법 오류, 구간이 너무 많음)
+    Raises:
+        RangeNotSatisfiable - 만족할 수 있는 구간이 하나도 없는 경우
+    """
+    unit, _, range_set = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or not range_set.strip():
+        return None
+
+    specs = [spec.strip() for spec in range_set.split(",")]
+    if len(specs) > MAX_RANGES:
+        return None
+
+    ranges = []
+    for spec in specs:
+        if not spec:
+            continue
+        first, sep, last = spec.partition("-")
+        first, last = first.strip(), last.strip()
+        if not sep or not (first.isdigit() or first == "") or not (last.isdigit() or last == ""):
+            return None
+
+        if first == "":
+            # 뒤에서부터 n 바이트 (bytes=-500)
+            if last == "":
+                return None
+            suffix_length = int(last)
+            if suffix_length == 0 or file_size == 0:
+                continue
+            ranges.append((max(file_size - suffix_length, 0), file_size - 1))
+            continue
+
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        if start >= file_size:
+            continue
+        end = int(last) if last else file_size - 1
+        # 파일 끝을 넘는 구간은 잘라서 응답
+        ranges.append((start, min(end, file_size - 1)))
+
+    if not ranges:
+        raise RangeNotSatisfiable()
+
+    # 겹치거나 붙어 있는 구간 합치기
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end + 1:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def entity_etag(*parts) -> str:
+    """
+    응답 내용을 결정하는 값들로 만든 강한 ETag
+    - 예: 동영상 메타데이터 → (id, updated_at)
+    """
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def video_etag(key: str, file_size: int) -> str:
+    """
+    동영상 파일 ETag (강한 검증자)
+    - S3 키 전체로 만듦: 원본은 uuid 파일명, 변환 결과는 renditions/{원본 파일명}/mp4/720p.mp4 처럼
+      원본 uuid 를 포함하므로 동영상마다 다름 (파일 이름만 쓰면 모든 720p 가 같은 ETag)
+    - 파일 교체 시 키가 바뀌므로 같은 키면 내용도 같음
+    """
+    return entity_etag(key, file_size)
+
+
+def http_date(value: Optional[datetime]) -> Optional[str]:
+    """datetime → HTTP-date (Last-Modified 형식)"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def parse_http_date(value: str) -> Optional[datetime]:
+    """HTTP-date → datetime (형식이 잘못되면 None)"""
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if parsed is None:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def if_range_matches(if_range: Optional[str], etag: str, last_modified: Optional[str]) -> bool:
+    """
+    If-Range 평가
+    - 헤더가 없으면 True (Range 그대로 적용)
+    - ETag 형식이면 강한 비교 (약한 ETag W/"..."는 항상 불일치)
+    - 날짜 형식이면 Last-Modified와 정확히 같을 때만 일치
+    """
+    if if_range is None:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return if_range == etag
+    if last_modified is None:
+        return False
+    requested = parse_http_date(if_range)
+    return requested is not None and requested == parse_http_date(last_modified)
+
+
+def new_multipart_boundary() -> str:
+    return uuid.uuid4().hex
+
+
+def multipart_part_header(boundary: str, content_type: str, start: int, end: int, file_size: int) -> bytes:
+    """multipart/byteranges 각 파트 앞에 붙는 헤더"""
+    return (
+        f"\r\n--{boundary}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Range: bytes {start}-{end}/{file_size}\r\n"
+        f"\r\n"
+    ).encode()
+
+
+def multipart_closing(boundary: str) -> bytes:
+    return f"\r\n--{boundary}--\r\n".encode()
+
+
+def multipart_content_length(boundary: str, content_type: str, ranges: List[Tuple[int, int]], file_size: int) -> int:
+    """multipart/byteranges 응답 전체 길이 (Content-Length)"""
+    length = len(multipart_closing(boundary))
+    for start, end in ranges:
+        length += len(multipart_part_header(boundary, content_type, start, end, file_size))
+        length += end - start + 1
+    return length
+
+
+def _etag_list_matches(header: str, etag: str) -> bool:
+    """If-None-Match 비교 (약한 비교: W/ 접두어 무시, * 는 항상 일치)"""
+    if header.strip() == "*":
+        return True
+    target = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == target:
+            return True
+    return False
+
+
+def is_not_modified(request_headers, etag: str, last_modified: Optional[str]) -> bool:
+    """
+    조건부 GET 평가
+    - If-None-Match가 있으면 ETag만 비교 (If-Modified-Since는 무시)
+    - 없으면 If-Modified-Since와 Last-Modified 비교
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_list_matches(if_none_match, etag)
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        since = parse_http_date(if_modified_since)
+        modified = parse_http_date(last_modified)
+        return since is not None and modified is not None and modified <= since
+    return False
+
+
+def validator_headers(etag: str, last_modified: Optional[str], cache_control: str) -> dict:
+    """ETag / Last-Modified / Cache-Control 응답 헤더"""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    return headers
+
+
+def not_modified_response(etag: str, last_modified: Optional[str], cache_control: str) -> Response:
+    """304 Not Modified (본문 없음)"""
+    return Response(status_code=304, headers=validator_headers(etag, last_modified, cache_control))
@@ -0,0 +1,111 @@
+# jobs.py
+# 변환 작업 큐 (transcode_jobs 테이블)
+#
+# - 별도 브로커 없이 DB 테이블을 큐로 사용 (업로드와 같은 트랜잭션에서 작업 추가 → 유실 없음)
+# - 워커(python -m app.worker)가 조건부 UPDATE 로 작업 하나를 가져감
+#     UPDATE ... SET status='running' WHERE id = ? AND status='pending' → 1행이 바뀐 워커만 실행
+#     워커 여러 개가 동시에 떠도 같은 작업을 두 번 실행하지 않음 (PostgreSQL / SQLite 공통)
+# - 실패하면 TRANSCODE_RETRY_DELAY x 2^(시도-1) 초 뒤 재시도, TRANSCODE_MAX_ATTEMPTS 번 넘으면 failed
+# - running 인 채로 TRANSCODE_LOCK_TIMEOUT 초가 지난 작업(워커가 죽은 경우)은 다시 가져감
+
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import Session
+
+from app.models import (
+    Video, TranscodeJob,
+    JOB_PENDING, JOB_RUNNING, JOB_DONE, JOB_FAILED, PROCESSING_PENDING, PROCESSING_FAILED,
+)
+
+TRANSCODE_MAX_ATTEMPTS = int(os.getenv("TRANSCODE_MAX_ATTEMPTS", 3))
+TRANSCODE_RETRY_DELAY = int(os.getenv("TRANSCODE_RETRY_DELAY", 60))      # 첫 재시도 대기 (초)
+TRANSCODE_LOCK_TIMEOUT = int(os.getenv("TRANSCODE_LOCK_TIMEOUT", 3600))  # 이보다 오래 running 이면 워커가 죽은 것으로 봄
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue_transcode(db: Session, video: Video, thumbnails_only: bool = False) -> TranscodeJob:
+    """
+    변환 작업 추가 (커밋은 호출한 쪽에서, 동영상 저장과 같은 트랜잭션으로)
+    - 새 동영상도 됨 (video_id 는 flush 할 때 채워짐)
+    - 같은 동영상의 대기 중인 예전 작업은 워커가 원본 키를 비교해서 건너뜀
+    - thumbnails_only: ready 동영상의 썸네일만 보충 (상태는 ready 그대로, 워커가 ready 를 보고 썸네일만 만듦)
+    """
+    if not thumbnails_only:
+        video.processing_status = PROCESSING_PENDING
+    job = TranscodeJob(video=video, source_key=video.filename, status=JOB_PENDING, run_after=_now())
+    db.add(job)
+    return job
+
+
+def _claimable(now: datetime):
+    """가져갈 수 있는 작업: 대기 시간이 지난 pending / 워커가 죽은 running (재시도 횟수 이내)"""
+    return or_(
+        and_(TranscodeJob.status == JOB_PENDING, TranscodeJob.run_after <= now),
+        and_(
+            TranscodeJob.status == JOB_RUNNING,
+            TranscodeJob.locked_at < now - timedelta(seconds=TRANSCODE_LOCK_TIMEOUT),
+            TranscodeJob.attempts < TRANSCODE_MAX_ATTEMPTS,
+        ),
+    )
+
+
+def claim_job(db: Session) -> Optional[TranscodeJob]:
+    """다음 작업 하나를 running 으로 바꾸고 반환 (없으면 None)"""
+    now = _now()
+    candidates = [
+        job_id for (job_id,) in
+        db.query(TranscodeJob.id).filter(_claimable(now)).order_by(TranscodeJob.id).limit(10)
+    ]
+    for job_id in candidates:
+        claimed = db.execute(
+            update(TranscodeJob)
+            .where(TranscodeJob.id == job_id, _claimable(now))
+            .values(status=JOB_RUNNING, locked_at=now, attempts=TranscodeJob.attempts + 1)
+        ).rowcount
+        db.commit()
+        if claimed == 1:
+            return db.get(TranscodeJob, job_id)
+    return None
+
+
+def complete_job(db: Session, job: TranscodeJob):
+    """성공 처리 (커밋은 호출한 쪽에서, 결과 저장과 같은 트랜잭션으로)"""
+    job.status = JOB_DONE
+    job.last_error = None
+
+
+def fail_job(db: Session, job: TranscodeJob, error: str) -> bool:
+    """
+    실패 처리 후 커밋
+    Returns: 재시도 예정이면 True (마지막 시도였으면 동영상도 failed)
+    """
+    job.last_error = error[-4000:]
+    retry = job.attempts < TRANSCODE_MAX_ATTEMPTS
+    if retry:
+        job.status = JOB_PENDING
+        job.run_after = _now() + timedelta(seconds=TRANSCODE_RETRY_DELAY * 2 ** (job.attempts - 1))
+    else:
+        job.status = JOB_FAILED
+        video = db.get(Video, job.video_id)
+        if video is not None and video.filename == job.source_key:
+            video.processing_status = PROCESSING_FAILED
+    db.commit()
+    return retry
+
+
+def fail_stale_jobs(db: Session) -> int:
+    """재시도 횟수를 다 쓰고 running 에 멈춘 작업을 failed 로 (워커가 변환 중에 계속 죽는 경우)"""
+    stale = db.query(TranscodeJob).filter(
+        TranscodeJob.status == JOB_RUNNING,
+        TranscodeJob.locked_at < _now() - timedelta(seconds=TRANSCODE_LOCK_TIMEOUT),
+        TranscodeJob.attempts >= TRANSCODE_MAX_ATTEMPTS,
+    ).all()
+    for job in stale:
+        fail_job(db, job, job.last_error or "워커가 응답하지 않음 (TRANSCODE_LOCK_TIMEOUT)")
+    return len(stale)
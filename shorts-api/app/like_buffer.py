@@ -0,0 +1,266 @@
+# like_buffer.py
+# 좋아요 write-behind 버퍼 (LIKE_WRITE_MODE=buffered 일 때만 사용)
+#
+# 인기 동영상에 좋아요가 몰리면 요청마다 INSERT/DELETE + 카운터 UPDATE + COMMIT 이
+# 같은 인덱스 페이지/행을 두고 경쟁합니다. buffered 모드에서는
+# - 토글은 메모리 버퍼에 (동영상, 사용자) → 원하는 상태 로만 기록하고 바로 응답
+# - LIKE_FLUSH_INTERVAL 초마다 모인 변경을 한 트랜잭션으로 반영
+#     (일괄 INSERT ... ON CONFLICT DO NOTHING / 일괄 DELETE → 동영상별 카운터 UPDATE 한 번씩)
+# - 조회(좋아요 상태/개수, 피드)는 아직 반영되지 않은 버퍼 값을 합쳐서 응답 (본인 변경이 바로 보임)
+#
+# 버퍼는 워커 프로세스마다 따로 있습니다. 다른 워커로 간 요청에는 최대 LIKE_FLUSH_INTERVAL 초 늦게 보이고,
+# 프로세스가 비정상 종료되면 아직 반영하지 않은 토글은 사라집니다 (정상 종료 시에는 마지막으로 한 번 반영).
+
+import asyncio
+import logging
+import os
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy import delete, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.cache import invalidate_video
+from app.counters import adjust_like_count
+from app.database import SessionLocal
+from app.executor import run_db
+from app.models import Like, Video
+
+logger = logging.getLogger(__name__)
+
+LIKE_WRITE_MODE = os.getenv("LIKE_WRITE_MODE", "direct").lower()  # direct | buffered
+LIKE_FLUSH_INTERVAL = float(os.getenv("LIKE_FLUSH_INTERVAL", 0.5))  # 초
+_FLUSH_CHUNK_SIZE = 500  # IN (...) 한 번에 넣는 (동영상, 사용자) 쌍 수
+
+Key = Tuple[int, str]  # (video_id, user_identifier)
+
+
+class LikeBuffer:
+    def __init__(self, enabled: bool, interval: float):
+        self.enabled = enabled
+        self.interval = interval
+        self._pending: Dict[Key, Tuple[bool, bool]] = {}   # 키 -> (이전 상태, 원하는 상태)
+        self._inflight: Dict[Key, Tuple[bool, bool]] = {}  # 반영 중인 배치 (commit 전까지 조회에 포함)
+        self._pending_delta: Dict[int, int] = {}           # 동영상 -> 좋아요 수 변화
+        self._inflight_delta: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._task = None
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.flush_errors = 0
+
+    # ---- 조회 ----
+
+    def _buffered_locked(self, key: Key):
+        """버퍼에 남은 최신 상태 (없으면 None)"""
+        entry = self._pending.get(key) or self._inflight.get(key)
+        return entry[1] if entry is not None else None
+
+    def is_liked(self, db: Session, video_id: int, user_identifier: str) -> bool:
+        """버퍼 값이 있으면 그 값, 없으면 DB"""
+        with self._lock:
+            liked = self._buffered_locked((video_id, user_identifier))
+        if liked is not None:
+            return liked
+        return _liked_in_db(db, video_id, user_identifier)
+
+    def count_delta(self, video_id: int) -> int:
+        """아직 DB 카운터에 반영되지 않은 좋아요 수 변화"""
+        if not self.enabled:
+            return 0
+        with self._lock:
+            return self._pending_delta.get(video_id, 0) + self._inflight_delta.get(video_id, 0)
+
+    def liked_overrides(self, video_ids: Iterable[int], user_identifier: str) -> Dict[int, bool]:
+        """피드용: 이 사용자가 버퍼에 남긴 좋아요 상태 {video_id: 상태}"""
+        if not self.enabled:
+            return {}
+        overrides = {}
+        with self._lock:
+            for video_id in video_ids:
+                liked = self._buffered_locked((video_id, user_identifier))
+                if liked is not None:
+                    overrides[video_id] = liked
+        return overrides
+
+    # ---- 기록 ----
+
+    def set_liked(self, db: Session, video_id: int, user_identifier: str, liked: bool) -> bool:
+        """
+        원하는 상태를 버퍼에 기록
+        Returns: 상태가 실제로 바뀌었는지
+        """
+        key = (video_id, user_identifier)
+        with self._lock:
+            current = self._buffered_locked(key)
+        if current is None:
+            current = _liked_in_db(db, video_id, user_identifier)
+
+        with self._lock:
+            buffered = self._buffered_locked(key)
+            if buffered is not None:
+                current = buffered
+            if current == liked:
+                return False
+            # 이전 상태: 이 키의 pending 항목이 생기기 직전 상태 (반영 중인 배치가 있으면 그 결과)
+            entry = self._pending.get(key)
+            base = entry[0] if entry is not None else current
+            if liked == base:
+                # 이전 상태로 되돌림 → 쓸 것이 없음
+                self._pending.pop(key, None)
+            else:
+                self._pending[key] = (base, liked)
+            self._pending_delta[video_id] = self._pending_delta.get(video_id, 0) + int(liked) - int(current)
+            return True
+
+    def toggle(self, db: Session, video_id: int, user_identifier: str) -> bool:
+        """좋아요 토글, Returns: 토글 후 상태"""
+        liked = not self.is_liked(db, video_id, user_identifier)
+        self.set_liked(db, video_id, user_identifier, liked)
+        return liked
+
+    # ---- 반영 ----
+
+    def flush(self) -> int:
+        """
+        버퍼를 DB에 반영 (DB 스레드에서 호출)
+        Returns: INSERT/DELETE 된 행 수
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                self._inflight, self._pending = self._pending, {}
+                self._inflight_delta, self._pending_delta = self._pending_delta, {}
+                batch = dict(self._inflight)
+
+            db = SessionLocal()
+            try:
+                changed, video_ids = _apply_batch(db, batch)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                self.flush_errors += 1
+                logger.error(f"❌ 좋아요 버퍼 반영 실패, 다음 주기에 다시 시도: {e}")
+                with self._lock:
+                    # 배치를 pending 앞에 다시 합침 (그사이 새로 들어온 토글이 최신 상태)
+                    for key, (base, desired) in batch.items():
+                        if key in self._pending:
+                            desired = self._pending[key][1]
+                        if base == desired:
+                            self._pending.pop(key, None)
+                        else:
+                            self._pending[key] = (base, desired)
+                    for video_id, delta in self._inflight_delta.items():
+                        self._pending_delta[video_id] = self._pending_delta.get(video_id, 0) + delta
+                    self._inflight, self._inflight_delta = {}, {}
+                return 0
+            finally:
+                db.close()
+
+            # 반영한 배치를 먼저 비운 뒤 무효화 (순서가 바뀌면 그사이 조회가 commit 된 개수에 같은 증감을
+            # 한 번 더 더해서 캐시에 저장할 수 있음)
+            with self._lock:
+                self._inflight, self._inflight_delta = {}, {}
+            invalidate_video(*video_ids)
+            self.flushes += 1
+            self.flushed_rows += changed
+            return changed
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await run_db(self.flush)
+            except Exception as e:
+                logger.error(f"❌ 좋아요 버퍼 반영 루프 오류: {e}")
+
+    def start(self):
+        """주기적 반영 시작 (서버 시작 시, 이벤트 루프 안에서)"""
+        if self.enabled and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """주기적 반영 중지 + 남은 버퍼 반영 (서버 종료 시)"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self.enabled:
+            await run_db(self.flush)
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending, inflight = len(self._pending), len(self._inflight)
+        return {
+            "mode": "buffered" if self.enabled else "direct",
+            "interval": self.interval,
+            "pending": pending,
+            "inflight": inflight,
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "flush_errors": self.flush_errors,
+        }
+
+
+def _liked_in_db(db: Session, video_id: int, user_identifier: str) -> bool:
+    return db.query(Like.id).filter(
+        Like.video_id == video_id,
+        Like.user_identifier == user_identifier
+    ).first() is not None
+
+
+def _insert_ignoring_duplicates(db: Session):
+    """(video_id, user_identifier) 유니크 인덱스 충돌은 무시하는 INSERT"""
+    dialect = db.get_bind().dialect.name
+    insert = pg_insert if dialect == "postgresql" else sqlite_insert
+    return insert(Like).on_conflict_do_nothing(index_elements=["video_id", "user_identifier"])
+
+
+def _apply_batch(db: Session, batch: Dict[Key, Tuple[bool, bool]]):
+    """
+    한 트랜잭션 안에서 배치 반영 (commit은 호출한 쪽에서)
+    - 좋아요: INSERT ... ON CONFLICT DO NOTHING RETURNING (이미 있으면 무시)
+    - 취소: DELETE ... RETURNING
+    - 카운터는 RETURNING 으로 돌아온 (실제로 바뀐) 행 수만큼만 증감
+    - 그사이 삭제된 동영상의 토글은 버림
+    Returns: (바뀐 행 수, 카운터가 바뀐 동영상 id 목록)
+    """
+    video_ids = {video_id for video_id, _ in batch}
+    alive = {video_id for (video_id,) in db.query(Video.id).filter(Video.id.in_(video_ids)).all()}
+    to_insert = [key for key, (_, liked) in batch.items() if liked and key[0] in alive]
+    to_delete = [key for key, (_, liked) in batch.items() if not liked and key[0] in alive]
+
+    deltas = defaultdict(int)
+    changed = 0
+    if to_insert:
+        inserted = db.execute(
+            _insert_ignoring_duplicates(db).returning(Like.video_id),
+            [{"video_id": video_id, "user_identifier": user_identifier} for video_id, user_identifier in to_insert]
+        ).scalars().all()
+        changed += len(inserted)
+        for video_id in inserted:
+            deltas[video_id] += 1
+    for start in range(0, len(to_delete), _FLUSH_CHUNK_SIZE):
+        chunk = to_delete[start:start + _FLUSH_CHUNK_SIZE]
+        deleted = db.execute(
+            delete(Like)
+            .where(tuple_(Like.video_id, Like.user_identifier).in_(chunk))
+            .returning(Like.video_id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        changed += len(deleted)
+        for video_id in deleted:
+            deltas[video_id] -= 1
+
+    for video_id, delta in deltas.items():
+        if delta:
+            adjust_like_count(db, video_id, delta)
+
+    return changed, [video_id for video_id, delta in deltas.items() if delta]
+
+
+like_buffer = LikeBuffer(LIKE_WRITE_MODE == "buffered", LIKE_FLUSH_INTERVAL)
@@ -0,0 +1,182 @@
+# like_store.py
+# 좋아요 추가/취소/토글 + 카운터 갱신을 원자적으로 처리
+#
+# - likes (video_id, user_identifier) 유니크 인덱스로 같은 사용자의 중복 좋아요를 DB가 막음
+# - PostgreSQL: 좋아요 행 변경과 videos.like_count 갱신을 CTE 한 문장으로 실행하고
+#   바뀐 개수를 같은 왕복에서 돌려받음 (INSERT ... ON CONFLICT DO NOTHING RETURNING / DELETE ... RETURNING)
+# - 그 외 (SQLite 등): ORM으로 같은 트랜잭션 안에서 처리, 동시 INSERT 충돌은 "이미 좋아요"로 처리
+#
+# 동시에 같은 사용자의 토글이 여러 번 들어오면 일부는 다른 요청이 이미 만든 상태를 보고 아무것도 하지 않을 수 있습니다.
+# 어느 경우에도 중복 행은 생기지 않고 like_count 는 실제 행 수와 일치합니다.
+
+import logging
+from typing import Tuple
+
+from sqlalchemy import delete, inspect, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.counters import adjust_like_count, reconcile_counters
+from app.models import Like, Video, LIKE_UNIQUE_INDEX
+
+logger = logging.getLogger(__name__)
+
+# 결과: (좋아요 상태, 변경 후 좋아요 개수, 행이 실제로 바뀌었는지)
+LikeResult = Tuple[bool, int, bool]
+
+_PG_LIKE = text("""
+WITH ins AS (
+    INSERT INTO likes (video_id, user_identifier) VALUES (:video_id, :user_identifier)
+    ON CONFLICT (video_id, user_identifier) DO NOTHING
+    RETURNING id
+), upd AS (
+    UPDATE videos SET like_count = like_count + 1
+    WHERE id = :video_id AND EXISTS (SELECT 1 FROM ins)
+    RETURNING like_count
+)
+SELECT
+    TRUE AS is_liked,
+    COALESCE((SELECT like_count FROM upd), (SELECT like_count FROM videos WHERE id = :video_id)) AS like_count,
+    EXISTS (SELECT 1 FROM ins) AS changed
+""")
+
+_PG_UNLIKE = text("""
+WITH del AS (
+    DELETE FROM likes WHERE video_id = :video_id AND user_identifier = :user_identifier
+    RETURNING id
+), upd AS (
+    UPDATE videos SET like_count = like_count - (SELECT count(*) FROM del)
+    WHERE id = :video_id AND EXISTS (SELECT 1 FROM del)
+    RETURNING like_count
+)
+SELECT
+    FALSE AS is_liked,
+    COALESCE((SELECT like_count FROM upd), (SELECT like_count FROM videos WHERE id = :video_id)) AS like_count,
+    EXISTS (SELECT 1 FROM del) AS changed
+""")
+
+# 행이 있으면 삭제, 없으면 추가
+# 둘 다 일어나지 않았으면 (동시에 다른 요청이 먼저 추가) 이미 좋아요 상태
+_PG_TOGGLE = text("""
+WITH del AS (
+    DELETE FROM likes WHERE video_id = :video_id AND user_identifier = :user_identifier
+    RETURNING id
+), ins AS (
+    INSERT INTO likes (video_id, user_identifier)
+    SELECT :video_id, :user_identifier WHERE NOT EXISTS (SELECT 1 FROM del)
+    ON CONFLICT (video_id, user_identifier) DO NOTHING
+    RETURNING id
+), upd AS (
+    UPDATE videos SET like_count = like_count + (SELECT count(*) FROM ins) - (SELECT count(*) FROM del)
+    WHERE id = :video_id AND (EXISTS (SELECT 1 FROM ins) OR EXISTS (SELECT 1 FROM del))
+    RETURNING like_count
+)
+SELECT
+    NOT EXISTS (SELECT 1 FROM del) AS is_liked,
+    COALESCE((SELECT like_count FROM upd), (SELECT like_count FROM videos WHERE id = :video_id)) AS like_count,
+    EXISTS (SELECT 1 FROM ins) OR EXISTS (SELECT 1 FROM del) AS changed
+""")
+
+
+def _is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _run_pg(db: Session, statement, video_id: int, user_identifier: str) -> LikeResult:
+    row = db.execute(statement, {"video_id": video_id, "user_identifier": user_identifier}).one()
+    db.commit()
+    return bool(row.is_liked), row.like_count or 0, bool(row.changed)
+
+
+def _find_like(db: Session, video_id: int, user_identifier: str):
+    return db.query(Like).filter(
+        Like.video_id == video_id,
+        Like.user_identifier == user_identifier
+    ).first()
+
+
+def _current_count(db: Session, video_id: int) -> int:
+    return db.query(Video.like_count).filter(Video.id == video_id).scalar() or 0
+
+
+def _orm_like(db: Session, video_id: int, user_identifier: str) -> LikeResult:
+    try:
+        db.add(Like(video_id=video_id, user_identifier=user_identifier))
+        db.flush()
+    except IntegrityError:
+        # 이미 좋아요 (유니크 인덱스 충돌) - 동영상이 없어서 난 FK 오류는 호출한 쪽에서 처리
+        db.rollback()
+        if _find_like(db, video_id, user_identifier) is None:
+            raise
+        return True, _current_count(db, video_id), False
+    like_count = adjust_like_count(db, video_id, 1)
+    db.commit()
+    return True, like_count, True
+
+
+def _orm_unlike(db: Session, video_id: int, user_identifier: str) -> LikeResult:
+    # 실제로 지운 행 수로 판단 (동시에 다른 요청이 먼저 지웠으면 0)
+    deleted = db.execute(
+        delete(Like)
+        .where(Like.video_id == video_id, Like.user_identifier == user_identifier)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not deleted:
+        db.rollback()
+        return False, _current_count(db, video_id), False
+    like_count = adjust_like_count(db, video_id, -deleted)
+    db.commit()
+    return False, like_count, True
+
+
+def add_like(db: Session, video_id: int, user_identifier: str) -> LikeResult:
+    """좋아요 (이미 눌렀으면 아무것도 하지 않음)"""
+    if _is_postgres(db):
+        return _run_pg(db, _PG_LIKE, video_id, user_identifier)
+    return _orm_like(db, video_id, user_identifier)
+
+
+def remove_like(db: Session, video_id: int, user_identifier: str) -> LikeResult:
+    """좋아요 취소 (누르지 않았으면 아무것도 하지 않음)"""
+    if _is_postgres(db):
+        return _run_pg(db, _PG_UNLIKE, video_id, user_identifier)
+    return _orm_unlike(db, video_id, user_identifier)
+
+
+def toggle_like_row(db: Session, video_id: int, user_identifier: str) -> LikeResult:
+    """좋아요 토글"""
+    if _is_postgres(db):
+        return _run_pg(db, _PG_TOGGLE, video_id, user_identifier)
+    if _find_like(db, video_id, user_identifier) is not None:
+        is_liked, like_count, changed = _orm_unlike(db, video_id, user_identifier)
+        if changed:
+            return is_liked, like_count, changed
+    return _orm_like(db, video_id, user_identifier)
+
+
+def ensure_like_unique_index(engine):
+    """
+    기존 DB에 (video_id, user_identifier) 유니크 인덱스 추가 (서버 시작 시)
+    - 새 DB는 create_all 이 모델의 인덱스를 만들므로 아무것도 하지 않음
+    - 이미 중복 행이 있으면 가장 오래된 행만 남기고 지운 뒤 카운터를 다시 계산
+    """
+    indexes = {index["name"] for index in inspect(engine).get_indexes("likes")}
+    if LIKE_UNIQUE_INDEX in indexes:
+        return
+
+    with engine.begin() as conn:
+        removed = conn.execute(text(
+            "DELETE FROM likes WHERE id NOT IN "
+            "(SELECT MIN(id) FROM likes GROUP BY video_id, user_identifier)"
+        )).rowcount
+        conn.execute(text(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {LIKE_UNIQUE_INDEX} ON likes (video_id, user_identifier)"
+        ))
+    logger.info(f"✅ 좋아요 유니크 인덱스 생성 (중복 {removed}건 삭제)")
+
+    if removed:
+        db = Session(bind=engine)
+        try:
+            reconcile_counters(db)
+        finally:
+            db.close()
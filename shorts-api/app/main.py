@@ -1,7 +1,18 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from .routers import videos , likes , comments
-from .database import Base, engine , init_db
+from .routers import videos , likes , comments , admin
+from .database import engine, pool_stats, SessionLocal
+from .executor import configure_threadpools
+from .object_cache import video_cache, moov_cache, head_cache
+from .search import configure_search
+from .schema import prepare_schema
+from .suggest import suggest_index
+from .cache import metadata_cache
+from .like_buffer import like_buffer
+from .metrics import MetricsMiddleware, instrument_engine, instrument_s3_client, register_pool_collector, render_metrics
+from .metrics import register_s3_pool_collector
+from .profiling import PROFILE_ENABLED, ProfilingMiddleware, record_sql
+from .s3_client import s3_client, s3_stream_client, s3_pool_stats
 from . import models
 import os
 from dotenv import load_dotenv
@@ -21,11 +32,44 @@ app = FastAPI(
 
 @app.on_event("startup")
 def startup_event():
-    """서버가 시작될 때 단 한 번 실행되어 테이블을 생성합니다."""
-    print("데이터베이스 테이블 초기화 시작...")
-    # Base.metadata는 models.py 임포트로 이미 모든 테이블 정보를 갖고 있습니다.
-    init_db(engine, Base.metadata)
-    print("데이터베이스 초기화 완료.")
+    """서버가 시작될 때 단 한 번 실행됩니다 (스키마 확인, 캐시/인덱스 준비)."""
+    # 스키마 확인 (DB_SCHEMA_MODE=check: alembic 버전만 확인 / create: 테이블·인덱스 생성)
+    prepare_schema(engine)
+    # 검색 설정 (PostgreSQL pg_trgm 임계값)
+    configure_search(engine)
+    # 블로킹 호출(DB/S3)용 스레드풀 크기 설정
+    configure_threadpools()
+    # 로컬 디스크 캐시 인덱스 복구
+    video_cache.load()
+    # 자동완성 인덱스 채우기
+    db = SessionLocal()
+    try:
+        suggest_index.build(db)
+    finally:
+        db.close()
+
+@app.on_event("startup")
+async def start_background_tasks():
+    """좋아요 write-behind 버퍼 주기적 반영 시작 (LIKE_WRITE_MODE=buffered)"""
+    like_buffer.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """남은 좋아요 버퍼를 DB에 반영"""
+    await like_buffer.stop()
+
+# Prometheus 메트릭 (요청 시간/DB 쿼리 수/S3 호출, /metrics)
+instrument_engine(engine)
+instrument_s3_client(s3_client)
+instrument_s3_client(s3_stream_client)
+register_pool_collector(pool_stats)
+register_s3_pool_collector(s3_pool_stats)
+app.add_middleware(MetricsMiddleware)
+
+# 요청 프로파일링 / 느린 요청 기록 (PROFILE_ENABLED=true, /admin/profiles)
+if PROFILE_ENABLED:
+    record_sql(engine)
+    app.add_middleware(ProfilingMiddleware)
 
 # CORS 설정 (프론트엔드 연동용)
 app.add_middleware(
@@ -47,6 +91,7 @@ app.add_middleware(
 app.include_router(videos.router)
 app.include_router(likes.router) 
 app.include_router(comments.router)
+app.include_router(admin.router)
 
 # 루트 엔드포인트
 @app.get("/")
@@ -66,3 +111,48 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus 스크랩용 메트릭"""
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
+
+@app.get("/db/pool/stats")
+async def db_pool_stats():
+    """DB 커넥션 풀 상태 (사용 중/유휴/초과 연결 수, 연결 대기 시간, 무효화/시간 초과 횟수)"""
+    return pool_stats()
+
+@app.get("/s3/pool/stats")
+async def s3_connection_pool_stats():
+    """S3 클라이언트(metadata / stream)별 연결 풀 상태 (사용 중/유휴 연결, 풀 포화 횟수, 타임아웃/재시도 설정)"""
+    return s3_pool_stats()
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """로컬 디스크 캐시 적중/미스/삭제 통계"""
+    return video_cache.stats()
+
+@app.get("/cache/moov/stats")
+async def moov_cache_stats():
+    """moov 미리 읽기 캐시 (moov 가 파일 끝에 있는 원본) 적중/대기 통계"""
+    return moov_cache.stats()
+
+@app.get("/cache/head/stats")
+async def head_cache_stats():
+    """앞부분 미리 받기 캐시 (POST /api/videos/prewarm) 적중/대기 통계"""
+    return head_cache.stats()
+
+@app.get("/cache/metadata/stats")
+async def metadata_cache_stats():
+    """동영상 메타데이터 캐시 적중률 / 무효화 통계"""
+    return metadata_cache.stats()
+
+@app.get("/likes/buffer/stats")
+async def like_buffer_stats():
+    """좋아요 버퍼 상태 (대기 중인 토글 수, 반영 횟수/행 수)"""
+    return like_buffer.stats()
+
+@app.get("/suggest/stats")
+async def suggest_stats():
+    """자동완성 인덱스 크기 (동영상 수, 토큰 수, 대략적인 메모리 사용량)"""
+    return suggest_index.stats()
@@ -0,0 +1,325 @@
+# metrics.py
+# Prometheus 메트릭 (/metrics)
+#
+# - HTTP: 라우트 템플릿(/api/videos/{video_id}/stream)별 요청 수 / 응답 시간 히스토그램, 처리 중인 요청 수
+# - DB: 요청 1건당 쿼리 수 / 쿼리 시간 합계 (라우트별 히스토그램)
+# - S3: 작업(get/range/put/delete/...)별 호출 시간 히스토그램 / 오류 수 / 재시도 수, 클라이언트별 연결 풀 상태
+# - 스트리밍: 동영상별 전송 바이트 (캐시/S3/미리 받은 앞부분 구분)
+#
+# 요청마다 하는 일은 카운터/히스토그램 값 몇 개 갱신뿐이라 운영에서도 켜 둡니다 (METRICS_ENABLED=false 로 끔).
+# uvicorn 워커가 여러 개면 PROMETHEUS_MULTIPROC_DIR 를 설정해야 /metrics 가 모든 워커 값을 합쳐서 보여 줌.
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+METRICS_MAX_VIDEO_SERIES = int(os.getenv("METRICS_MAX_VIDEO_SERIES", 500))  # 동영상별 바이트 시리즈 최대 개수
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+# 응답 시간 구간 (초): 목록/상세는 수 ms, 스트리밍은 전송이 끝날 때까지라 수십 초까지
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+S3_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+DB_QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP 요청 수", ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP 요청 처리 시간 (마지막 바이트 전송까지)",
+    ["method", "route"], buckets=LATENCY_BUCKETS
+)
+HTTP_FIRST_BYTE = Histogram(
+    "http_response_first_byte_seconds", "HTTP 응답 헤더를 보내기까지 걸린 시간",
+    ["method", "route"], buckets=LATENCY_BUCKETS
+)
+HTTP_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "처리 중인 HTTP 요청 수", ["method"], multiprocess_mode="livesum"
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "http_request_db_queries", "요청 1건당 DB 쿼리 수", ["route"], buckets=DB_QUERY_BUCKETS
+)
+DB_SECONDS_PER_REQUEST = Histogram(
+    "http_request_db_seconds", "요청 1건당 DB 쿼리 실행 시간 합계", ["route"], buckets=LATENCY_BUCKETS
+)
+S3_LATENCY = Histogram(
+    "s3_request_duration_seconds", "S3 호출 시간 (재시도 포함, 응답 헤더까지)", ["operation"], buckets=S3_LATENCY_BUCKETS
+)
+S3_ERRORS = Counter(
+    "s3_request_errors_total", "S3 호출 오류 수", ["operation", "code"]
+)
+S3_RETRIES = Counter(
+    "s3_request_retries_total", "S3 재시도 횟수 (첫 시도 제외, 스로틀링/연결 오류 등)", ["operation"]
+)
+VIDEO_BYTES = Counter(
+    "video_bytes_streamed_total", "동영상별 전송 바이트", ["video_id", "source"]
+)
+
+
+# ----- 요청별 DB 쿼리 집계 -----
+
+class _RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+# 미들웨어가 요청마다 새 객체를 넣음 (스레드풀로 넘어갈 때 컨텍스트가 복사되어도 같은 객체를 가리킴)
+_request_stats: ContextVar[Optional[_RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def instrument_engine(engine):
+    """엔진의 쿼리 실행을 현재 요청의 쿼리 수 / 시간에 더함 (요청 밖의 쿼리는 무시)"""
+    if not METRICS_ENABLED:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _request_stats.get() is not None:
+            conn.info["metrics_query_start"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        stats = _request_stats.get()
+        start = conn.info.pop("metrics_query_start", None)
+        if stats is not None and start is not None:
+            stats.queries += 1
+            stats.db_seconds += time.perf_counter() - start
+
+
+# ----- S3 -----
+
+_S3_OPERATIONS = {
+    "GetObject": "get",
+    "PutObject": "put",
+    "DeleteObject": "delete",
+    "DeleteObjects": "delete_batch",
+    "ListObjectsV2": "list",
+    "HeadObject": "head",
+    "CreateMultipartUpload": "multipart_create",
+    "UploadPart": "multipart_part",
+    "CompleteMultipartUpload": "multipart_complete",
+    "AbortMultipartUpload": "multipart_abort",
+}
+
+
+def _s3_before_call(model, params, context, **kwargs):
+    operation = _S3_OPERATIONS.get(model.name, model.name)
+    if operation == "get" and "Range" in params.get("headers", {}):
+        operation = "range"
+    context["metrics_operation"] = operation
+    context["metrics_start"] = time.perf_counter()
+
+
+def _count_s3_retries(operation: str, context: dict):
+    # botocore 가 요청마다 context["retries"]["attempt"] 에 시도 횟수를 남김
+    retries = context.get("retries", {}).get("attempt", 1) - 1
+    if retries > 0:
+        S3_RETRIES.labels(operation).inc(retries)
+
+
+def _s3_after_call(http_response, parsed, context, **kwargs):
+    operation = context.get("metrics_operation")
+    if operation is None:
+        return
+    S3_LATENCY.labels(operation).observe(time.perf_counter() - context["metrics_start"])
+    _count_s3_retries(operation, context)
+    if http_response.status_code >= 400:
+        code = parsed.get("Error", {}).get("Code") or str(http_response.status_code)
+        S3_ERRORS.labels(operation, code).inc()
+
+
+def _s3_after_call_error(exception, context, **kwargs):
+    """응답을 받지 못한 경우 (연결 실패, 타임아웃 등)"""
+    operation = context.get("metrics_operation")
+    if operation is None:
+        return
+    S3_LATENCY.labels(operation).observe(time.perf_counter() - context["metrics_start"])
+    S3_ERRORS.labels(operation, type(exception).__name__).inc()
+    _count_s3_retries(operation, context)
+
+
+def instrument_s3_client(client):
+    """boto3 S3 클라이언트 호출 시간 / 오류를 botocore 이벤트로 기록"""
+    if not METRICS_ENABLED:
+        return
+    events = client.meta.events
+    events.register("before-call.s3", _s3_before_call, unique_id="metrics-before-call")
+    events.register("after-call.s3", _s3_after_call, unique_id="metrics-after-call")
+    events.register("after-call-error.s3", _s3_after_call_error, unique_id="metrics-after-call-error")
+
+
+# ----- 동영상별 전송 바이트 -----
+
+class _VideoSeries:
+    """
+    동영상별 시리즈 수 제한 (LRU)
+    - 최근에 전송한 동영상 METRICS_MAX_VIDEO_SERIES 개만 video_id 라벨로 남기고
+      오래된 것은 시리즈를 지우고 video_id="other" 로 합침 (라벨 개수가 끝없이 늘지 않도록)
+    """
+
+    def __init__(self, max_series: int):
+        self.max_series = max_series
+        self._recent = OrderedDict()  # (video_id, source) -> 누적 바이트
+        self._lock = threading.Lock()
+
+    def add(self, video_id: int, source: str, size: int):
+        key = (str(video_id), source)
+        with self._lock:
+            if key in self._recent:
+                self._recent.move_to_end(key)
+            elif len(self._recent) >= self.max_series:
+                (old_id, old_source), old_bytes = self._recent.popitem(last=False)
+                VIDEO_BYTES.remove(old_id, old_source)
+                VIDEO_BYTES.labels("other", old_source).inc(old_bytes)
+            self._recent[key] = self._recent.get(key, 0) + size
+        VIDEO_BYTES.labels(*key).inc(size)
+
+
+_video_series = _VideoSeries(METRICS_MAX_VIDEO_SERIES)
+
+
+async def count_video_bytes(video_id: int, source: str, body: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """동영상 본문 이터레이터를 감싸서 보낸 바이트를 센다 (source: cache / s3 / prefetch)"""
+    if not METRICS_ENABLED:
+        async for chunk in body:
+            yield chunk
+        return
+    sent = 0
+    try:
+        async for chunk in body:
+            sent += len(chunk)
+            yield chunk
+    finally:
+        # 조각마다 라벨을 찾지 않도록 끝날 때(중간에 끊겨도) 한 번에 더함
+        if sent:
+            _video_series.add(video_id, source, sent)
+
+
+# ----- 커넥션 풀 -----
+
+class _PoolCollector:
+    """스크랩할 때 pool_stats() 를 읽어서 게이지로 내보냄"""
+
+    def __init__(self, stats: Callable[[], dict]):
+        self._stats = stats
+
+    def collect(self):
+        stats = self._stats()
+        for key, help_text in (
+            ("checked_out", "사용 중인 DB 연결 수"),
+            ("idle", "유휴 DB 연결 수"),
+            ("overflow", "풀 크기를 넘어 추가로 연 DB 연결 수"),
+            ("timeouts", "DB 연결 대기 시간 초과 횟수"),
+        ):
+            if key in stats:
+                yield GaugeMetricFamily(f"db_pool_{key}", help_text, value=stats[key])
+
+
+def register_pool_collector(stats: Callable[[], dict]):
+    """DB 커넥션 풀 게이지 등록 (멀티프로세스 모드에서는 워커별 값이라 등록하지 않음)"""
+    if METRICS_ENABLED and not MULTIPROC_DIR:
+        REGISTRY.register(_PoolCollector(stats))
+
+
+class _S3PoolCollector:
+    """스크랩할 때 s3_pool_stats() 를 읽어서 클라이언트(metadata / stream)별로 내보냄"""
+
+    def __init__(self, stats: Callable[[], dict]):
+        self._stats = stats
+
+    def collect(self):
+        stats = self._stats()
+        gauges = {
+            "max_connections": GaugeMetricFamily("s3_pool_max_connections", "S3 연결 풀 크기", labels=["client"]),
+            "in_use": GaugeMetricFamily("s3_pool_connections_in_use", "사용 중인 S3 연결 수 (풀 안)", labels=["client"]),
+            "idle": GaugeMetricFamily("s3_pool_connections_idle", "유휴 S3 연결 수", labels=["client"]),
+        }
+        counters = {
+            "connections_created": CounterMetricFamily(
+                "s3_pool_connections_created", "새로 연 S3 연결 수", labels=["client"]
+            ),
+            "exhausted": CounterMetricFamily(
+                "s3_pool_exhausted", "풀에 남은 연결이 없어 재사용하지 않을 연결을 새로 연 횟수", labels=["client"]
+            ),
+        }
+        for client, values in stats.items():
+            for key, family in {**gauges, **counters}.items():
+                family.add_metric([client], values[key])
+        yield from gauges.values()
+        yield from counters.values()
+
+
+def register_s3_pool_collector(stats: Callable[[], dict]):
+    """S3 연결 풀 게이지 등록 (DB 풀과 같은 이유로 멀티프로세스 모드에서는 등록하지 않음)"""
+    if METRICS_ENABLED and not MULTIPROC_DIR:
+        REGISTRY.register(_S3PoolCollector(stats))
+
+
+# ----- 미들웨어 / 출력 -----
+
+class MetricsMiddleware:
+    """
+    요청별 메트릭을 기록하는 ASGI 미들웨어
+    - BaseHTTPMiddleware 대신 순수 ASGI 로 구현 (응답 본문을 다시 감싸지 않아 스트리밍에 부담이 없음)
+    - 라우트 라벨은 실제 경로가 아닌 라우트 템플릿 (매칭되지 않으면 "unmatched")
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        start = time.perf_counter()
+        stats = _RequestStats()
+        token = _request_stats.set(stats)
+        status_code = 500
+        first_byte = None
+
+        async def send_wrapper(message):
+            nonlocal status_code, first_byte
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                first_byte = time.perf_counter() - start
+            await send(message)
+
+        in_progress = HTTP_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress.dec()
+            _request_stats.reset(token)
+            route = scope.get("route")
+            route = getattr(route, "path", "unmatched")
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            HTTP_LATENCY.labels(method, route).observe(time.perf_counter() - start)
+            if first_byte is not None:
+                HTTP_FIRST_BYTE.labels(method, route).observe(first_byte)
+            DB_QUERIES_PER_REQUEST.labels(route).observe(stats.queries)
+            DB_SECONDS_PER_REQUEST.labels(route).observe(stats.db_seconds)
+
+
+def render_metrics() -> tuple:
+    """/metrics 응답 본문과 Content-Type"""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -60,12 +60,25 @@
 #     video = relationship("Video", back_populates="comments")
 
 # models.py
-from sqlalchemy import Column, Integer, String, BigInteger, DateTime, ForeignKey, Boolean, Text
+from sqlalchemy import Column, Integer, String, BigInteger, DateTime, ForeignKey, Boolean, Text, Index, Float
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
 from datetime import datetime
 
+# Video.processing_status
+PROCESSING_NONE = "none"              # 변환 기능 이전에 올린 동영상 (원본만 있음)
+PROCESSING_PENDING = "pending"        # 변환 대기
+PROCESSING_RUNNING = "processing"     # 변환 중
+PROCESSING_READY = "ready"            # HLS / 웹용 MP4 준비됨
+PROCESSING_FAILED = "failed"          # 재시도 횟수를 넘겨 실패 (원본은 그대로 재생 가능)
+
+# TranscodeJob.status
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
 class Video(Base):
     __tablename__ = "videos"
     
@@ -75,6 +88,19 @@ class Video(Base):
     file_path = Column(String(1000), nullable=False)  # 길이 명시 (S3 URL용)
     file_size = Column(BigInteger, nullable=False)
     content_type = Column(String(100))  # 길이 명시
+
+    # 비정규화 카운터 (좋아요/댓글 추가·삭제와 같은 트랜잭션에서 증감, app/counters.py 참고)
+    like_count = Column(Integer, nullable=False, default=0, server_default="0")
+    comment_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # 변환(트랜스코딩) 상태 (app/transcode.py, python -m app.worker)
+    processing_status = Column(String(20), nullable=False, default=PROCESSING_NONE, server_default=PROCESSING_NONE)
+    duration = Column(Float)  # 재생 시간 (초, 변환할 때 채움)
+
+    # 원본 파일의 moov 박스 위치 / 크기 (app/mp4.py, MP4/MOV 가 아니면 NULL)
+    # 업로드 시 faststart 로 옮기므로 보통 앞쪽, 직접 업로드(S3)는 그대로라 끝에 있을 수 있음
+    moov_offset = Column(BigInteger)
+    moov_size = Column(BigInteger)
     
     # PostgreSQL에서는 func.now() 권장
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -82,27 +108,95 @@ class Video(Base):
     
     likes = relationship("Like", back_populates="video", cascade="all, delete-orphan")
     comments = relationship("Comments", back_populates="video", cascade="all, delete-orphan")
+    renditions = relationship("VideoRendition", back_populates="video", cascade="all, delete-orphan")
+
+
+LIKE_UNIQUE_INDEX = "uq_likes_video_user"
+COMMENT_LIST_INDEX = "ix_comments_video_created_id"
 
 
 class Like(Base):
     __tablename__ = "likes"
     
     id = Column(Integer, primary_key=True, index=True)
-    video_id = Column(Integer, ForeignKey("videos.id", ondelete="CASCADE"), nullable=False, index=True)
+    # video_id 단독 인덱스 없음: 유니크 인덱스 (video_id, user_identifier) 의 앞 컬럼으로 사용
+    video_id = Column(Integer, ForeignKey("videos.id", ondelete="CASCADE"), nullable=False)
     user_identifier = Column(String(100), nullable=False, index=True)  # 길이 명시
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     video = relationship("Video", back_populates="likes")
 
+    # 같은 사용자는 동영상 하나에 좋아요 한 번만 (app/like_store.py)
+    # 좋아요 상태 조회, 피드의 video_id IN (...) AND user_identifier = ? 도 이 인덱스 사용
+    __table_args__ = (
+        Index(LIKE_UNIQUE_INDEX, "video_id", "user_identifier", unique=True),
+    )
+
 
 class Comments(Base):
     __tablename__ = "comments"
 
     id = Column(Integer, primary_key=True, index=True)
-    video_id = Column(Integer, ForeignKey("videos.id", ondelete="CASCADE"), nullable=False, index=True)
+    # video_id 단독 인덱스 없음: 아래 복합 인덱스의 앞 컬럼으로 사용
+    video_id = Column(Integer, ForeignKey("videos.id", ondelete="CASCADE"), nullable=False)
     user_identifier = Column(String(100), nullable=False, index=True)  # 길이 명시
     content = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
-    video = relationship("Video", back_populates="comments")
\ No newline at end of file
+    video = relationship("Video", back_populates="comments")
+
+    # 댓글 목록: video_id = ? ORDER BY created_at DESC, id DESC (+ 커서 조건) 을 정렬 없이 인덱스 순서대로 읽음
+    __table_args__ = (
+        Index(COMMENT_LIST_INDEX, video_id, created_at.desc(), id.desc()),
+    )
+
+
+class VideoRendition(Base):
+    """변환 결과물 (HLS 화질별 플레이리스트 / 웹용 MP4)"""
+    __tablename__ = "video_renditions"
+
+    id = Column(Integer, primary_key=True)
+    video_id = Column(Integer, ForeignKey("videos.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(String(10), nullable=False)          # hls / mp4
+    name = Column(String(20), nullable=False)          # 화질 이름 (예: 720p)
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+    bandwidth = Column(Integer, nullable=False)        # 최대 비트레이트 (bps, EXT-X-STREAM-INF BANDWIDTH)
+    codecs = Column(String(100))                       # 예: avc1.64001f,mp4a.40.2
+    s3_key = Column(String(500), nullable=False)       # hls: 플레이리스트 키 (세그먼트는 같은 경로) / mp4: 파일 키
+    file_size = Column(BigInteger, nullable=False)     # 세그먼트/파일 합계 (bytes)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    video = relationship("Video", back_populates="renditions")
+
+    __table_args__ = (
+        Index("uq_video_renditions_video_kind_name", "video_id", "kind", "name", unique=True),
+    )
+
+
+class TranscodeJob(Base):
+    """
+    변환 작업 큐 (DB 테이블 기반, app/jobs.py)
+    - 업로드/파일 교체 시 pending 으로 추가, 워커가 하나씩 running 으로 가져감
+    """
+    __tablename__ = "transcode_jobs"
+
+    id = Column(Integer, primary_key=True)
+    video_id = Column(Integer, ForeignKey("videos.id", ondelete="CASCADE"), nullable=False)
+    source_key = Column(String(255), nullable=False)   # 변환할 원본 S3 키 (파일 교체 후 옛 작업 구분용)
+    status = Column(String(20), nullable=False, default=JOB_PENDING, server_default=JOB_PENDING)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    run_after = Column(DateTime(timezone=True), server_default=func.now())  # 재시도 대기 (이 시각 이후에 가져감)
+    locked_at = Column(DateTime(timezone=True))        # 워커가 가져간 시각 (오래되면 다시 가져감)
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    video = relationship("Video")
+
+    # 워커 조회: status = 'pending' AND run_after <= now ORDER BY id / 동영상 삭제 시 CASCADE
+    __table_args__ = (
+        Index("ix_transcode_jobs_status_run_after", "status", "run_after"),
+        Index("ix_transcode_jobs_video_id", "video_id"),
+    )
@@ -0,0 +1,264 @@
+# mp4.py
+# MP4 / MOV (ISO-BMFF) 박스 구조 분석과 faststart 재배치 (재인코딩 없음)
+#
+# 휴대폰으로 찍은 파일은 moov(재생에 필요한 샘플 인덱스)가 파일 끝에 있는 경우가 많음
+#   → 플레이어가 앞부분을 요청한 뒤 끝부분(moov)을 다시 요청해야 재생을 시작 (S3 왕복 1회 추가)
+# 업로드할 때 moov 를 mdat 앞으로 옮긴 순서로 읽어서 그대로 S3 에 올림
+# - 최상위 박스 헤더만 읽고 (mdat 본문은 읽지 않음) moov 만 메모리에 올려 청크 오프셋(stco/co64)을 고침
+# - 나머지는 원본에서 구간 단위로 읽어서 넘김 (임시 파일을 새로 만들지 않음)
+# - 고칠 수 없는 파일(조각난 MP4, 압축된 moov, 32비트 오프셋 넘침 등)은 원본 그대로
+#
+# 읽기는 read_at(오프셋, 길이) 콜백으로 받아서 업로드 파일과 S3 객체(Range 요청)에 같이 사용
+
+import logging
+import os
+import struct
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+MAX_TOP_LEVEL_BOXES = 64           # 최상위 박스가 이보다 많으면 해석하지 않음 (보통 3~5개)
+MAX_MOOV_SIZE = 64 * 1024 * 1024   # 메모리에 올릴 moov 최대 크기
+
+# stco/co64 까지 내려가는 컨테이너 박스
+_CONTAINERS = {"moov", "trak", "mdia", "minf", "stbl"}
+
+ReadAt = Callable[[int, int], Awaitable[bytes]]
+
+
+class Mp4Error(Exception):
+    """박스 구조를 해석하거나 고칠 수 없음"""
+    pass
+
+
+@dataclass(frozen=True)
+class Box:
+    type: str
+    offset: int
+    size: int
+
+    @property
+    def end(self) -> int:
+        return self.offset + self.size
+
+
+@dataclass(frozen=True)
+class Layout:
+    """최상위 박스 배치"""
+    boxes: Tuple[Box, ...]
+    moov: Box
+
+    @property
+    def first_mdat(self) -> Optional[Box]:
+        return next((box for box in self.boxes if box.type == "mdat"), None)
+
+    @property
+    def faststart(self) -> bool:
+        """moov 가 미디어 데이터보다 앞에 있음"""
+        mdat = self.first_mdat
+        return mdat is None or self.moov.offset < mdat.offset
+
+    @property
+    def fragmented(self) -> bool:
+        return any(box.type == "moof" for box in self.boxes)
+
+
+def _box_type(raw: bytes) -> str:
+    if not all(0x20 <= b <= 0x7E or b == 0xA9 for b in raw):  # QuickTime 은 ©xyz 형식도 씀
+        raise Mp4Error("박스 타입이 올바르지 않습니다.")
+    return raw.decode("latin-1")
+
+
+async def read_boxes(read_at: ReadAt, file_size: int) -> List[Box]:
+    """최상위 박스 목록 (박스마다 헤더 16바이트만 읽음)"""
+    boxes = []
+    offset = 0
+    while offset < file_size:
+        if len(boxes) >= MAX_TOP_LEVEL_BOXES:
+            raise Mp4Error("최상위 박스가 너무 많습니다.")
+        header = await read_at(offset, 16)
+        if len(header) < 8:
+            raise Mp4Error("박스 헤더가 잘렸습니다.")
+        size, raw_type = struct.unpack(">I4s", header[:8])
+        header_size = 8
+        if size == 1:  # 64비트 크기
+            if len(header) < 16:
+                raise Mp4Error("박스 헤더가 잘렸습니다.")
+            size = struct.unpack(">Q", header[8:16])[0]
+            header_size = 16
+        elif size == 0:  # 파일 끝까지
+            size = file_size - offset
+        if size < header_size or offset + size > file_size:
+            raise Mp4Error("박스 크기가 파일 범위를 벗어납니다.")
+        boxes.append(Box(_box_type(raw_type), offset, size))
+        offset += size
+    return boxes
+
+
+async def analyze(read_at: ReadAt, file_size: int) -> Optional[Layout]:
+    """
+    최상위 박스 배치 분석
+    - ISO-BMFF 가 아니거나(webm, avi 등) moov 가 하나가 아니면 None
+    """
+    try:
+        boxes = await read_boxes(read_at, file_size)
+    except Mp4Error:
+        return None
+    moovs = [box for box in boxes if box.type == "moov"]
+    if len(moovs) != 1:
+        return None
+    return Layout(tuple(boxes), moovs[0])
+
+
+def _patch_chunk_offsets(data: bytearray, start: int, end: int, shift: Callable[[int], int]) -> int:
+    """
+    data[start:end] 안의 박스를 따라가며 stco/co64 청크 오프셋을 shift 로 바꿈
+    Returns: 고친 오프셋 표 개수
+    """
+    patched = 0
+    offset = start
+    while offset + 8 <= end:
+        size, raw_type = struct.unpack_from(">I4s", data, offset)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", data, offset + 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+        if size < header_size or offset + size > end:
+            raise Mp4Error("moov 안의 박스 크기가 올바르지 않습니다.")
+
+        box_type = raw_type.decode("latin-1")
+        if box_type in _CONTAINERS:
+            patched += _patch_chunk_offsets(data, offset + header_size, offset + size, shift)
+        elif box_type in ("stco", "co64"):
+            # version/flags 4바이트, entry_count 4바이트, 오프셋 배열 (stco 32비트 / co64 64비트)
+            table = offset + header_size
+            count = struct.unpack_from(">I", data, table + 4)[0]
+            fmt = f">{count}{'I' if box_type == 'stco' else 'Q'}"
+            if table + 8 + struct.calcsize(fmt) > offset + size:
+                raise Mp4Error(f"{box_type} 항목 수가 박스 크기와 맞지 않습니다.")
+            values = [shift(value) for value in struct.unpack_from(fmt, data, table + 8)]
+            if box_type == "stco" and values and max(values) > 0xFFFFFFFF:
+                raise Mp4Error("32비트 청크 오프셋 범위를 넘습니다.")
+            struct.pack_into(fmt, data, table + 8, *values)
+            patched += 1
+        offset += size
+    return patched
+
+
+@dataclass
+class FaststartPlan:
+    """
+    faststart 파일을 만드는 순서
+    - segments: 원본 구간 (오프셋, 길이) 또는 새로 만든 바이트(고친 moov)
+    - 새 파일에서 moov 위치 / 크기
+    """
+    segments: List[Union[Tuple[int, int], bytes]]
+    moov_offset: int
+    moov_size: int
+
+
+async def plan_faststart(read_at: ReadAt, file_size: int, layout: Layout) -> FaststartPlan:
+    """
+    moov 를 첫 mdat 앞으로 옮기는 순서 (이미 faststart 이거나 고칠 수 없으면 Mp4Error)
+    - [첫 mdat 앞 박스들] + moov + [첫 mdat ~ moov 앞] + [moov 뒤]
+    - 첫 mdat ~ moov 사이 바이트만 moov 크기만큼 뒤로 밀리므로 그 범위를 가리키는 청크 오프셋만 고침
+    """
+    if layout.faststart:
+        raise Mp4Error("이미 moov 가 앞에 있습니다.")
+    if layout.fragmented:
+        raise Mp4Error("조각난(fragmented) MP4 는 옮기지 않습니다.")
+    moov, mdat_offset = layout.moov, layout.first_mdat.offset
+    if moov.size > MAX_MOOV_SIZE:
+        raise Mp4Error("moov 가 너무 큽니다.")
+
+    data = bytearray(await read_at(moov.offset, moov.size))
+    if len(data) != moov.size:
+        raise Mp4Error("moov 를 끝까지 읽지 못했습니다.")
+
+    def shift(value: int) -> int:
+        return value + moov.size if mdat_offset <= value < moov.offset else value
+
+    # 압축된 moov(cmov) 등 오프셋 표를 찾지 못하면 옮기면 안 됨
+    if _patch_chunk_offsets(data, 0, len(data), shift) == 0:
+        raise Mp4Error("청크 오프셋 표(stco/co64)가 없습니다.")
+
+    segments = [(0, mdat_offset), bytes(data), (mdat_offset, moov.offset - mdat_offset), (moov.end, file_size - moov.end)]
+    return FaststartPlan(
+        segments=[segment for segment in segments if isinstance(segment, bytes) or segment[1] > 0],
+        moov_offset=mdat_offset,
+        moov_size=moov.size,
+    )
+
+
+class RearrangedFile:
+    """
+    원본 파일을 FaststartPlan 순서로 읽는 파일 객체
+    - stream_upload_to_s3 에 UploadFile 대신 넘김 (read / size 만 사용)
+    - source: async seek / read 가 있는 파일 (UploadFile)
+    """
+
+    def __init__(self, source, plan: FaststartPlan, size: int):
+        self.source = source
+        self.size = size
+        self._segments = plan.segments
+        self._index = 0     # 지금 읽는 구간
+        self._position = 0  # 구간 안에서 읽은 바이트
+
+    async def read(self, size: int = -1) -> bytes:
+        chunks = []
+        while size != 0 and self._index < len(self._segments):
+            segment = self._segments[self._index]
+            if isinstance(segment, bytes):
+                remaining = len(segment) - self._position
+                length = remaining if size < 0 else min(size, remaining)
+                chunk = segment[self._position:self._position + length]
+            else:
+                offset, total = segment
+                remaining = total - self._position
+                length = remaining if size < 0 else min(size, remaining)
+                await self.source.seek(offset + self._position)
+                chunk = await self.source.read(length)
+                if len(chunk) != length:
+                    raise Mp4Error("원본 파일이 예상보다 짧습니다.")
+            chunks.append(chunk)
+            self._position += length
+            if size > 0:
+                size -= length
+            if self._position == (len(segment) if isinstance(segment, bytes) else segment[1]):
+                self._index += 1
+                self._position = 0
+        return b"".join(chunks)
+
+
+async def faststart_upload(file) -> tuple:
+    """
+    업로드 파일(UploadFile)을 faststart 순서로 읽는 파일 객체로 바꿈
+    - 옮길 필요가 없거나 MP4 가 아니면 원본 파일 객체 그대로
+    Returns: (파일 객체, moov 오프셋, moov 크기) - MP4 가 아니면 오프셋/크기는 None
+    """
+    size = file.size
+    if size is None:
+        file.file.seek(0, os.SEEK_END)
+        size = file.file.tell()
+
+    async def read_at(offset: int, length: int) -> bytes:
+        await file.seek(offset)
+        return await file.read(length)
+
+    layout = await analyze(read_at, size)
+    await file.seek(0)
+    if layout is None:
+        return file, None, None
+    if layout.faststart:
+        return file, layout.moov.offset, layout.moov.size
+    try:
+        plan = await plan_faststart(read_at, size, layout)
+    except Mp4Error as e:
+        logger.warning(f"⚠️ faststart 변환 건너뜀 ({file.filename}): {e}")
+        await file.seek(0)
+        return file, layout.moov.offset, layout.moov.size
+    logger.info(f"✅ faststart 변환: {file.filename} (moov {layout.moov.size} bytes, {layout.moov.offset} → {plan.moov_offset})")
+    return RearrangedFile(file, plan, size), plan.moov_offset, plan.moov_size
@@ -0,0 +1,325 @@
+# object_cache.py
+# 자주 재생되는 S3 객체를 로컬 디스크에 저장해 두는 read-through 캐시
+#
+# - 키: Video.filename 또는 웹용 MP4 키 (업로드마다 새 uuid라서 내용이 바뀌지 않음 → 만료 없이 삭제/교체 시에만 제거)
+# - 용량: VIDEO_CACHE_MAX_BYTES 를 넘으면 가장 오래 안 쓴 파일부터 삭제 (LRU)
+# - 채우기: 캐시에 없으면 요청은 S3에서 바로 응답하고, 백그라운드에서 객체 전체를 한 번만 내려받음
+#           (같은 키에 동시에 미스가 나도 다운로드는 하나만 진행 = single-flight)
+# - 읽기: 파일을 핸들러에서 미리 열어 두므로 전송 중에 LRU로 삭제되어도 응답은 끝까지 나감
+# - 삭제/교체: discard 한 키는 진행 중인 채우기가 끝나도 다시 넣지 않음 (파일 열기/삭제는 스레드에서)
+#
+# moov_cache: moov 가 파일 끝에 있는 동영상의 moov 구간만 메모리에 두는 작은 LRU 캐시
+# - 앞부분 요청이 오면 moov 를 백그라운드로 미리 받아 두고, 이어서 오는 끝부분 요청은 S3 를 거치지 않고 응답
+# head_cache: 곧 재생할 동영상의 앞부분(첫 몇 초)을 메모리에 두는 LRU 캐시 (POST /api/videos/prewarm 이 채움)
+# - 다음 스와이프의 첫 요청은 앞부분을 바로 보내고 나머지만 S3 에서 이어서 받음
+
+import asyncio
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Optional
+from urllib.parse import quote, unquote
+
+from anyio import to_thread
+
+from app.executor import run_s3
+from app.s3_client import s3_stream_client, BUCKET_NAME, read_range_from_s3
+
+logger = logging.getLogger(__name__)
+
+VIDEO_CACHE_DIR = Path(os.getenv("VIDEO_CACHE_DIR", "uploads/videos"))
+VIDEO_CACHE_MAX_BYTES = int(os.getenv("VIDEO_CACHE_MAX_BYTES", 2 * 1024 * 1024 * 1024))  # 0이면 사용 안 함
+CACHE_READ_CHUNK_SIZE = 64 * 1024
+MOOV_CACHE_MAX_BYTES = int(os.getenv("MOOV_CACHE_MAX_BYTES", 64 * 1024 * 1024))  # 0이면 사용 안 함
+HEAD_CACHE_MAX_BYTES = int(os.getenv("HEAD_CACHE_MAX_BYTES", 256 * 1024 * 1024))  # 0이면 사용 안 함
+
+_TMP_SUFFIX = ".part"
+
+
+class DiskObjectCache:
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # 키 -> 파일 크기 (오래 안 쓴 순서)
+        self._size = 0
+        self._lock = threading.Lock()
+        self._fills = {}  # 키 -> 진행 중인 채우기 Task
+        self._discarded_fills = set()  # 채우는 도중 삭제/교체된 키 (다 받아도 캐시에 넣지 않음)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.fills = 0
+        self.fill_errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def load(self):
+        """
+        서버 시작 시 디스크에 남아 있는 캐시 파일로 인덱스 복구
+        - 중간에 끊긴 임시 파일은 삭제
+        """
+        if not self.enabled:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        files = []
+        for path in self.directory.iterdir():
+            if not path.is_file() or path.name.startswith("."):
+                continue
+            if path.name.endswith(_TMP_SUFFIX):
+                path.unlink(missing_ok=True)
+                continue
+            stat = path.stat()
+            files.append((stat.st_atime, unquote(path.name), stat.st_size))
+
+        with self._lock:
+            for _, key, size in sorted(files):
+                self._entries[key] = size
+                self._size += size
+            self._evict_locked()
+
+    def _path(self, key: str) -> Path:
+        # 변환 결과 키(renditions/{stem}/mp4/720p.mp4)도 한 디렉토리에 평평하게 저장 ("/" → %2F)
+        return self.directory / quote(key, safe="")
+
+    def _evict_locked(self):
+        while self._size > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._size -= size
+            self.evictions += 1
+            self._path(key).unlink(missing_ok=True)
+
+    def _open_locked(self, key: str, size: int) -> Optional[BinaryIO]:
+        cached_size = self._entries.get(key)
+        if cached_size is None:
+            return None
+        if cached_size != size:
+            # 같은 키에 다른 내용이 올라온 경우 (예: 다시 변환된 결과) → 버리고 S3에서 다시 채움
+            self._size -= self._entries.pop(key)
+            self._path(key).unlink(missing_ok=True)
+            return None
+        try:
+            file = open(self._path(key), "rb")
+        except FileNotFoundError:
+            # 누군가 디스크에서 지운 경우
+            self._size -= self._entries.pop(key)
+            return None
+        self._entries.move_to_end(key)
+        return file
+
+    async def open(self, key: str, size: int) -> Optional[BinaryIO]:
+        """
+        캐시된 파일 열기 (적중 시 LRU 갱신, 파일 열기는 스레드에서)
+        - 없거나 캐시된 크기가 size(DB에 기록된 객체 크기)와 다르면 None
+        """
+        if not self.enabled:
+            return None
+        return await to_thread.run_sync(self._open, key, size)
+
+    def _open(self, key: str, size: int) -> Optional[BinaryIO]:
+        with self._lock:
+            file = self._open_locked(key, size)
+            if file is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return file
+
+    def schedule_fill(self, key: str, size: int):
+        """
+        백그라운드로 S3 객체 전체를 캐시에 내려받기 (이벤트 루프에서 호출)
+        - 이미 진행 중이면 아무것도 하지 않음
+        - 캐시 용량보다 큰 객체는 캐시하지 않음
+        """
+        if not self.enabled or size > self.max_bytes or key in self._fills:
+            return
+        task = asyncio.get_running_loop().create_task(self._fill(key))
+        self._fills[key] = task
+        task.add_done_callback(lambda _: self._fills.pop(key, None))
+
+    async def _fill(self, key: str):
+        try:
+            with self._lock:
+                if key in self._entries:
+                    return
+            await run_s3(self._download, key)
+            self.fills += 1
+        except Exception as e:
+            self.fill_errors += 1
+            logger.warning(f"⚠️ 캐시 채우기 실패: {key} ({e})")
+        finally:
+            with self._lock:
+                self._discarded_fills.discard(key)
+
+    def _download(self, key: str):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.directory / f".{uuid.uuid4().hex}{_TMP_SUFFIX}"
+        try:
+            s3_stream_client.download_file(BUCKET_NAME, key, str(tmp_path))
+            size = tmp_path.stat().st_size
+            with self._lock:
+                # 받는 도중 discard 된 객체(삭제/교체)는 다시 캐시하지 않음
+                if key in self._discarded_fills:
+                    return
+                os.replace(tmp_path, self._path(key))
+                if key in self._entries:
+                    self._size -= self._entries.pop(key)
+                self._entries[key] = size
+                self._size += size
+                self._evict_locked()
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    async def discard(self, key: str):
+        """삭제/교체된 객체를 캐시에서 제거 (진행 중인 채우기도 결과를 버림)"""
+        await to_thread.run_sync(self._discard, lambda k: k == key)
+
+    async def discard_prefix(self, prefix: str):
+        """prefix 로 시작하는 객체를 캐시에서 모두 제거 (변환 결과 삭제 시)"""
+        await to_thread.run_sync(self._discard, lambda k: k.startswith(prefix))
+
+    def _discard(self, match):
+        with self._lock:
+            self._discarded_fills.update(key for key in list(self._fills) if match(key))
+            for key in [key for key in self._entries if match(key)]:
+                self._size -= self._entries.pop(key)
+                self._path(key).unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "fills": self.fills,
+                "fill_errors": self.fill_errors,
+                "fills_in_progress": len(self._fills),
+            }
+
+
+class RangeMemoryCache:
+    """
+    S3 객체의 한 구간(moov / 앞부분)을 메모리에 두는 LRU 캐시
+    - 키마다 구간 하나 (오프셋, 바이트)
+    - 채우는 중인 구간을 요청하면 S3 에 다시 묻지 않고 채우기가 끝나기를 기다림
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # 키 -> (오프셋, 바이트)
+        self._size = 0
+        self._lock = threading.Lock()
+        self._fills = {}  # 키 -> (오프셋, 길이, 진행 중인 채우기 Task)
+        self.hits = 0
+        self.waits = 0
+        self.fills = 0
+        self.fill_errors = 0
+
+    def _read_locked(self, key: str, start: int, end: int, partial: bool) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        offset, data = entry
+        if start < offset or start >= offset + len(data) or (end >= offset + len(data) and not partial):
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return data[start - offset:end - offset + 1]
+
+    async def read(self, key: str, start: int, end: int, partial: bool = False) -> Optional[bytes]:
+        """
+        [start, end] 구간 (이벤트 루프에서 호출)
+        - partial=True 면 start 부터 캐시에 있는 만큼만 (앞부분만 있어도 반환)
+        - 캐시에 없으면 None, 그 구간을 채우는 중이면 끝날 때까지 기다림
+        """
+        if not self._entries and not self._fills:
+            return None
+        fill = self._fills.get(key)
+        if fill is not None and fill[0] <= start < fill[0] + fill[1] and (partial or end < fill[0] + fill[1]):
+            self.waits += 1
+            await asyncio.shield(fill[2])
+        with self._lock:
+            return self._read_locked(key, start, end, partial)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries or key in self._fills
+
+    def schedule_fill(self, key: str, offset: int, length: int):
+        """백그라운드로 [offset, offset + length) 구간 내려받기 (이미 있거나 진행 중이면 무시)"""
+        if length <= 0 or length > self.max_bytes or key in self._entries or key in self._fills:
+            return
+        task = asyncio.get_running_loop().create_task(self._fill(key, offset, length))
+        self._fills[key] = (offset, length, task)
+        task.add_done_callback(lambda _: self._fills.pop(key, None))
+
+    async def _fill(self, key: str, offset: int, length: int):
+        try:
+            data = await run_s3(read_range_from_s3, key, offset, length)
+        except Exception as e:
+            self.fill_errors += 1
+            logger.warning(f"⚠️ 구간 미리 읽기 실패: {key} ({e})")
+            return
+        with self._lock:
+            self._entries[key] = (offset, data)
+            self._size += len(data)
+            while self._size > self.max_bytes and self._entries:
+                _, (_, old) = self._entries.popitem(last=False)
+                self._size -= len(old)
+            self.fills += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "waits": self.waits,
+                "fills": self.fills,
+                "fill_errors": self.fill_errors,
+                "fills_in_progress": len(self._fills),
+            }
+
+
+async def iterate_file(file: BinaryIO, start: int, length: int) -> AsyncIterator[bytes]:
+    """
+    열린 캐시 파일의 [start, start + length) 구간을 조각 단위로 읽는 async 이터레이터
+    - 다 읽으면 파일을 닫음
+    """
+    try:
+        offset = start
+        remaining = length
+        while remaining > 0:
+            chunk = await to_thread.run_sync(os.pread, file.fileno(), min(CACHE_READ_CHUNK_SIZE, remaining), offset)
+            if not chunk:
+                break
+            offset += len(chunk)
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+async def iterate_bytes(data: bytes) -> AsyncIterator[bytes]:
+    """메모리에 있는 본문을 StreamingResponse 용 async 이터레이터로"""
+    yield data
+
+
+video_cache = DiskObjectCache(VIDEO_CACHE_DIR, VIDEO_CACHE_MAX_BYTES)
+moov_cache = RangeMemoryCache(MOOV_CACHE_MAX_BYTES)
+head_cache = RangeMemoryCache(HEAD_CACHE_MAX_BYTES)
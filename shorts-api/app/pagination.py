@@ -0,0 +1,73 @@
+# pagination.py
+# 커서(keyset) 페이지네이션 헬퍼
+#
+# offset 방식은 건너뛸 행을 모두 스캔하므로 뒤 페이지로 갈수록 느려집니다.
+# 커서 방식은 마지막 행의 정렬 키 (id) 또는 (created_at, id) 를 넘겨받아
+# "그 다음 행부터" 조회하므로 N번째 페이지도 첫 페이지와 비용이 같습니다.
+
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(**values) -> str:
+    """정렬 키 값을 불투명한 커서 문자열로 변환"""
+    payload = {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in values.items()
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *keys: str) -> dict:
+    """
+    커서 문자열을 정렬 키 값으로 복원
+    - 형식이 잘못되었거나 필요한 키가 없으면 400
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = {key: payload[key] for key in keys}
+        if "created_at" in values:
+            values["created_at"] = datetime.fromisoformat(values["created_at"])
+        return values
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="유효하지 않은 커서입니다."
+        )
+
+
+def split_page(rows: list, limit: int) -> tuple[list, bool]:
+    """
+    limit + 1 개를 조회한 결과를 (현재 페이지, 다음 페이지 존재 여부) 로 분리
+    """
+    return rows[:limit], len(rows) > limit
+
+
+def next_id_cursor(rows: list, has_more: bool) -> Optional[str]:
+    """id 내림차순 목록의 다음 커서"""
+    if not has_more or not rows:
+        return None
+    return encode_cursor(id=rows[-1].id)
+
+
+def paginate_by_id(query, id_column, skip: int, limit: int, cursor: Optional[str]):
+    """
+    id 내림차순 페이지 조회
+    - cursor가 있으면 keyset 방식 (id < 마지막 id), 없으면 기존 skip 방식 (구버전 클라이언트 호환)
+    Returns: (현재 페이지 행 목록, 다음 커서)
+    """
+    query = query.order_by(id_column.desc())
+    if cursor:
+        last = decode_cursor(cursor, "id")
+        query = query.filter(id_column < last["id"])
+    elif skip:
+        query = query.offset(skip)
+
+    rows, has_more = split_page(query.limit(limit + 1).all(), limit)
+    return rows, next_id_cursor(rows, has_more)
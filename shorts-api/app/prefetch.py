@@ -0,0 +1,47 @@
+# prefetch.py
+# 다음 동영상 미리 받기 (피드 스와이프 대비)
+#
+# - 목록/피드 응답의 prefetch_range: 재생 시작 부분(첫 PREFETCH_SECONDS 초) 분량의 추정 Range
+#     /stream 에 그대로 보내면 되고, POST /api/videos/prewarm 이 서버 캐시에 채우는 범위도 같음
+# - 추정은 동영상 행의 값만 사용 (목록 첫 페이지는 캐시에서 응답하므로 DB 조회를 늘리지 않음)
+#     변환 완료: 웹용 MP4 화질의 최대 비트레이트 / 변환 전: 원본 크기 / 재생 시간 (모르면 UNKNOWN_BITRATE)
+# - 넉넉하게 잡은 값이라 실제 파일보다 길 수 있음 (파일 끝을 넘는 Range 는 잘라서 응답)
+
+import os
+from typing import Optional
+
+from app.models import PROCESSING_READY
+from app.transcode import LADDER, TRANSCODE_MP4_RENDITION
+
+PREFETCH_SECONDS = float(os.getenv("PREFETCH_SECONDS", 3))                      # 미리 받을 재생 시간 (초)
+PREFETCH_MAX_BYTES = int(os.getenv("PREFETCH_MAX_BYTES", 4 * 1024 * 1024))      # 동영상 하나당 최대
+UNKNOWN_HEADER_BYTES = 128 * 1024  # moov 위치를 모를 때 앞부분 박스(ftyp, moov) 여유분
+UNKNOWN_BITRATE = 8_000_000        # 재생 시간을 모르는 원본 (bps, 휴대폰 1080p 정도)
+
+
+def _mp4_bitrate() -> int:
+    """웹용 MP4 최대 비트레이트 (bps, 원본이 작아서 낮은 화질로 만들었으면 실제로는 더 작음)"""
+    rung = next((rung for rung in LADDER if rung.name == TRANSCODE_MP4_RENDITION), LADDER[0])
+    return (rung.video_kbps + rung.audio_kbps) * 1000
+
+
+def prefetch_length(
+    processing_status: str,
+    file_size: int,
+    duration: Optional[float],
+    moov_offset: Optional[int],
+    moov_size: Optional[int],
+) -> int:
+    """/stream 첫 PREFETCH_SECONDS 초 분량 바이트 수 (추정, 1 이상)"""
+    if processing_status == PROCESSING_READY:
+        # 웹용 MP4 는 faststart 라 moov 가 앞에 있음 (크기는 행에 없으므로 여유분으로)
+        length = UNKNOWN_HEADER_BYTES + _mp4_bitrate() / 8 * PREFETCH_SECONDS
+        return max(1, min(int(length), PREFETCH_MAX_BYTES))
+
+    bytes_per_second = file_size / duration if duration else UNKNOWN_BITRATE / 8
+    if moov_offset is not None and moov_size and moov_offset < file_size // 2:
+        header = moov_offset + moov_size
+    else:
+        header = UNKNOWN_HEADER_BYTES  # moov 가 끝에 있으면 moov 는 따로 미리 읽음 (app/object_cache.py moov_cache)
+    length = header + bytes_per_second * PREFETCH_SECONDS
+    return max(1, min(int(length), PREFETCH_MAX_BYTES, file_size))
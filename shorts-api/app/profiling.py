@@ -0,0 +1,227 @@
+# profiling.py
+# 요청 단위 프로파일링 / 느린 요청 기록 (PROFILE_ENABLED=true 일 때만)
+#
+# - 프로파일 대상: X-Profile-Token 헤더에 PROFILE_TOKEN 을 넣은 요청 + PROFILE_SAMPLE_RATE 비율로 뽑은 요청
+#     pyinstrument 가 있으면 통계적 프로파일 (pip install pyinstrument, 해당 요청의 async 태스크만)
+#     없으면 cProfile (이벤트 루프 스레드 전체라 같은 시간에 처리된 다른 요청 코드도 섞임)
+#     한 번에 한 요청만 프로파일 (다른 요청이 프로파일 중이면 건너뜀)
+# - SQL 기록: 켜져 있으면 모든 요청의 SQL 문과 실행 시간을 모아 둠 (문자열 참조만 보관)
+# - 저장: 헤더로 요청한 프로파일 + PROFILE_SLOW_MS 보다 느린 요청을 PROFILE_DIR 에 텍스트로 저장
+#     느린 요청은 응답 헤더를 보내기까지의 시간으로 판단 (스트리밍 응답은 본문 전송 시간이 클라이언트 회선에 달려 있음)
+#     최근 PROFILE_MAX_FILES 개만 남김 (링 버퍼), /admin/profiles 에서 목록/다운로드
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import random
+import re
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from anyio import to_thread
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "false").lower() in ("1", "true", "yes", "on")
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")                        # 헤더로 프로파일 요청 / 다운로드할 때 필요
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))      # 0~1, 무작위로 프로파일할 요청 비율
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", 1000))           # 응답 헤더까지 이보다 느린 요청은 저장
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "/tmp/shorts-profiles"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", 50))
+PROFILE_MAX_QUERIES = 500                                              # 요청 1건에 기록할 최대 SQL 수
+PROFILE_HEADER = b"x-profile-token"
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # 선택 패키지
+    Profiler = None
+
+
+class _RequestTrace:
+    __slots__ = ("start", "queries", "query_count")
+
+    def __init__(self, start: float):
+        self.start = start
+        self.queries = []  # (시작 오프셋 초, 실행 시간 초, SQL)
+        self.query_count = 0
+
+
+_trace: ContextVar[Optional[_RequestTrace]] = ContextVar("profile_trace", default=None)
+
+
+def record_sql(engine):
+    """엔진의 SQL 실행을 현재 요청 기록에 추가"""
+    if not PROFILE_ENABLED:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _trace.get() is not None:
+            conn.info["profile_query_start"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        trace = _trace.get()
+        start = conn.info.pop("profile_query_start", None)
+        if trace is None or start is None:
+            return
+        trace.query_count += 1
+        if len(trace.queries) < PROFILE_MAX_QUERIES:
+            trace.queries.append((start - trace.start, time.perf_counter() - start, statement))
+
+
+class _StackProfiler:
+    """pyinstrument (있으면) / cProfile 공통 인터페이스"""
+
+    def __init__(self):
+        if Profiler is not None:
+            self._profiler = Profiler(interval=0.001, async_mode="enabled")
+        else:
+            self._profiler = cProfile.Profile()
+
+    def start(self):
+        if Profiler is not None:
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self):
+        if Profiler is not None:
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+
+    def report(self) -> str:
+        if Profiler is not None:
+            return self._profiler.output_text(unicode=True, color=False, show_all=False)
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(40)
+        return out.getvalue()
+
+
+_profiling_active = False
+
+
+def _should_profile(scope) -> bool:
+    """이 요청을 프로파일할지 (헤더 토큰 또는 샘플링)"""
+    if _profiling_active:
+        return False
+    if PROFILE_TOKEN:
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return value.decode("latin-1") == PROFILE_TOKEN
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def _format_report(scope, status_code: int, first_byte: float, elapsed: float, trace: _RequestTrace,
+                   profile: Optional[str]) -> str:
+    query = scope.get("query_string", b"").decode("latin-1")
+    path = scope["path"] + (f"?{query}" if query else "")
+    db_seconds = sum(duration for _, duration, _ in trace.queries)
+    lines = [
+        f"{scope['method']} {path} -> {status_code}",
+        f"시간: 응답 헤더까지 {first_byte * 1000:.1f} ms / 전체 {elapsed * 1000:.1f} ms, "
+        f"SQL: {trace.query_count}개 / {db_seconds * 1000:.1f} ms",
+        f"기록 시각: {datetime.now().isoformat(timespec='seconds')}",
+        "",
+        "== SQL (시작 시점 ms / 실행 ms) ==",
+    ]
+    for offset, duration, statement in trace.queries:
+        lines.append(f"[{offset * 1000:8.1f} / {duration * 1000:7.2f}] {' '.join(statement.split())}")
+    if trace.query_count > len(trace.queries):
+        lines.append(f"... {trace.query_count - len(trace.queries)}개 생략")
+    lines += ["", "== 프로파일 ==", profile or "(프로파일 대상이 아닌 요청: SQL 만 기록)"]
+    return "\n".join(lines) + "\n"
+
+
+def _save_report(name: str, scope, status_code: int, first_byte: float, elapsed: float, trace: _RequestTrace,
+                 profiler: Optional[_StackProfiler]):
+    """PROFILE_DIR 에 저장하고 오래된 파일 정리 (최근 PROFILE_MAX_FILES 개 유지)"""
+    report = _format_report(scope, status_code, first_byte, elapsed, trace, profiler.report() if profiler else None)
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    (PROFILE_DIR / name).write_text(report, encoding="utf-8")
+    for old in list_profiles()[PROFILE_MAX_FILES:]:
+        (PROFILE_DIR / old["name"]).unlink(missing_ok=True)
+
+
+def list_profiles() -> List[dict]:
+    """저장된 프로파일 목록 (최신순)"""
+    if not PROFILE_DIR.is_dir():
+        return []
+    files = sorted(PROFILE_DIR.glob("*.txt"), key=lambda p: p.name, reverse=True)
+    return [{"name": p.name, "size": p.stat().st_size} for p in files]
+
+
+def profile_path(name: str) -> Optional[Path]:
+    """다운로드할 프로파일 경로 (목록에 없는 이름이면 None)"""
+    if not re.fullmatch(r"[\w.-]+\.txt", name):
+        return None
+    path = PROFILE_DIR / name
+    return path if path.is_file() else None
+
+
+class ProfilingMiddleware:
+    """요청 단위 프로파일 / 느린 요청 기록 ASGI 미들웨어 (PROFILE_ENABLED=true 일 때 등록)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global _profiling_active
+        if scope["type"] != "http" or scope["path"].startswith("/admin/"):
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        trace = _RequestTrace(start)
+        token = _trace.set(trace)
+        requested = _should_profile(scope)
+        profiler = None
+        if requested:
+            _profiling_active = True
+            profiler = _StackProfiler()
+            profiler.start()
+
+        status_code = 500
+        first_byte = None
+
+        async def send_wrapper(message):
+            nonlocal status_code, first_byte
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                first_byte = time.perf_counter() - start
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if profiler is not None:
+                profiler.stop()
+                _profiling_active = False
+            _trace.reset(token)
+            elapsed = time.perf_counter() - start
+            if first_byte is None:  # 응답을 시작하지 못하고 끝난 요청
+                first_byte = elapsed
+
+            # 스트리밍(/stream, /download, HLS) 본문 전송 시간은 빼고 판단 (느린 회선의 시청이 느린 요청으로 쌓이지 않도록)
+            slow = first_byte * 1000 >= PROFILE_SLOW_MS
+            if requested or slow:
+                route = getattr(scope.get("route"), "path", scope["path"])
+                slug = re.sub(r"[^\w]+", "_", route).strip("_") or "root"
+                name = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{scope['method']}-{slug}-{int(first_byte * 1000)}ms.txt"
+                try:
+                    # 프로파일 출력 만들기/파일 쓰기는 이벤트 루프 밖에서
+                    await to_thread.run_sync(_save_report, name, scope, status_code, first_byte, elapsed, trace, profiler)
+                except OSError as e:
+                    logger.error(f"❌ 프로파일 저장 실패: {e}")
+                else:
+                    if slow:
+                        logger.warning(f"⚠️ 느린 요청 (응답 헤더까지 {first_byte * 1000:.0f} ms), 프로파일 저장: {name}")
+                    else:
+                        logger.info(f"✅ 프로파일 저장: {name}")
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, HTTPException, Header, status
+from fastapi.responses import FileResponse
+
+from ..profiling import PROFILE_ENABLED, PROFILE_TOKEN, list_profiles, profile_path
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+def _check_token(token: str):
+    """프로파일 기능이 꺼져 있으면 404, 토큰이 다르면 403"""
+    if not PROFILE_ENABLED:
+        raise HTTPException(status_code=404, detail="프로파일링이 꺼져 있습니다. (PROFILE_ENABLED)")
+    if not PROFILE_TOKEN or token != PROFILE_TOKEN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="X-Profile-Token 이 올바르지 않습니다.")
+
+
+@router.get("/profiles")
+def get_profiles(x_profile_token: str = Header(default="")):
+    """저장된 요청 프로파일 목록 (최신순)"""
+    _check_token(x_profile_token)
+    return {"profiles": list_profiles()}
+
+
+@router.get("/profiles/{name}")
+def download_profile(name: str, x_profile_token: str = Header(default="")):
+    """요청 프로파일 다운로드 (텍스트)"""
+    _check_token(x_profile_token)
+    path = profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="프로파일을 찾을 수 없습니다.")
+    return FileResponse(path, media_type="text/plain; charset=utf-8", filename=name)
@@ -1,12 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import tuple_
+from typing import List, Optional
 import logging
 # 로컬 파일에서 필요한 요소들을 가져옵니다.
 # FastAPI 프로젝트 구조에 따라 경로는 달라질 수 있습니다.
 from app.database import get_db
 from app.models import Comments, Video # Comments 모델과 Videos 모델 필요
 from app.schemas import CommentCreate, CommentResponse , CommentUpdate , CommentListResponse
+from app.counters import adjust_comment_count
+from app.cache import get_cached_video, invalidate_video
+from app.pagination import encode_cursor, decode_cursor, split_page
 from datetime import datetime
 
 # APIRouter 인스턴스 생성
@@ -28,14 +32,16 @@ def read_comments(
     video_id: int, 
     skip : int = 0,
     limit: int = 20,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """
     특정 영상(video_id)에 달린 모든 댓글을 조회합니다.
+    - cursor: 이전 응답의 next_cursor, (created_at, id) 기준 keyset 페이지네이션 (있으면 skip 무시)
     """
     
     # 1. 비디오 존재 여부 확인 (댓글을 달 대상이 있는지 확인)
-    video = db.query(Video).filter(Video.id == video_id).first()
+    video = get_cached_video(db, video_id)
     if not video:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -43,20 +49,33 @@ def read_comments(
         )
 
     # 2. 해당 video_id를 가진 댓글들을 최신순(created_at 내림차순)으로 조회
-    comments = db.query(Comments).filter(
+    #    created_at이 같은 댓글은 id로 순서를 고정 (커서 기준)
+    query = db.query(Comments).filter(
         Comments.video_id == video_id
     ).order_by(
-        Comments.created_at.desc()
-    ).offset(skip).limit(limit).all()
+        Comments.created_at.desc(),
+        Comments.id.desc()
+    )
+    if cursor:
+        last = decode_cursor(cursor, "created_at", "id")
+        query = query.filter(
+            tuple_(Comments.created_at, Comments.id) < (last["created_at"], last["id"])
+        )
+    elif skip:
+        query = query.offset(skip)
+
+    comments, has_more = split_page(query.limit(limit + 1).all(), limit)
+    next_cursor = None
+    if has_more and comments:
+        next_cursor = encode_cursor(created_at=comments[-1].created_at, id=comments[-1].id)
     
-    # 댓글 총 개수 
-    total = db.query(Comments).filter(
-        Comments.video_id == video_id
-    ).count()
+    # 댓글 총 개수 (videos.comment_count 카운터)
+    total = video.comment_count
 
     return {
         "total": total,
-        "comments": comments
+        "comments": comments,
+        "next_cursor": next_cursor
     }
 
 
@@ -74,7 +93,7 @@ def create_comment(
     """
     
     # 1. 비디오 존재 여부 확인
-    video = db.query(Video).filter(Video.id == video_id).first()
+    video = get_cached_video(db, video_id)
     if not video:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -89,15 +108,18 @@ def create_comment(
         # created_at 필드는 models.py에서 server_default=func.now()로 자동 설정됨
     )
     
-    # 3. 데이터베이스에 저장
+    # 3. 데이터베이스에 저장 (카운터 증가와 같은 트랜잭션)
     db.add(db_comment)
+    db.flush()
+    adjust_comment_count(db, video_id, 1)
     db.commit()
+    invalidate_video(video_id)
     db.refresh(db_comment) # 데이터베이스에서 자동 생성된 id와 created_at을 가져옴
     
     return db_comment
 
 @router.delete("/{video_id}/comments/{comment_id}", status_code=status.HTTP_200_OK)
-async def delete_comments(video_id: int, comment_id: int, db: Session = Depends(get_db)):
+def delete_comments(video_id: int, comment_id: int, db: Session = Depends(get_db)):
     """댓글 삭제"""
     
     # 댓글 찾기 (video_id와 comment_id를 모두 사용)
@@ -112,7 +134,10 @@ async def delete_comments(video_id: int, comment_id: int, db: Session = Depends(
      # DB에서 삭제
     try:
         db.delete(comment)
+        db.flush()
+        adjust_comment_count(db, video_id, -1)
         db.commit()
+        invalidate_video(video_id)
         logger.info(f"✅ DB 삭제 완료: comment_id={comment_id}")
     except Exception as e:
         db.rollback()
@@ -130,7 +155,7 @@ async def delete_comments(video_id: int, comment_id: int, db: Session = Depends(
 
 
 @router.patch("/{video_id}/comments/{comment_id}", response_model=CommentResponse)
-async def update_comments(
+def update_comments(
     video_id: int,
     comment_id: int,
     comment_update: CommentUpdate, # 명확성을 위해 변수명 변경
@@ -1,10 +1,13 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 
 from ..database import get_db
 from ..models import Video, Like
 from ..schemas import LikeResponse, LikeStatus
+from ..like_store import toggle_like_row, remove_like
+from ..cache import get_cached_video, invalidate_video
+from ..like_buffer import like_buffer
 
 router = APIRouter(prefix="/api/videos", tags=["likes"])
 
@@ -19,7 +22,7 @@ def get_user_identifier(request: Request) -> str:
 
 
 @router.post("/{video_id}/like", response_model=LikeStatus, status_code=status.HTTP_200_OK)
-async def toggle_like(
+def toggle_like(
     video_id: int,
     request: Request,
     db: Session = Depends(get_db)
@@ -28,10 +31,12 @@ async def toggle_like(
     좋아요 토글
     - 좋아요 안 눌렀으면 → 좋아요
     - 이미 눌렀으면 → 좋아요 취소
+    - 행 변경 + 카운터 갱신을 한 번에 처리 (app/like_store.py, PostgreSQL은 한 문장)
+    - LIKE_WRITE_MODE=buffered 이면 버퍼에만 기록하고 DB에는 주기적으로 일괄 반영
     """
     
-    # 비디오 존재 확인
-    video = db.query(Video).filter(Video.id == video_id).first()
+    # 비디오 존재 확인 (메타데이터 캐시)
+    video = get_cached_video(db, video_id)
     if not video:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -40,32 +45,27 @@ async def toggle_like(
     
     # 사용자 식별자
     user_identifier = get_user_identifier(request)
-    
-    # 이미 좋아요 눌렀는지 확인
-    existing_like = db.query(Like).filter(
-        Like.video_id == video_id,
-        Like.user_identifier == user_identifier
-    ).first()
-    
-    if existing_like:
-        # 좋아요 취소
-        db.delete(existing_like)
-        db.commit()
-        
-        is_liked = False
-    
-    else:
-        # 좋아요 추가
-        new_like = Like(
-            video_id=video_id,
-            user_identifier=user_identifier
+
+    if like_buffer.enabled:
+        is_liked = like_buffer.toggle(db, video_id, user_identifier)
+        return {
+            "video_id": video_id,
+            "like_count": max(video.like_count + like_buffer.count_delta(video_id), 0),
+            "is_liked": is_liked
+        }
+    
+    # 있으면 취소, 없으면 추가 (유니크 인덱스로 동시 요청에도 중복 행 없음)
+    try:
+        is_liked, like_count, changed = toggle_like_row(db, video_id, user_identifier)
+    except IntegrityError:
+        # 그사이 동영상이 삭제됨 (FK)
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="동영상을 찾을 수 없습니다."
         )
-        db.add(new_like)
-        db.commit()
-        is_liked = True
-        
-    # 현재 좋아요 개수
-    like_count = db.query(func.count(Like.id)).filter(Like.video_id == video_id).scalar()
+    if changed:
+        invalidate_video(video_id)
     
     return {
         "video_id": video_id,
@@ -75,7 +75,7 @@ async def toggle_like(
 
 
 @router.get("/{video_id}/like", response_model=LikeStatus)
-async def get_like_status(
+def get_like_status(
     video_id: int,
     request: Request,
     db: Session = Depends(get_db)
@@ -86,43 +86,38 @@ async def get_like_status(
     - 현재 사용자가 좋아요 눌렀는지
     """
     
-    # 비디오 존재 확인
-    video = db.query(Video).filter(Video.id == video_id).first()
+    # 비디오 존재 확인 (메타데이터 캐시)
+    video = get_cached_video(db, video_id)
     if not video:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="동영상을 찾을 수 없습니다."
         )
     
-    # 좋아요 개수
-    like_count = db.query(func.count(Like.id)).filter(
-        Like.video_id == video_id
-    ).scalar()
+    # 좋아요 개수 (videos.like_count 카운터 + 아직 반영되지 않은 버퍼 변화)
+    like_count = video.like_count + like_buffer.count_delta(video_id)
     
-    # 현재 사용자가 좋아요 눌렀는지
+    # 현재 사용자가 좋아요 눌렀는지 (버퍼 값이 있으면 우선)
     user_identifier = get_user_identifier(request)
-    is_liked = db.query(Like).filter(
-        Like.video_id == video_id,
-        Like.user_identifier == user_identifier
-    ).first() is not None
+    is_liked = like_buffer.is_liked(db, video_id, user_identifier)
     
     return {
         "video_id": video_id,
-        "like_count": like_count or 0,
+        "like_count": max(like_count or 0, 0),
         "is_liked": is_liked
     }
 
 
 @router.delete("/{video_id}/like")
-async def unlike_video(
+def unlike_video(
     video_id: int,
     request: Request,
     db: Session = Depends(get_db)
 ):
     """좋아요 취소 (명시적)"""
     
-    # 비디오 존재 확인
-    video = db.query(Video).filter(Video.id == video_id).first()
+    # 비디오 존재 확인 (메타데이터 캐시)
+    video = get_cached_video(db, video_id)
     if not video:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -131,25 +126,27 @@ async def unlike_video(
     
     # 사용자 식별자
     user_identifier = get_user_identifier(request)
-    
-    # 좋아요 찾기
-    like = db.query(Like).filter(
-        Like.video_id == video_id,
-        Like.user_identifier == user_identifier
-    ).first()
-    
-    if not like:
+
+    if like_buffer.enabled:
+        if not like_buffer.set_liked(db, video_id, user_identifier, False):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="좋아요를 누르지 않았습니다."
+            )
+        return {
+            "message": "좋아요 취소 완료",
+            "like_count": max(video.like_count + like_buffer.count_delta(video_id), 0),
+            "is_liked": False
+        }
+    
+    # 삭제 + 카운터 감소 (PostgreSQL은 DELETE ... RETURNING 한 문장)
+    _, like_count, changed = remove_like(db, video_id, user_identifier)
+    if not changed:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="좋아요를 누르지 않았습니다."
         )
-    
-    # 삭제
-    db.delete(like)
-    db.commit()
-    
-    # 현재 좋아요 개수
-    like_count = db.query(func.count(Like.id)).filter(Like.video_id == video_id).scalar()
+    invalidate_video(video_id)
     
     return {
         "message": "좋아요 취소 완료",
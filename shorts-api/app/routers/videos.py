@@ -1,18 +1,45 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, status, Request, Depends , Form
-from fastapi.responses import StreamingResponse, FileResponse , JSONResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, status, Request, Response, Depends , Form
+from fastapi.responses import StreamingResponse, FileResponse , JSONResponse, RedirectResponse
 from pathlib import Path
 import os
 import shutil
 import uuid
 import logging
 import asyncio
-from typing import List
+import re
+from typing import List, Optional
 from sqlalchemy.orm import Session # 세션 임포트
 from sqlalchemy.exc import SQLAlchemyError
+from botocore.exceptions import ClientError
 from app.database import get_db # DB 관련 임포트
-from app.schemas import Video as VideoSchema,VideoUpdate , VideoListResponse# 스키마 임포트
-from app.models import Video,Comments,Like
-from app.s3_client import upload_file_to_s3, delete_file_from_s3, s3_client, BUCKET_NAME
+from app.schemas import Video as VideoSchema,VideoUpdate , VideoListResponse, VideoResponse, VideoFeedResponse# 스키마 임포트
+from app.schemas import UploadUrlRequest, UploadUrlResponse, UploadCompleteRequest, PrewarmRequest
+from app.models import Video,Comments,Like,VideoRendition,PROCESSING_READY
+from app.routers.likes import get_user_identifier
+from app.like_buffer import like_buffer
+from app.jobs import enqueue_transcode
+from app.transcode import delete_renditions, rendition_prefix, HLS_PLAYLIST
+from app.pagination import paginate_by_id
+from app.search import search_videos_page
+from app.suggest import suggest_index
+from app.cache import (
+    metadata_cache, get_cached_video, get_cached_videos, remember_videos, invalidate_video,
+    first_page_key, get_cached_first_page, set_cached_first_page, invalidate_video_lists
+)
+from app.executor import run_db, run_s3, iterate_s3
+from app.metrics import count_video_bytes
+from app.object_cache import video_cache, moov_cache, head_cache, iterate_file, iterate_bytes, VIDEO_CACHE_DIR
+from app.mp4 import analyze as analyze_mp4, faststart_upload
+from app.prefetch import prefetch_length
+from app.http_headers import (
+    parse_range_header, RangeNotSatisfiable, if_range_matches, video_etag, http_date,
+    new_multipart_boundary, multipart_part_header, multipart_closing, multipart_content_length,
+    entity_etag, is_not_modified, validator_headers, not_modified_response,
+    METADATA_CACHE_CONTROL, VIDEO_CACHE_CONTROL
+)
+from app.s3_client import stream_upload_to_s3, delete_file_from_s3, s3_stream_client, BUCKET_NAME, FileTooLargeError
+from app.s3_client import create_presigned_upload, head_file_in_s3, get_s3_url, read_range_from_s3
+from app.s3_client import lookup_presigned_url, get_presigned_download_url, forget_presigned_urls, PRESIGNED_URL_REFRESH_MARGIN
 from urllib.parse import quote
 
 router = APIRouter(prefix="/api/videos", tags=["videos"])
@@ -22,32 +49,220 @@ logger = logging.getLogger(__name__)
 
 # ... (기존 설정: UPLOAD_DIR, ALLOWED_EXTENSIONS, MAX_FILE_SIZE 등 유지) ...
 
-# 업로드 디렉토리 설정
-UPLOAD_DIR = Path("uploads/videos")
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+# 업로드 디렉토리 설정 (S3 객체 로컬 디스크 캐시로 사용, app/object_cache.py)
+UPLOAD_DIR = VIDEO_CACHE_DIR
 
 # 설정
 ALLOWED_EXTENSIONS = {".mp4", ".mov", ".avi", ".webm"}
 MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
+UPLOAD_URL_EXPIRES = int(os.getenv("UPLOAD_URL_EXPIRES", 15 * 60))  # 직접 업로드 URL 유효 시간 (초)
+# 동영상 전송 방식
+# - proxy: API 서버가 S3에서 받아서 그대로 전달 (기본값)
+# - redirect: 짧게 유효한 presigned GET URL로 307 리다이렉트 (바이트는 S3가 직접 전송)
+VIDEO_DELIVERY_MODE = os.getenv("VIDEO_DELIVERY_MODE", "proxy").lower()
+STREAM_CHUNK_SIZE = 64 * 1024  # S3 -> 클라이언트 전송 단위 (조각마다 스레드 전환이 생기므로 너무 작지 않게)
+PRELOAD_LINK_COUNT = int(os.getenv("PRELOAD_LINK_COUNT", 3))  # 목록/피드 응답의 Link: rel=preload 포스터 수
 
 # 🚫 임시 저장소 videos_db 삭제 또는 주석 처리
 
+# async 핸들러에서 run_db(...)로 호출하는 DB 헬퍼 (이벤트 루프 블로킹 방지)
+def _find_video(db: Session, video_id: int):
+    return db.query(Video).filter(Video.id == video_id).first()
+
+def _recent_videos_page(db: Session, skip: int, limit: int, cursor: Optional[str], include_total: bool):
+    """
+    최신순 목록 페이지 (목록/피드 공통)
+    - 첫 페이지는 캐시된 id 목록 + 동영상별 캐시로 응답 (app/cache.py)
+    - 나머지 페이지는 DB에서 조회하고 읽은 동영상만 캐시에 저장
+    Returns: (동영상 목록, 전체 개수 또는 None, 다음 커서)
+    """
+    page_key = first_page_key("recent", limit, include_total) if not cursor and not skip else None
+    page = get_cached_first_page(page_key)
+    if page is not None:
+        return get_cached_videos(db, page["ids"]), page["total"], page["next_cursor"]
+
+    epoch = metadata_cache.read_epoch()
+    videos, next_cursor = paginate_by_id(db.query(Video), Video.id, skip, limit, cursor)
+    total = db.query(Video).count() if include_total else None
+    remember_videos(videos, epoch)
+    set_cached_first_page(page_key, [video.id for video in videos], total, next_cursor)
+    return videos, total, next_cursor
+
+def _find_rendition(db: Session, video_id: int, kind: str, name: str = None):
+    """변환 결과 조회 (name 이 없으면 그 종류 중 아무거나 하나)"""
+    query = db.query(VideoRendition).filter(VideoRendition.video_id == video_id, VideoRendition.kind == kind)
+    if name is not None:
+        query = query.filter(VideoRendition.name == name)
+    return query.first()
+
+def _hls_renditions(db: Session, video_id: int):
+    return db.query(VideoRendition).filter(
+        VideoRendition.video_id == video_id, VideoRendition.kind == "hls"
+    ).order_by(VideoRendition.bandwidth).all()
+
+def _reset_renditions(db: Session, video: Video):
+    """파일 교체: 예전 변환 결과 행을 지우고 새 변환 작업 추가 (커밋 전)"""
+    video.renditions.clear()
+    enqueue_transcode(db, video)
+
+def _commit_and_refresh(db: Session, instance):
+    db.commit()
+    db.refresh(instance)
+
+def _delete_and_commit(db: Session, instance):
+    db.delete(instance)
+    db.commit()
+
+async def _open_object_body(key: str, size: int, start: int, end: int):
+    """
+    S3 객체 [start, end] 구간 본문
+    - 로컬 디스크 캐시에 있으면 캐시 파일에서 읽음
+    - 없으면 S3에서 바로 읽고, 백그라운드로 캐시 채우기 시작
+    Returns: (출처 "cache" / "s3", async 이터레이터)
+    """
+    cached_file = await video_cache.open(key, size)
+    if cached_file is not None:
+        return "cache", iterate_file(cached_file, start, end - start + 1)
+
+    # 미리 읽어 둔 moov 구간 (moov 가 파일 끝에 있는 원본)
+    cached_range = await moov_cache.read(key, start, end)
+    if cached_range is not None:
+        return "cache", iterate_bytes(cached_range)
+
+    video_cache.schedule_fill(key, size)
+
+    # /prewarm 으로 미리 받아 둔 앞부분: 있는 만큼 먼저 보내고 나머지는 S3에서 이어서
+    head = await head_cache.read(key, start, end, partial=True)
+    if head is not None:
+        if start + len(head) > end:
+            return "prefetch", iterate_bytes(head)
+        return "prefetch", _stitch_body(head, key, start + len(head), end)
+
+    params = {"Bucket": BUCKET_NAME, "Key": key}
+    if start > 0 or end < size - 1:
+        params["Range"] = f"bytes={start}-{end}"
+    s3_response = await run_s3(s3_stream_client.get_object, **params)
+    return "s3", iterate_s3(s3_response['Body'].iter_chunks(STREAM_CHUNK_SIZE))
+
+async def _stitch_body(head: bytes, key: str, start: int, end: int):
+    """메모리의 앞부분을 보낸 뒤 [start, end] 를 S3에서 이어서 (S3 응답 대기는 앞부분 전송과 겹침)"""
+    rest = asyncio.ensure_future(
+        run_s3(s3_stream_client.get_object, Bucket=BUCKET_NAME, Key=key, Range=f"bytes={start}-{end}")
+    )
+    try:
+        yield head
+        s3_response = await rest
+        async for chunk in iterate_s3(s3_response['Body'].iter_chunks(STREAM_CHUNK_SIZE)):
+            yield chunk
+    finally:
+        rest.cancel()
+
+async def _open_video_body(video_id: int, key: str, size: int, start: int, end: int):
+    """동영상 [start, end] 구간 본문 (async 이터레이터, 전송 바이트는 메트릭에 기록)"""
+    source, body = await _open_object_body(key, size, start, end)
+    return count_video_bytes(video_id, source, body)
+
+async def _faststart(file: UploadFile):
+    """
+    업로드 파일을 moov 가 앞에 오는 순서로 읽는 파일 객체로 (재인코딩 없음, app/mp4.py)
+    Returns: (파일 객체, moov 오프셋, moov 크기)
+    """
+    if file.size is not None and file.size > MAX_FILE_SIZE:
+        return file, None, None  # 크기 초과는 stream_upload_to_s3 에서 거절
+    return await faststart_upload(file)
+
+async def _probe_moov(key: str, file_size: int):
+    """
+    직접 업로드된 S3 객체의 moov 위치 / 크기 (박스 헤더만 Range 요청으로 읽음, 옮기지는 않음)
+    - MP4/MOV 가 아니거나 읽지 못하면 (None, None)
+    """
+    async def read_at(offset: int, length: int) -> bytes:
+        return await run_s3(read_range_from_s3, key, offset, length)
+
+    try:
+        layout = await analyze_mp4(read_at, file_size)
+    except Exception as e:
+        logger.warning(f"⚠️ moov 위치 확인 실패: {key} ({e})")
+        return None, None
+    if layout is None:
+        return None, None
+    return layout.moov.offset, layout.moov.size
+
+def _prefetch_moov(video: Video, key: str, ranges):
+    """
+    moov 가 파일 끝에 있는 원본의 앞부분 요청이면 moov 를 미리 받아 둠
+    - 플레이어는 앞부분을 받다가 곧 끝부분(moov)을 요청하므로 그 요청은 S3 왕복 없이 응답
+    """
+    if key != video.filename or not video.moov_offset or video.moov_offset < video.file_size // 2:
+        return
+    if (ranges and ranges[0][0] != 0) or key in video_cache:
+        return
+    moov_cache.schedule_fill(key, video.moov_offset, video.moov_size)
+
+def _preload_links(videos) -> Optional[str]:
+    """목록 앞쪽 동영상 포스터를 미리 받도록 Link: rel=preload (ORM 객체 / 캐시된 응답 모두)"""
+    links = []
+    for video in videos[:PRELOAD_LINK_COUNT]:
+        url = VideoSchema.model_validate(video).thumbnail_url
+        if url:
+            links.append(f"<{url}>; rel=preload; as=image")
+    return ", ".join(links) or None
+
+def _mp4_rendition_keys(db: Session, video_ids: List[int]) -> dict:
+    """동영상 id -> (웹용 MP4 키, 크기)"""
+    rows = db.query(VideoRendition.video_id, VideoRendition.s3_key, VideoRendition.file_size).filter(
+        VideoRendition.video_id.in_(video_ids), VideoRendition.kind == "mp4"
+    ).all()
+    return {video_id: (key, size) for video_id, key, size in rows}
+
+async def _playback_source(db: Session, video: Video, original: bool):
+    """
+    재생할 파일 (S3 키, 크기, Content-Type)
+    - 변환이 끝났으면 웹용 MP4 (faststart, 원본보다 작음), 아니면 원본
+    """
+    if not original and video.processing_status == PROCESSING_READY:
+        mp4 = await run_db(_find_rendition, db, video.id, "mp4")
+        if mp4 is not None:
+            return mp4.s3_key, mp4.file_size, "video/mp4"
+    return video.filename, video.file_size, video.content_type
+
+async def _discard_renditions(source_key: str):
+    """원본 키의 변환 결과(S3, 로컬 캐시) 삭제 (실패해도 무시)"""
+    try:
+        await video_cache.discard_prefix(rendition_prefix(source_key))
+        await run_s3(delete_renditions, source_key)
+    except Exception as e:
+        logger.warning(f"⚠️ 변환 결과 삭제 실패: {e}")
+
+async def _redirect_to_s3(filename: str, disposition: str = None) -> RedirectResponse:
+    """presigned GET URL로 리다이렉트 (캐시된 URL이 있으면 다시 서명하지 않음)"""
+    cached = lookup_presigned_url(filename, disposition)
+    url, expires_in = cached or await run_s3(get_presigned_download_url, filename, disposition)
+    # 브라우저도 URL이 만료되기 전까지만 리다이렉트를 재사용
+    max_age = max(expires_in - PRESIGNED_URL_REFRESH_MARGIN, 0)
+    return RedirectResponse(
+        url,
+        status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+        headers={"Cache-Control": f"private, max-age={max_age}"}
+    )
+
 @router.get("/search")
-async def search_videos(
+def search_videos(
     q: str,
     skip: int = 0,
     limit: int = 20,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     db: Session = Depends(get_db)
 ):
-    """동영상 검색 - 문자열 포함 검색"""
-    
-    videos = db.query(Video).filter(
-        Video.original_filename.ilike(f"%{q}%")  # ilike = 대소문자 무시
-    ).offset(skip).limit(limit).all()
+    """
+    동영상 검색 - 관련도 순 (app/search.py)
+    - PostgreSQL: pg_trgm 인덱스로 부분 문자열 + 오타 허용 검색
+    - cursor: 이전 응답의 next_cursor (있으면 skip 무시)
+    - include_total=false: 전체 개수 계산 생략 (개수는 페이지와 같은 쿼리에서 함께 계산)
+    """
     
-    total = db.query(Video).filter(
-        Video.original_filename.ilike(f"%{q}%")
-    ).count()
+    videos, total, next_cursor = search_videos_page(db, q, skip, limit, cursor, include_total)
     
     # dict로 변환 (JSON 직렬화를 위해)
     video_list = []
@@ -65,9 +280,45 @@ async def search_videos(
     
     return {
         "total": total,
-        "videos": video_list
+        "videos": video_list,
+        "next_cursor": next_cursor
     }
 
+@router.get("/suggest")
+async def suggest_videos(q: str, limit: int = 10):
+    """
+    검색어 자동완성 - 메모리 접두어 인덱스 (app/suggest.py), DB 조회 없음
+    - 마지막 단어는 접두어로, 앞 단어들은 완전 일치로 찾음
+    """
+    limit = max(1, min(limit, 20))
+    return {"suggestions": suggest_index.suggest(q, limit)}
+
+@router.post("/prewarm", status_code=status.HTTP_202_ACCEPTED)
+async def prewarm_videos(body: PrewarmRequest, db: Session = Depends(get_db)):
+    """
+    다음 동영상 미리 받기 - 피드에서 곧 보게 될 동영상의 앞부분(prefetch_range)을 서버 메모리에 채움
+    - 백그라운드로 받고 바로 응답 (202), 이미 캐시에 있으면 건너뜀
+    - 다음 /stream 첫 요청은 앞부분을 바로 보내고 나머지만 S3에서 이어서 받음
+    - 리다이렉트 모드에서는 바이트를 S3가 직접 보내므로 아무것도 하지 않음
+    """
+    if VIDEO_DELIVERY_MODE == "redirect":
+        return {"scheduled": 0}
+
+    videos = await run_db(get_cached_videos, db, body.video_ids)
+    ready_ids = [video.id for video in videos if video.processing_status == PROCESSING_READY]
+    mp4_keys = await run_db(_mp4_rendition_keys, db, ready_ids) if ready_ids else {}
+
+    scheduled = 0
+    for video in videos:
+        key, size = mp4_keys.get(video.id, (video.filename, video.file_size))
+        if key in video_cache or key in head_cache:
+            continue
+        length = prefetch_length(video.processing_status, video.file_size, video.duration, video.moov_offset, video.moov_size)
+        head_cache.schedule_fill(key, 0, min(length, size))
+        scheduled += 1
+    return {"scheduled": scheduled}
+
+
 @router.post("/upload", status_code=status.HTTP_201_CREATED, response_model=VideoSchema)
 async def upload_video(file: UploadFile = File(...), db: Session = Depends(get_db)):
     """동영상 업로드"""
@@ -83,27 +334,21 @@ async def upload_video(file: UploadFile = File(...), db: Session = Depends(get_d
     # 2. 고유 파일명 생성 (동일)
     unique_filename = f"{uuid.uuid4()}{file_ext}"
     
-    # 3. 파일 내용 읽기 (메모리에서 처리)
+    # 3~4. S3에 스트리밍 업로드 ⭐ (파트 단위로 읽으면서 크기 검증, moov 는 앞으로 옮겨서)
     try:
-        file_content = await file.read()
-        file_size = len(file_content)
-        
-        # 파일 크기 검증
-        if file_size > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"파일 크기가 너무 큽니다."
-            )
-        
-        # 4. S3에 업로드 ⭐
-        s3_url = upload_file_to_s3(
-            file_content=file_content,
+        source, moov_offset, moov_size = await _faststart(file)
+        s3_url, file_size = await stream_upload_to_s3(
+            file=source,
             filename=unique_filename,
-            content_type=file.content_type
+            content_type=file.content_type,
+            max_size=MAX_FILE_SIZE
         )
         
-    except HTTPException:
-        raise
+    except FileTooLargeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"파일 크기가 너무 큽니다."
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -116,144 +361,510 @@ async def upload_video(file: UploadFile = File(...), db: Session = Depends(get_d
         original_filename=file.filename,
         file_path=s3_url,  # S3 URL로 저장!
         file_size=file_size,
-        content_type=file.content_type
+        content_type=file.content_type,
+        moov_offset=moov_offset,
+        moov_size=moov_size
     )
     
     db.add(db_video)
-    db.commit()
-    db.refresh(db_video)
+    enqueue_transcode(db, db_video)  # 같은 트랜잭션으로 변환 작업 추가 (python -m app.worker)
+    await run_db(_commit_and_refresh, db, db_video)
+    try:
+        suggest_index.add(db_video.id, db_video.original_filename)
+        invalidate_video_lists()
+    except Exception as e:
+        # 커밋은 끝났으므로 색인/캐시 갱신 실패로 요청을 실패시키지 않음
+        logger.warning(f"⚠️ 검색어 색인/캐시 갱신 실패: video_id={db_video.id}, {e}")
     
     return db_video
 
 
+@router.post("/upload-url", response_model=UploadUrlResponse)
+async def create_upload_url(body: UploadUrlRequest):
+    """
+    직접 업로드 1단계 - S3 presigned POST 발급
+    - 브라우저가 API 서버를 거치지 않고 S3에 바로 업로드
+    - 확장자는 여기서, 파일 크기(MAX_FILE_SIZE)와 Content-Type은 presigned 정책 조건으로 S3가 검증
+    - 업로드가 끝나면 /upload-complete 호출
+    """
+
+    file_ext = Path(body.filename).suffix.lower()
+    if file_ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"허용되지 않는 파일 형식입니다. 허용: {', '.join(ALLOWED_EXTENSIONS)}"
+        )
+
+    if not body.content_type.startswith("video/"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="동영상 파일만 업로드할 수 있습니다."
+        )
+
+    unique_filename = f"{uuid.uuid4()}{file_ext}"
+
+    try:
+        presigned = await run_s3(
+            create_presigned_upload,
+            filename=unique_filename,
+            content_type=body.content_type,
+            max_size=MAX_FILE_SIZE,
+            expires_in=UPLOAD_URL_EXPIRES
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"업로드 URL 생성 실패: {str(e)}"
+        )
+
+    return {
+        "key": unique_filename,
+        "url": presigned["url"],
+        "fields": presigned["fields"],
+        "expires_in": UPLOAD_URL_EXPIRES,
+        "max_file_size": MAX_FILE_SIZE
+    }
+
+
+@router.post("/upload-complete", status_code=status.HTTP_201_CREATED, response_model=VideoSchema)
+async def complete_upload(body: UploadCompleteRequest, db: Session = Depends(get_db)):
+    """
+    직접 업로드 2단계 - S3 객체 확인 후 DB 등록
+    - HEAD로 실제 업로드된 크기/Content-Type 확인
+    """
+
+    # /upload-url 에서 발급한 형식의 키만 허용 ({uuid}{확장자})
+    key_path = Path(body.key)
+    try:
+        uuid.UUID(key_path.stem)
+        valid_key = key_path.name == body.key and key_path.suffix.lower() in ALLOWED_EXTENSIONS
+    except ValueError:
+        valid_key = False
+    if not valid_key:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="유효하지 않은 업로드 키입니다."
+        )
+
+    existing = await run_db(
+        lambda: db.query(Video.id).filter(Video.filename == body.key).first()
+    )
+    if existing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="이미 등록된 동영상입니다."
+        )
+
+    head = await run_s3(head_file_in_s3, body.key)
+    if head is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="업로드된 파일을 찾을 수 없습니다."
+        )
+
+    file_size = head["ContentLength"]
+    content_type = head.get("ContentType")
+    if file_size > MAX_FILE_SIZE or not (content_type or "").startswith("video/"):
+        # 정책 조건을 우회한 객체는 남겨두지 않음
+        try:
+            await run_s3(delete_file_from_s3, body.key)
+        except Exception as e:
+            logger.warning(f"⚠️ 잘못된 업로드 파일 삭제 실패: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="허용되지 않는 파일입니다. (크기 또는 형식)"
+        )
+
+    moov_offset, moov_size = await _probe_moov(body.key, file_size)
+
+    db_video = Video(
+        filename=body.key,
+        original_filename=body.original_filename,
+        file_path=get_s3_url(body.key),
+        file_size=file_size,
+        content_type=content_type,
+        moov_offset=moov_offset,
+        moov_size=moov_size
+    )
+
+    db.add(db_video)
+    enqueue_transcode(db, db_video)
+    await run_db(_commit_and_refresh, db, db_video)
+    try:
+        suggest_index.add(db_video.id, db_video.original_filename)
+        invalidate_video_lists()
+    except Exception as e:
+        logger.warning(f"⚠️ 검색어 색인/캐시 갱신 실패: video_id={db_video.id}, {e}")
+    logger.info(f"✅ 직접 업로드 등록 완료: {body.key}")
+
+    return db_video
+
+
 @router.get("/", response_model=VideoListResponse) # 👈 응답 모델 수정
-async def get_videos(skip : int = 0,
+def get_videos(request: Request,
+    response: Response,
+    skip : int = 0,
     limit: int = 20,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     db: Session = Depends(get_db)
     ): # 👈 DB 의존성 주입
 
-    """동영상 목록 조회"""
+    """
+    동영상 목록 조회
+    - cursor: 이전 응답의 next_cursor (있으면 skip 무시)
+    - include_total=false: 전체 개수(count) 쿼리 생략
+    - ETag: 페이지에 포함된 동영상 (id, updated_at) + 전체 개수 + 다음 커서, 같으면 304
+    - 첫 페이지는 메타데이터 캐시에서 응답
+    """
 
-    videos = db.query(Video).order_by(Video.id.desc()).offset(skip).limit(limit).all()
     # Pydantic이 ORM_MODE=True 덕분에 SQLAlchemy 객체 리스트를 스키마 리스트로 변환함
-    total = db.query(Video).count()
+    videos, total, next_cursor = _recent_videos_page(db, skip, limit, cursor, include_total)
+
+    etag = entity_etag(total, next_cursor, *[(video.id, video.updated_at) for video in videos])
+    if is_not_modified(request.headers, etag, None):
+        return not_modified_response(etag, None, METADATA_CACHE_CONTROL)
+    response.headers.update(validator_headers(etag, None, METADATA_CACHE_CONTROL))
+    links = _preload_links(videos)
+    if links:
+        response.headers["Link"] = links
+
+    return {
+        "total": total,
+        "videos": videos,
+        "next_cursor": next_cursor
+    }
+
+
+@router.get("/feed", response_model=VideoFeedResponse)
+def get_feed(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    db: Session = Depends(get_db)
+):
+    """
+    피드 조회 - 동영상 목록 + 좋아요/댓글 개수 + 좋아요 여부
+    - 카드마다 /like, /comments 를 따로 부르지 않도록 한 번에 채워서 반환
+    - 개수는 videos 테이블의 카운터 컬럼을 그대로 사용
+    - 페이지 크기와 상관없이 쿼리 수는 고정 (목록, 전체 개수, 좋아요 여부)
+    - cursor / include_total 은 목록 조회(get_videos)와 동일 (첫 페이지는 캐시에서 응답)
+    """
+
+    videos, total, next_cursor = _recent_videos_page(db, skip, limit, cursor, include_total)
+
+    video_ids = [video.id for video in videos]
+    liked_ids = set()
+    liked_overrides = {}
+
+    if video_ids:
+        # 현재 사용자가 좋아요 누른 동영상
+        user_identifier = get_user_identifier(request)
+        liked_ids = {
+            video_id for (video_id,) in db.query(Like.video_id).filter(
+                Like.video_id.in_(video_ids),
+                Like.user_identifier == user_identifier
+            ).all()
+        }
+        # 아직 DB에 반영되지 않은 좋아요 버퍼 (LIKE_WRITE_MODE=buffered)
+        liked_overrides = like_buffer.liked_overrides(video_ids, user_identifier)
+
+    video_list = []
+    for video in videos:
+        item = VideoResponse.model_validate(video)
+        item.is_liked = liked_overrides.get(video.id, video.id in liked_ids)
+        item.like_count = max(item.like_count + like_buffer.count_delta(video.id), 0)
+        video_list.append(item)
+
+    links = _preload_links(video_list)
+    if links:
+        response.headers["Link"] = links
 
     return {
         "total": total,
-        "videos": videos
+        "videos": video_list,
+        "next_cursor": next_cursor
     }
 
 
 @router.get("/{video_id}", response_model=VideoSchema) # 👈 응답 모델 수정
-async def get_video(video_id: int, db: Session = Depends(get_db)): # 👈 DB 의존성 주입
-    """단일 동영상 정보 조회"""
+def get_video(video_id: int, request: Request, response: Response, db: Session = Depends(get_db)): # 👈 DB 의존성 주입
+    """
+    단일 동영상 정보 조회
+    - ETag: (id, updated_at, filename), Last-Modified: updated_at
+    - If-None-Match / If-Modified-Since가 맞으면 304
+    - 메타데이터 캐시에 있으면 DB 조회 없음
+    """
     
-    # DB에서 ID를 사용하여 비디오 찾기
-    video = db.query(Video).filter(Video.id == video_id).first()
+    # 캐시 또는 DB에서 ID를 사용하여 비디오 찾기
+    video = get_cached_video(db, video_id)
     
     if not video:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="동영상을 찾을 수 없습니다."
         )
+
+    etag = entity_etag(video.id, video.updated_at, video.filename)
+    last_modified = http_date(video.updated_at or video.uploaded_at)
+    if is_not_modified(request.headers, etag, last_modified):
+        return not_modified_response(etag, last_modified, METADATA_CACHE_CONTROL)
+    response.headers.update(validator_headers(etag, last_modified, METADATA_CACHE_CONTROL))
     
     return video # SQLAlchemy 객체 반환
 
 
-from app.s3_client import s3_client, BUCKET_NAME
-
 @router.get("/{video_id}/stream")
-async def stream_video(video_id: int, request: Request, db: Session = Depends(get_db)):
-    """동영상 스트리밍 (Range Request 지원)"""
+async def stream_video(video_id: int, request: Request, original: bool = False, db: Session = Depends(get_db)):
+    """
+    동영상 스트리밍 (Range Request 지원)
+    - 변환이 끝난 동영상은 웹용 MP4, original=true 이면 원본
+    - bytes=a-b / a- / -n, 파일 끝을 넘는 구간은 잘라서 206
+    - 여러 구간은 multipart/byteranges
+    - If-Range가 현재 ETag/Last-Modified와 다르면 Range 무시하고 전체 200
+    - If-None-Match / If-Modified-Since가 맞으면 304 (S3 호출 없음)
+    """
 
-    video = db.query(Video).filter(Video.id == video_id).first()
+    video = await run_db(_find_video, db, video_id)
     if not video:
         raise HTTPException(status_code=404, detail="동영상을 찾을 수 없습니다.")
 
-    # Range 헤더 확인
+    key, file_size, content_type = await _playback_source(db, video, original)
+
+    # 리다이렉트 모드: Range 처리도 S3가 직접
+    if VIDEO_DELIVERY_MODE == "redirect":
+        return await _redirect_to_s3(key)
+
+    etag = video_etag(key, file_size)
+    last_modified = http_date(video.updated_at or video.uploaded_at)
+
+    # 바뀌지 않았으면 캐시/S3를 건드리지 않고 304
+    if is_not_modified(request.headers, etag, last_modified):
+        return not_modified_response(etag, last_modified, VIDEO_CACHE_CONTROL)
+    headers = {"Accept-Ranges": "bytes", **validator_headers(etag, last_modified, VIDEO_CACHE_CONTROL)}
+
+    # Range 헤더 확인 (If-Range가 맞지 않으면 무시)
     range_header = request.headers.get("range")
-    
-    # Range 요청 없으면 전체 파일
-    if not range_header:
+    ranges = None
+    if range_header and if_range_matches(request.headers.get("if-range"), etag, last_modified):
         try:
-            # S3에서 파일 가져오기 ⭐
-            s3_response = s3_client.get_object(
-                Bucket=BUCKET_NAME,
-                Key=video.filename
+            ranges = parse_range_header(range_header, file_size)
+        except RangeNotSatisfiable:
+            raise HTTPException(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                detail="유효하지 않은 범위",
+                headers={"Content-Range": f"bytes */{file_size}"}
             )
-            
+
+    _prefetch_moov(video, key, ranges)
+
+    try:
+        # Range 요청 없으면 전체 파일
+        if not ranges:
+            # 로컬 캐시 또는 S3에서 파일 가져오기 ⭐
+            body = await _open_video_body(video.id, key, file_size, 0, file_size - 1) if file_size else iter(())
+            return StreamingResponse(
+                body,
+                media_type=content_type,
+                headers={**headers, "Content-Length": str(file_size)}
+            )
+
+        # 단일 구간: 로컬 캐시 또는 S3 Range Request ⭐
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            body = await _open_video_body(video.id, key, file_size, start, end)
             return StreamingResponse(
-                s3_response['Body'].iter_chunks(),
-                media_type=video.content_type,
+                body,
+                status_code=206,
+                media_type=content_type,
                 headers={
-                    "Accept-Ranges": "bytes",
-                    "Content-Length": str(video.file_size),
+                    **headers,
+                    "Content-Range": f"bytes {start}-{end}/{file_size}",
+                    "Content-Length": str(end - start + 1),
                 }
             )
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"스트리밍 실패: {str(e)}")
-    
-    # Range 헤더 파싱
-    range_str = range_header.replace("bytes=", "")
-    start, end = range_str.split("-")
-    
-    start = int(start)
-    end = int(end) if end else video.file_size - 1
-    
-    # 범위 검증
-    if start >= video.file_size or end >= video.file_size:
-        raise HTTPException(status_code=416, detail="유효하지 않은 범위")
-    
-    chunk_size = end - start + 1
-    
-    try:
-        # S3 Range Request ⭐
-        s3_response = s3_client.get_object(
-            Bucket=BUCKET_NAME,
-            Key=video.filename,
-            Range=f"bytes={start}-{end}"
-        )
-        
+
+        # 여러 구간: multipart/byteranges (구간마다 순서대로 읽음)
+        boundary = new_multipart_boundary()
+        content_type = content_type or "application/octet-stream"
+
+        async def multipart_body():
+            for start, end in ranges:
+                yield multipart_part_header(boundary, content_type, start, end, file_size)
+                async for chunk in await _open_video_body(video.id, key, file_size, start, end):
+                    yield chunk
+            yield multipart_closing(boundary)
+
         return StreamingResponse(
-            s3_response['Body'].iter_chunks(),
+            multipart_body(),
             status_code=206,
-            media_type=video.content_type,
+            media_type=f"multipart/byteranges; boundary={boundary}",
             headers={
-                "Content-Range": f"bytes {start}-{end}/{video.file_size}",
-                "Accept-Ranges": "bytes",
-                "Content-Length": str(chunk_size),
+                **headers,
+                "Content-Length": str(multipart_content_length(boundary, content_type, ranges, file_size)),
             }
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"스트리밍 실패: {str(e)}")
 
 
+HLS_FILE_PATTERN = re.compile(r"index\.m3u8|seg_\d{5}\.ts")
+HLS_CONTENT_TYPE = "application/vnd.apple.mpegurl"
+
+@router.get("/{video_id}/manifest.m3u8")
+async def get_manifest(video_id: int, request: Request, db: Session = Depends(get_db)):
+    """
+    HLS 마스터 플레이리스트 (화질별 플레이리스트 목록, 플레이어가 네트워크 상태에 맞춰 화질 선택)
+    - 변환이 끝나지 않았으면 404 (processing_status 로 확인, 그동안은 /stream 으로 원본 재생)
+    """
+    video = await run_db(_find_video, db, video_id)
+    if not video:
+        raise HTTPException(status_code=404, detail="동영상을 찾을 수 없습니다.")
+
+    renditions = await run_db(_hls_renditions, db, video_id)
+    if not renditions:
+        raise HTTPException(
+            status_code=404,
+            detail=f"아직 HLS 변환 결과가 없습니다. (processing_status={video.processing_status})"
+        )
+
+    etag = entity_etag(video.id, video.updated_at, video.filename)
+    last_modified = http_date(video.updated_at or video.uploaded_at)
+    if is_not_modified(request.headers, etag, last_modified):
+        return not_modified_response(etag, last_modified, METADATA_CACHE_CONTROL)
+
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-INDEPENDENT-SEGMENTS"]
+    for rendition in renditions:
+        attributes = [f"BANDWIDTH={rendition.bandwidth}"]
+        if video.duration:
+            attributes.append(f"AVERAGE-BANDWIDTH={int(rendition.file_size * 8 / video.duration)}")
+        attributes += [f"RESOLUTION={rendition.width}x{rendition.height}", f'CODECS="{rendition.codecs}"']
+        # 상대 경로: /api/videos/{id}/hls/{화질}/index.m3u8
+        lines += ["#EXT-X-STREAM-INF:" + ",".join(attributes), f"hls/{rendition.name}/{HLS_PLAYLIST}"]
+
+    return Response(
+        "\n".join(lines) + "\n",
+        media_type=HLS_CONTENT_TYPE,
+        headers=validator_headers(etag, last_modified, METADATA_CACHE_CONTROL)
+    )
+
+
+@router.get("/{video_id}/hls/{rendition}/{name}")
+async def get_hls_file(video_id: int, rendition: str, name: str, db: Session = Depends(get_db)):
+    """
+    화질별 HLS 플레이리스트 / 세그먼트
+    - 플레이리스트는 항상 API가 전달 (세그먼트 상대 경로가 이 경로 기준이 되도록)
+    - 세그먼트는 VIDEO_DELIVERY_MODE=redirect 이면 presigned URL로 리다이렉트
+    """
+    if not HLS_FILE_PATTERN.fullmatch(name):
+        raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다.")
+
+    row = await run_db(_find_rendition, db, video_id, "hls", rendition)
+    if row is None:
+        raise HTTPException(status_code=404, detail="화질을 찾을 수 없습니다.")
+
+    key = f"{row.s3_key.rsplit('/', 1)[0]}/{name}"
+    is_playlist = name == HLS_PLAYLIST
+    if VIDEO_DELIVERY_MODE == "redirect" and not is_playlist:
+        return await _redirect_to_s3(key)
+
+    try:
+        s3_response = await run_s3(s3_stream_client.get_object, Bucket=BUCKET_NAME, Key=key)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+            raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다.")
+        raise HTTPException(status_code=500, detail=f"스트리밍 실패: {str(e)}")
+
+    return StreamingResponse(
+        count_video_bytes(video_id, "s3", iterate_s3(s3_response['Body'].iter_chunks(STREAM_CHUNK_SIZE))),
+        media_type=HLS_CONTENT_TYPE if is_playlist else "video/mp2t",
+        headers={
+            "Content-Length": str(s3_response["ContentLength"]),
+            "ETag": s3_response["ETag"],
+            "Cache-Control": VIDEO_CACHE_CONTROL,
+        }
+    )
+
+
+IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"  # ?v= 가 현재 파일과 같을 때 (파일 교체 시 주소가 바뀜)
+
+async def _image_response(db: Session, request: Request, video_id: int, kind: str, v: Optional[str]):
+    """
+    포스터 / 미리보기 스프라이트 응답
+    - 작은 파일이라 리다이렉트 모드에서도 API가 전달 (로컬 디스크 캐시에서 바로 응답)
+    - ?v= 가 지금 파일과 같으면 1년 캐시, 아니면 매번 재검증 (ETag / 304)
+    """
+    row = await run_db(_find_rendition, db, video_id, kind)
+    if row is None:
+        raise HTTPException(status_code=404, detail="썸네일이 아직 없습니다.")
+
+    etag = entity_etag(row.s3_key, row.file_size)
+    current = bool(v) and row.s3_key.startswith(rendition_prefix(v))
+    cache_control = IMAGE_CACHE_CONTROL if current else METADATA_CACHE_CONTROL
+    if is_not_modified(request.headers, etag, None):
+        return not_modified_response(etag, None, cache_control)
+
+    try:
+        _, body = await _open_object_body(row.s3_key, row.file_size, 0, row.file_size - 1)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+            raise HTTPException(status_code=404, detail="썸네일을 찾을 수 없습니다.")
+        raise HTTPException(status_code=500, detail=f"썸네일 전송 실패: {str(e)}")
+
+    return StreamingResponse(
+        body,
+        media_type="image/jpeg",
+        headers={"Content-Length": str(row.file_size), **validator_headers(etag, None, cache_control)}
+    )
+
+
+@router.get("/{video_id}/thumbnail")
+async def get_thumbnail(video_id: int, request: Request, v: Optional[str] = None, db: Session = Depends(get_db)):
+    """포스터 이미지 (JPEG, 변환 완료 후) - 응답의 thumbnail_url 사용"""
+    return await _image_response(db, request, video_id, "poster", v)
+
+
+@router.get("/{video_id}/preview")
+async def get_preview(video_id: int, request: Request, v: Optional[str] = None, db: Session = Depends(get_db)):
+    """미리보기 스프라이트 (JPEG, 재생 구간별 프레임 10장을 가로로 이어 붙임) - 응답의 preview_url 사용"""
+    return await _image_response(db, request, video_id, "preview", v)
+
+
 @router.get("/{video_id}/download")
 async def download_video(video_id: int, db: Session = Depends(get_db)):
     """동영상 다운로드"""
     
-    video = db.query(Video).filter(Video.id == video_id).first()
+    video = await run_db(_find_video, db, video_id)
     if not video:
         raise HTTPException(status_code=404, detail="동영상을 찾을 수 없습니다.")
     
+    # 파일명 처리
+    file_ext = Path(video.filename).suffix
+    download_filename = video.original_filename if video.original_filename.endswith(file_ext) else f"{video.original_filename}{file_ext}"
+    
+    encoded_filename = quote(download_filename)
+    content_disposition = f"attachment; filename*=UTF-8''{encoded_filename}"
+
     try:
+        # 리다이렉트 모드: S3가 같은 Content-Disposition으로 응답
+        if VIDEO_DELIVERY_MODE == "redirect":
+            return await _redirect_to_s3(video.filename, content_disposition)
+
         # S3에서 파일 가져오기 ⭐
-        s3_response = s3_client.get_object(
+        s3_response = await run_s3(
+            s3_stream_client.get_object,
             Bucket=BUCKET_NAME,
             Key=video.filename
         )
-        
-        # 파일명 처리
-        file_ext = Path(video.filename).suffix
-        download_filename = video.original_filename if video.original_filename.endswith(file_ext) else f"{video.original_filename}{file_ext}"
-        
-        encoded_filename = quote(download_filename)
 
         return StreamingResponse(
-            s3_response['Body'].iter_chunks(),
+            count_video_bytes(video.id, "s3", iterate_s3(s3_response['Body'].iter_chunks(STREAM_CHUNK_SIZE))),
             media_type="application/octet-stream",
             headers={
-                "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}"
+                "Content-Disposition": content_disposition
             }
         )
     except Exception as e:
@@ -267,28 +878,39 @@ async def download_video(video_id: int, db: Session = Depends(get_db)):
 async def delete_video(video_id: int, db: Session = Depends(get_db)):
     """동영상 삭제"""
     
-    video = db.query(Video).filter(Video.id == video_id).first()
+    video = await run_db(_find_video, db, video_id)
     if not video:
         raise HTTPException(status_code=404, detail="동영상을 찾을 수 없습니다.")
     
     # DB에서 먼저 삭제
     try:
-        db.delete(video)
-        db.commit()
+        await run_db(_delete_and_commit, db, video)
         logger.info(f"✅ DB 삭제 완료: video_id={video_id}")
     except Exception as e:
-        db.rollback()
+        await run_db(db.rollback)
         raise HTTPException(status_code=500, detail="DB 삭제 실패")
+
+    # 커밋 이후: 색인/캐시 갱신이 실패해도 S3 정리는 계속 진행
+    try:
+        suggest_index.remove(video_id)
+        invalidate_video(video_id)
+        invalidate_video_lists()
+    except Exception as e:
+        logger.warning(f"⚠️ 검색어 색인/캐시 갱신 실패: video_id={video_id}, {e}")
     
     # S3에서 파일 삭제 ⭐
     file_deleted = False
     try:
-        delete_file_from_s3(video.filename)
+        forget_presigned_urls(video.filename)
+        await video_cache.discard(video.filename)
+        await run_s3(delete_file_from_s3, video.filename)
         logger.info(f"✅ S3 파일 삭제 성공: {video.filename}")
         file_deleted = True
     except Exception as e:
         logger.error(f"S3 파일 삭제 오류: {e}")
         # 파일 삭제 실패해도 DB는 이미 삭제됨
+
+    await _discard_renditions(video.filename)
     
     return {
         "success": True,
@@ -311,7 +933,7 @@ async def update_video(
     """
     
     # 1. 비디오 찾기
-    video = db.query(Video).filter(Video.id == video_id).first()
+    video = await run_db(_find_video, db, video_id)
     if not video:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -341,22 +963,13 @@ async def update_video(
         new_unique_filename = f"{uuid.uuid4()}{file_ext}"
         
         try:
-            # 파일 내용 읽기
-            file_content = await file.read()
-            new_file_size = len(file_content)
-            
-            # 파일 크기 검증
-            if new_file_size > MAX_FILE_SIZE:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"파일 크기가 너무 큽니다. 최대: {MAX_FILE_SIZE / 1024 / 1024}MB"
-                )
-            
-            # S3에 새 파일 업로드
-            new_s3_url = upload_file_to_s3(
-                file_content=file_content,
+            # S3에 새 파일 스트리밍 업로드 (파트 단위로 읽으면서 크기 검증, moov 는 앞으로 옮겨서)
+            source, moov_offset, moov_size = await _faststart(file)
+            new_s3_url, new_file_size = await stream_upload_to_s3(
+                file=source,
                 filename=new_unique_filename,
-                content_type=file.content_type
+                content_type=file.content_type,
+                max_size=MAX_FILE_SIZE
             )
             
             # DB 필드 업데이트
@@ -364,11 +977,16 @@ async def update_video(
             video.file_path = new_s3_url
             video.file_size = new_file_size
             video.content_type = file.content_type
+            video.moov_offset = moov_offset
+            video.moov_size = moov_size
             
             logger.info(f"✅ S3 파일 업로드 성공: {new_unique_filename}")
             
-        except HTTPException:
-            raise
+        except FileTooLargeError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"파일 크기가 너무 큽니다. 최대: {MAX_FILE_SIZE / 1024 / 1024}MB"
+            )
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -380,30 +998,21 @@ async def update_video(
         video.original_filename = original_filename
         logger.info(f"✅ 파일명 변경: {original_filename}")
     
+    # 예전 변환 결과는 버리고 새 파일로 다시 변환
+    if file:
+        await run_db(_reset_renditions, db, video)
+
     # 5. DB 커밋
     try:
-        db.commit()
-        db.refresh(video)
+        await run_db(_commit_and_refresh, db, video)
         logger.info(f"✅ DB 업데이트 완료: video_id={video_id}")
-        
-        # 6. 파일 교체 성공 시 기존 S3 파일 삭제
-        if file and old_filename != video.filename:
-            try:
-                delete_file_from_s3(old_filename)
-                logger.info(f"✅ 기존 S3 파일 삭제 성공: {old_filename}")
-            except Exception as e:
-                # 기존 파일 삭제 실패해도 무시 (새 파일은 이미 업로드됨)
-                logger.warning(f"⚠️ 기존 S3 파일 삭제 실패: {e}")
-        
-        return video
-        
     except SQLAlchemyError as e:
-        db.rollback()
+        await run_db(db.rollback)
         
         # DB 업데이트 실패 시: 새로 업로드한 S3 파일 삭제
         if file:
             try:
-                delete_file_from_s3(video.filename)
+                await run_s3(delete_file_from_s3, video.filename)
                 logger.info(f"🔄 롤백: 새 S3 파일 삭제")
             except Exception:
                 pass
@@ -417,4 +1026,26 @@ async def update_video(
         new_original_name = Path(file.filename).stem
         new_s3_filename = f"{new_original_name}_{uuid.uuid4()}{file_ext}"
         asd = {uuid.uuid4()}
-        
\ No newline at end of file
+        
+
+    # 커밋 이후: 색인/캐시 갱신이 실패해도 요청은 성공 처리
+    try:
+        invalidate_video(video_id)
+        if original_filename:
+            suggest_index.add(video.id, video.original_filename)
+    except Exception as e:
+        logger.warning(f"⚠️ 검색어 색인/캐시 갱신 실패: video_id={video_id}, {e}")
+
+    # 6. 파일 교체 성공 시 기존 S3 파일 삭제
+    if file and old_filename != video.filename:
+        try:
+            forget_presigned_urls(old_filename)
+            await video_cache.discard(old_filename)
+            await run_s3(delete_file_from_s3, old_filename)
+            logger.info(f"✅ 기존 S3 파일 삭제 성공: {old_filename}")
+        except Exception as e:
+            # 기존 파일 삭제 실패해도 무시 (새 파일은 이미 업로드됨)
+            logger.warning(f"⚠️ 기존 S3 파일 삭제 실패: {e}")
+        await _discard_renditions(old_filename)
+
+    return video
@@ -1,27 +1,170 @@
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 import os
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Optional
+from fastapi import UploadFile
+from app.executor import run_s3, S3_THREADPOOL_SIZE
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# S3 클라이언트 생성
-s3_client = boto3.client(
-    's3',
-    aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-    aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-    region_name=os.getenv('AWS_REGION')
+# S3 클라이언트 설정 (프로필 2개, 클라이언트마다 연결 풀이 따로)
+# - metadata: head / delete / list / 멀티파트 시작·완료 / presigned 생성 → 짧은 타임아웃
+#     S3 호출은 S3 스레드풀에서만 하므로 풀 크기 = S3_THREADPOOL_SIZE
+# - stream: 객체 본문 get(스트리밍, Range) / 업로드 파트 / 다운로드 → 읽기 타임아웃을 길게
+#     응답 본문을 다 읽을 때까지 연결을 잡고 있으므로 풀 크기 = 스레드풀 + 동시 스트림 수
+#     (풀이 가득 차면 요청마다 새 연결을 열고 다 쓰면 버림 → TLS 연결 비용이 매번 듦)
+# 재시도: adaptive 모드 (standard 재시도 + 스로틀링(503 SlowDown) 응답이 오면 요청 속도를 낮춤)
+S3_RETRY_MODE = os.getenv('S3_RETRY_MODE', 'adaptive')                # legacy / standard / adaptive
+S3_MAX_ATTEMPTS = int(os.getenv('S3_MAX_ATTEMPTS', 3))                # 첫 시도 포함
+S3_CONNECT_TIMEOUT = float(os.getenv('S3_CONNECT_TIMEOUT', 2))        # 초
+S3_READ_TIMEOUT = float(os.getenv('S3_READ_TIMEOUT', 10))             # 초 (metadata)
+S3_STREAM_READ_TIMEOUT = float(os.getenv('S3_STREAM_READ_TIMEOUT', 30))  # 초 (stream, 소켓 읽기 한 번 기준)
+S3_TCP_KEEPALIVE = os.getenv('S3_TCP_KEEPALIVE', 'false').lower() in ('1', 'true', 'yes', 'on')
+S3_MAX_CONCURRENT_STREAMS = int(os.getenv('S3_MAX_CONCURRENT_STREAMS', 100))  # 워커 1개당 예상 동시 스트림 수
+S3_MAX_POOL_CONNECTIONS = int(os.getenv('S3_MAX_POOL_CONNECTIONS', S3_THREADPOOL_SIZE))
+S3_STREAM_MAX_POOL_CONNECTIONS = int(
+    os.getenv('S3_STREAM_MAX_POOL_CONNECTIONS', S3_THREADPOOL_SIZE + S3_MAX_CONCURRENT_STREAMS)
 )
 
+S3_CLIENT_PROFILES = {
+    'metadata': {'read_timeout': S3_READ_TIMEOUT, 'max_pool_connections': S3_MAX_POOL_CONNECTIONS},
+    'stream': {'read_timeout': S3_STREAM_READ_TIMEOUT, 'max_pool_connections': S3_STREAM_MAX_POOL_CONNECTIONS},
+}
+
+
+def create_s3_client(profile: str = 'metadata', **overrides):
+    """
+    프로필 설정으로 S3 클라이언트 생성
+    - overrides: botocore Config 항목 덮어쓰기 (예: max_pool_connections=1)
+    - AWS_S3_ENDPOINT_URL: 로컬 S3 대체 서버(moto server, MinIO 등)를 쓸 때만 설정
+    """
+    options = {
+        'connect_timeout': S3_CONNECT_TIMEOUT,
+        'retries': {'mode': S3_RETRY_MODE, 'total_max_attempts': S3_MAX_ATTEMPTS},
+        'tcp_keepalive': S3_TCP_KEEPALIVE,
+        **S3_CLIENT_PROFILES[profile],
+        **overrides,
+    }
+    return boto3.client(
+        's3',
+        aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+        aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+        region_name=os.getenv('AWS_REGION'),
+        endpoint_url=os.getenv('AWS_S3_ENDPOINT_URL') or None,
+        config=Config(**options)
+    )
+
+
+class PoolWatcher:
+    """
+    boto3 클라이언트 연결 풀 상태 (/s3/pool/stats, 메트릭)
+    - 사용 중 / 유휴 연결 수, 지금까지 새로 연 연결 수
+    - 요청을 보낼 때 풀에 남은 자리가 없었던 횟수 (새 연결을 열고 다 쓰면 버림 = 풀 포화)
+    botocore 가 내부에서 쓰는 urllib3 PoolManager 를 읽음 (찾지 못하면 설정값만)
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.exhausted = 0
+        self._lock = threading.Lock()
+        http_session = getattr(client._endpoint, 'http_session', None)
+        self._manager = getattr(http_session, '_manager', None)
+        if self._manager is not None:
+            client.meta.events.register('before-send.s3', self._before_send, unique_id='pool-watcher-before-send')
+
+    def _before_send(self, request, **kwargs):
+        pool = self._manager.connection_from_url(request.url)
+        if pool.pool is not None and pool.pool.empty():
+            with self._lock:
+                self.exhausted += 1
+
+    def _pools(self):
+        if self._manager is None:
+            return []
+        pools = []
+        for key in self._manager.pools.keys():
+            pool = self._manager.pools.get(key)
+            if pool is not None and pool.pool is not None:
+                pools.append(pool)
+        return pools
+
+    def stats(self) -> dict:
+        config = self.client.meta.config
+        stats = {
+            'max_connections': config.max_pool_connections,
+            'connect_timeout': config.connect_timeout,
+            'read_timeout': config.read_timeout,
+            'retries': config.retries,
+            'tcp_keepalive': bool(config.tcp_keepalive),
+            'in_use': 0,
+            'idle': 0,
+            'connections_created': 0,
+            'exhausted': self.exhausted,
+        }
+        for pool in self._pools():
+            # 큐에는 유휴 연결과 아직 열지 않은 자리(None)가 들어 있음
+            queued = list(pool.pool.queue)
+            stats['in_use'] += pool.pool.maxsize - len(queued)
+            stats['idle'] += sum(1 for conn in queued if conn is not None)
+            stats['connections_created'] += pool.num_connections
+        return stats
+
+
+s3_client = create_s3_client('metadata')
+s3_stream_client = create_s3_client('stream')
+
+_pool_watchers = {
+    'metadata': PoolWatcher(s3_client),
+    'stream': PoolWatcher(s3_stream_client),
+}
+
+
+def s3_pool_stats() -> dict:
+    """S3 클라이언트별 연결 풀 상태"""
+    return {name: watcher.stats() for name, watcher in _pool_watchers.items()}
+
 BUCKET_NAME = os.getenv('AWS_BUCKET_NAME')
 
+# 멀티파트 업로드 설정
+# - 파트 크기: S3 최소 파트 크기는 5MB (마지막 파트 제외)
+# - 동시 업로드 파트 수: 업로드 1건이 메모리에 들고 있는 최대 바이트 = 파트 크기 x 동시 업로드 수
+MULTIPART_PART_SIZE = max(int(os.getenv('S3_PART_SIZE', 8 * 1024 * 1024)), 5 * 1024 * 1024)
+MULTIPART_CONCURRENCY = max(int(os.getenv('S3_UPLOAD_CONCURRENCY', 4)), 1)
+
+
+# presigned GET URL 설정
+# - 유효 시간이 PRESIGNED_URL_REFRESH_MARGIN 초 이하로 남으면 새로 서명
+# - (키, Content-Disposition) 별로 최대 PRESIGNED_URL_CACHE_SIZE 개까지 캐시 (LRU)
+PRESIGNED_URL_EXPIRES = int(os.getenv('PRESIGNED_URL_EXPIRES', 300))
+PRESIGNED_URL_REFRESH_MARGIN = min(int(os.getenv('PRESIGNED_URL_REFRESH_MARGIN', 60)), PRESIGNED_URL_EXPIRES // 2)
+PRESIGNED_URL_CACHE_SIZE = int(os.getenv('PRESIGNED_URL_CACHE_SIZE', 10000))
+
+_presigned_url_cache = OrderedDict()  # (키, disposition) -> (url, 만료 시각)
+_presigned_url_lock = threading.Lock()
+
+
+class FileTooLargeError(Exception):
+    """업로드 중 최대 파일 크기를 넘은 경우"""
+    pass
+
+
+def get_s3_url(filename: str) -> str:
+    """S3 객체 URL"""
+    return f"https://{BUCKET_NAME}.s3.{os.getenv('AWS_REGION')}.amazonaws.com/{filename}"
+
 def upload_file_to_s3(file_content: bytes, filename: str, content_type: str) -> str:
     """
     S3에 파일 업로드
     Returns: S3 URL
     """
     try:
-        s3_client.put_object(
+        s3_stream_client.put_object(
             Bucket=BUCKET_NAME,
             Key=filename,
             Body=file_content,
@@ -29,19 +172,203 @@ def upload_file_to_s3(file_content: bytes, filename: str, content_type: str) ->
         )
         
         # S3 URL 생성
-        s3_url = f"https://{BUCKET_NAME}.s3.{os.getenv('AWS_REGION')}.amazonaws.com/{filename}"
-        return s3_url
+        return get_s3_url(filename)
     
     except ClientError as e:
         print(f"S3 업로드 에러: {e}")
         raise
 
+async def stream_upload_to_s3(file: UploadFile, filename: str, content_type: str, max_size: int) -> tuple[str, int]:
+    """
+    UploadFile을 파트 단위로 읽어서 S3에 스트리밍 업로드
+    - 파일 전체를 메모리에 올리지 않음 (업로드 1건당 최대 파트 크기 x 동시 업로드 수)
+    - 파트 하나보다 작은 파일은 put_object 한 번으로 업로드
+    - 그보다 크면 멀티파트 업로드로 여러 파트를 병렬 전송
+    - 읽는 도중 max_size를 넘으면 즉시 중단하고 FileTooLargeError
+    - boto3 호출은 S3 스레드풀에서 실행 (이벤트 루프 블로킹 방지)
+    Returns: (S3 URL, 파일 크기)
+    """
+    # 멀티파트 파서가 이미 크기를 알고 있으면 S3 호출 전에 거절
+    if file.size is not None and file.size > max_size:
+        raise FileTooLargeError()
+
+    first_part = await file.read(MULTIPART_PART_SIZE)
+    if len(first_part) > max_size:
+        raise FileTooLargeError()
+
+    # 작은 파일: 한 번에 업로드
+    if len(first_part) < MULTIPART_PART_SIZE:
+        await run_s3(upload_file_to_s3, first_part, filename, content_type)
+        return get_s3_url(filename), len(first_part)
+
+    # 큰 파일: 멀티파트 업로드
+    upload = await run_s3(
+        s3_client.create_multipart_upload,
+        Bucket=BUCKET_NAME,
+        Key=filename,
+        ContentType=content_type
+    )
+    upload_id = upload['UploadId']
+
+    # 메모리에 동시에 올라가는 파트 수 제한
+    slots = asyncio.Semaphore(MULTIPART_CONCURRENCY)
+
+    async def upload_part(part_number: int, body: bytes) -> dict:
+        try:
+            response = await run_s3(
+                s3_stream_client.upload_part,
+                Bucket=BUCKET_NAME,
+                Key=filename,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=body
+            )
+            return {'PartNumber': part_number, 'ETag': response['ETag']}
+        finally:
+            slots.release()
+
+    tasks = []
+    file_size = 0
+    try:
+        part = first_part
+        while part:
+            file_size += len(part)
+            if file_size > max_size:
+                raise FileTooLargeError()
+
+            await slots.acquire()
+            tasks.append(asyncio.create_task(upload_part(len(tasks) + 1, part)))
+
+            # 실패한 파트가 있으면 나머지를 읽지 않고 중단
+            failed = next((t for t in tasks if t.done() and t.exception()), None)
+            if failed:
+                raise failed.exception()
+
+            part = await file.read(MULTIPART_PART_SIZE)
+
+        parts = await asyncio.gather(*tasks)
+
+        await run_s3(
+            s3_client.complete_multipart_upload,
+            Bucket=BUCKET_NAME,
+            Key=filename,
+            UploadId=upload_id,
+            MultipartUpload={'Parts': parts}
+        )
+        return get_s3_url(filename), file_size
+
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            await run_s3(
+                s3_client.abort_multipart_upload,
+                Bucket=BUCKET_NAME,
+                Key=filename,
+                UploadId=upload_id
+            )
+        except ClientError as e:
+            print(f"S3 멀티파트 업로드 취소 에러: {e}")
+        raise
+
+def create_presigned_upload(filename: str, content_type: str, max_size: int, expires_in: int) -> dict:
+    """
+    브라우저가 S3에 직접 올릴 수 있는 presigned POST 생성
+    - 키, Content-Type, 최대 크기(content-length-range)를 정책 조건으로 고정
+    Returns: {'url': ..., 'fields': {...}}
+    """
+    try:
+        return s3_client.generate_presigned_post(
+            Bucket=BUCKET_NAME,
+            Key=filename,
+            Fields={'Content-Type': content_type},
+            Conditions=[
+                {'Content-Type': content_type},
+                ['content-length-range', 1, max_size],
+            ],
+            ExpiresIn=expires_in
+        )
+    except ClientError as e:
+        print(f"S3 presigned 생성 에러: {e}")
+        raise
+
+def head_file_in_s3(filename: str):
+    """
+    S3 객체 메타데이터 조회 (크기, Content-Type)
+    - 객체가 없으면 None
+    """
+    try:
+        return s3_client.head_object(
+            Bucket=BUCKET_NAME,
+            Key=filename
+        )
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+            return None
+        print(f"S3 조회 에러: {e}")
+        raise
+
+def lookup_presigned_url(filename: str, disposition: Optional[str] = None) -> Optional[tuple[str, int]]:
+    """
+    캐시된 presigned GET URL 조회 (서명 없이, 이벤트 루프에서 바로 호출 가능)
+    Returns: (URL, 남은 유효 시간(초)) 또는 None
+    """
+    now = time.time()
+    with _presigned_url_lock:
+        cached = _presigned_url_cache.get((filename, disposition))
+        if cached is None:
+            return None
+        url, expires_at = cached
+        if expires_at - now <= PRESIGNED_URL_REFRESH_MARGIN:
+            del _presigned_url_cache[(filename, disposition)]
+            return None
+        _presigned_url_cache.move_to_end((filename, disposition))
+        return url, int(expires_at - now)
+
+def get_presigned_download_url(filename: str, disposition: Optional[str] = None) -> tuple[str, int]:
+    """
+    presigned GET URL 생성 (캐시에 있으면 재사용)
+    - disposition: 다운로드용 Content-Disposition (S3 응답 헤더로 지정)
+    Returns: (URL, 남은 유효 시간(초))
+    """
+    cached = lookup_presigned_url(filename, disposition)
+    if cached:
+        return cached
+
+    params = {'Bucket': BUCKET_NAME, 'Key': filename}
+    if disposition:
+        params['ResponseContentDisposition'] = disposition
+
+    try:
+        url = s3_client.generate_presigned_url(
+            'get_object',
+            Params=params,
+            ExpiresIn=PRESIGNED_URL_EXPIRES
+        )
+    except ClientError as e:
+        print(f"S3 presigned 생성 에러: {e}")
+        raise
+
+    with _presigned_url_lock:
+        _presigned_url_cache[(filename, disposition)] = (url, time.time() + PRESIGNED_URL_EXPIRES)
+        _presigned_url_cache.move_to_end((filename, disposition))
+        while len(_presigned_url_cache) > PRESIGNED_URL_CACHE_SIZE:
+            _presigned_url_cache.popitem(last=False)
+    return url, PRESIGNED_URL_EXPIRES
+
+def forget_presigned_urls(filename: str):
+    """삭제/교체된 파일의 presigned URL 캐시 제거"""
+    with _presigned_url_lock:
+        for cache_key in [k for k in _presigned_url_cache if k[0] == filename]:
+            del _presigned_url_cache[cache_key]
+
 def get_file_from_s3(filename: str):
     """
     S3에서 파일 가져오기
     """
     try:
-        response = s3_client.get_object(
+        response = s3_stream_client.get_object(
             Bucket=BUCKET_NAME,
             Key=filename
         )
@@ -61,4 +388,59 @@ def delete_file_from_s3(filename: str):
         )
     except ClientError as e:
         print(f"S3 삭제 에러: {e}")
-        raise
\ No newline at end of file
+        raise
+def read_range_from_s3(filename: str, offset: int, length: int) -> bytes:
+    """
+    S3 객체의 [offset, offset + length) 구간 읽기 (파일 끝을 넘으면 있는 만큼)
+    """
+    try:
+        response = s3_stream_client.get_object(
+            Bucket=BUCKET_NAME,
+            Key=filename,
+            Range=f"bytes={offset}-{offset + length - 1}"
+        )
+        return response['Body'].read()
+    except ClientError as e:
+        print(f"S3 구간 읽기 에러: {e}")
+        raise
+
+def download_file_from_s3(filename: str, path: str):
+    """
+    S3 객체를 로컬 파일로 다운로드 (큰 파일은 boto3 가 여러 구간으로 나눠 받음)
+    """
+    try:
+        s3_stream_client.download_file(BUCKET_NAME, filename, path)
+    except ClientError as e:
+        print(f"S3 다운로드 에러: {e}")
+        raise
+
+def upload_path_to_s3(path: str, filename: str, content_type: str, cache_control: Optional[str] = None):
+    """
+    로컬 파일을 S3에 업로드 (큰 파일은 boto3 가 멀티파트로 나눠 올림)
+    """
+    extra = {'ContentType': content_type}
+    if cache_control:
+        extra['CacheControl'] = cache_control
+    try:
+        s3_stream_client.upload_file(path, BUCKET_NAME, filename, ExtraArgs=extra)
+    except ClientError as e:
+        print(f"S3 업로드 에러: {e}")
+        raise
+
+def delete_prefix_from_s3(prefix: str) -> int:
+    """
+    prefix 아래 객체 모두 삭제 (한 번에 최대 1000개씩)
+    Returns: 삭제한 객체 수
+    """
+    deleted = 0
+    try:
+        paginator = s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=BUCKET_NAME, Prefix=prefix):
+            keys = [{'Key': item['Key']} for item in page.get('Contents', [])]
+            if keys:
+                s3_client.delete_objects(Bucket=BUCKET_NAME, Delete={'Objects': keys, 'Quiet': True})
+                deleted += len(keys)
+    except ClientError as e:
+        print(f"S3 삭제 에러: {e}")
+        raise
+    return deleted
@@ -0,0 +1,70 @@
+# schema.py
+# 서버 시작 시 DB 스키마 준비 (DB_SCHEMA_MODE)
+#
+# - check (기본): 테이블을 만들지 않고 DB의 alembic 버전이 최신(head)인지만 확인
+#     스키마 변경은 배포 단계에서 한 번만 실행: alembic upgrade head
+#     워커가 여러 개 동시에 떠도 DDL/카탈로그 잠금 경쟁이 없고 시작이 빠름
+# - create: 예전 방식 (create_all + 없는 인덱스 추가), 로컬 SQLite / 테스트용
+#
+# 버전 확인: python -m app.schema
+
+import logging
+import os
+from pathlib import Path
+
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+
+from app.database import Base, engine as default_engine, ensure_indexes, init_db
+from app.like_store import ensure_like_unique_index
+from app.search import ensure_search_index
+
+logger = logging.getLogger(__name__)
+
+DB_SCHEMA_MODE = os.getenv("DB_SCHEMA_MODE", "check").lower()  # check | create
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+
+def head_revision() -> str:
+    """마이그레이션 파일 기준 최신 버전"""
+    return ScriptDirectory.from_config(Config(str(ALEMBIC_INI))).get_current_head()
+
+
+def current_revision(engine) -> str:
+    """DB에 기록된 버전 (alembic_version 테이블, 없으면 None)"""
+    with engine.connect() as conn:
+        return MigrationContext.configure(conn).get_current_revision()
+
+
+def check_schema(engine):
+    """DB 버전이 최신이 아니면 SchemaOutOfDate (서버 시작 중단)"""
+    current, head = current_revision(engine), head_revision()
+    if current != head:
+        raise SchemaOutOfDate(
+            f"DB 스키마 버전이 {current} 입니다 (최신: {head}). "
+            f"먼저 'alembic upgrade head' 를 실행하세요. (로컬 개발은 DB_SCHEMA_MODE=create)"
+        )
+    logger.info(f"✅ DB 스키마 버전 확인: {current}")
+
+
+def prepare_schema(engine):
+    """서버 시작 시 호출"""
+    if DB_SCHEMA_MODE == "create":
+        init_db(engine, Base.metadata)
+        # 기존 DB에 좋아요 유니크 인덱스 / 모델에 새로 선언된 인덱스 / 검색 인덱스 추가
+        ensure_like_unique_index(engine)
+        ensure_indexes(engine, Base.metadata)
+        ensure_search_index(engine)
+        logger.info("✅ DB 테이블/인덱스 생성 완료 (DB_SCHEMA_MODE=create)")
+        return
+    check_schema(engine)
+
+
+if __name__ == "__main__":
+    current, head = current_revision(default_engine), head_revision()
+    print(f"DB 버전: {current}, 최신: {head} → {'✅ 최신' if current == head else '❌ alembic upgrade head 필요'}")
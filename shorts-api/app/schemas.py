@@ -1,8 +1,10 @@
 # schemas.py
 from typing import List
-from pydantic import BaseModel , Field
+from pydantic import BaseModel , Field, computed_field
 from datetime import datetime
+from pathlib import Path
 from typing import Optional
+from app.prefetch import prefetch_length
 
 class VideoBase(BaseModel):
     filename: str
@@ -13,6 +15,36 @@ class VideoBase(BaseModel):
     uploaded_at: datetime
     # 💡 updated_at 컬럼 추가 (Optional)
     updated_at: Optional[datetime] = None
+    # 변환 상태: none / pending / processing / ready / failed (ready 이면 /manifest.m3u8 사용 가능)
+    processing_status: str = "none"
+    duration: Optional[float] = None  # 재생 시간 (초, 변환 후 채워짐)
+    # 원본 파일의 moov 박스 위치 / 크기 (app/mp4.py, MP4/MOV 가 아니면 None)
+    moov_offset: Optional[int] = None
+    moov_size: Optional[int] = None
+
+    # 포스터 / 미리보기 스프라이트 주소 (변환 완료 후, id 는 하위 스키마에 있음)
+    # ?v= 는 파일명 기준이라 파일을 교체하면 주소가 바뀜 → 브라우저가 오래 캐시해도 됨
+    @computed_field
+    @property
+    def thumbnail_url(self) -> Optional[str]:
+        return self._image_url("thumbnail")
+
+    @computed_field
+    @property
+    def preview_url(self) -> Optional[str]:
+        return self._image_url("preview")
+
+    # 재생 시작 부분(첫 PREFETCH_SECONDS 초) 추정 Range: 다음 동영상을 미리 받을 때 /stream 에 그대로 사용 (app/prefetch.py)
+    @computed_field
+    @property
+    def prefetch_range(self) -> str:
+        length = prefetch_length(self.processing_status, self.file_size, self.duration, self.moov_offset, self.moov_size)
+        return f"bytes=0-{length - 1}"
+
+    def _image_url(self, endpoint: str) -> Optional[str]:
+        if self.processing_status != "ready":
+            return None
+        return f"/api/videos/{self.id}/{endpoint}?v={Path(self.filename).stem}"
     
 # DB에서 읽어올 때 사용하는 스키마
 class Video(VideoBase):
@@ -30,19 +62,53 @@ class VideoUpdate(BaseModel):
     class Config:
         from_attributes = True
 
+class UploadUrlRequest(BaseModel):
+    """직접 업로드 URL 발급 요청"""
+    filename: str = Field(..., min_length=1, max_length=500)  # 사용자가 올릴 원본 파일 이름
+    content_type: str = Field(..., min_length=1, max_length=100)
+
+class UploadUrlResponse(BaseModel):
+    """직접 업로드 URL 발급 응답 (presigned POST)"""
+    key: str  # 완료 요청 때 그대로 돌려보낼 S3 키
+    url: str
+    fields: dict  # multipart/form-data 로 파일과 함께 보낼 필드
+    expires_in: int
+    max_file_size: int
+
+class PrewarmRequest(BaseModel):
+    """다음 동영상 미리 받기 요청 (피드에서 곧 보게 될 동영상 id, 순서대로)"""
+    video_ids: List[int] = Field(..., min_length=1, max_length=10)
+
+class UploadCompleteRequest(BaseModel):
+    """직접 업로드 완료 요청"""
+    key: str
+    original_filename: str = Field(..., min_length=1, max_length=500)
+
 class VideoResponse(VideoBase):
     """동영상 응답 (좋아요 개수 포함)"""
     id: int
     uploaded_at: datetime
     updated_at: Optional[datetime] = None
     like_count: int = 0  # ← 추가
+    comment_count: int = 0
+    is_liked: bool = False  # 요청한 사용자의 좋아요 여부
     
     class Config:
         from_attributes = True
 
+class VideoFeedResponse(BaseModel):
+    """피드 응답 (좋아요/댓글 개수, 좋아요 여부 포함)"""
+    total: Optional[int] = None  # include_total=false 이면 생략
+    videos: List[VideoResponse]
+    next_cursor: Optional[str] = None  # 다음 페이지 커서 (마지막 페이지면 None)
+
+    class Config:
+        from_attributes = True
+
 class VideoListResponse(BaseModel):
-    total: int
+    total: Optional[int] = None  # include_total=false 이면 생략
     videos: List[Video]
+    next_cursor: Optional[str] = None  # 다음 페이지 커서 (마지막 페이지면 None)
 
     class Config:
         from_attributes = True
@@ -98,6 +164,7 @@ class CommentUpdate(BaseModel):
 class CommentListResponse(BaseModel):
     total: int
     comments: List[CommentResponse]
+    next_cursor: Optional[str] = None  # 다음 페이지 커서 (마지막 페이지면 None)
 
     class Config:
         from_attributes = True
\ No newline at end of file
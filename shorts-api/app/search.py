@@ -0,0 +1,135 @@
+# search.py
+# 동영상 검색 (원본 파일명 기준)
+#
+# - PostgreSQL: pg_trgm GIN 인덱스 (lower(original_filename) gin_trgm_ops)
+#     * 부분 문자열: lower(name) LIKE '%q%'  → 트라이그램 인덱스 사용
+#     * 오타 허용: lower(name) %> q (word_similarity >= SEARCH_SIMILARITY_THRESHOLD) → 같은 인덱스 사용
+#     * 정렬: 접두어 일치 > 부분 문자열 일치 > word_similarity 점수 순 (동점은 id 내림차순)
+# - 그 외 (SQLite 등 로컬/테스트): LIKE '%q%' 로 찾고 접두어 일치만 위로 올림 (오타 허용 없음)
+#
+# 한 번의 쿼리로 현재 페이지와 전체 일치 개수(count(*) OVER ())를 함께 가져옵니다.
+# 한글 파일명도 트라이그램이 만들어지려면 DB 로케일이 UTF-8 이어야 합니다 (예: ko_KR.UTF-8, C.UTF-8).
+
+import logging
+import os
+from typing import Optional
+
+from sqlalchemy import Float, and_, case, cast, func, literal, or_, select, text, true
+from sqlalchemy.orm import Session, aliased
+
+from app.database import set_session_setting
+from app.models import Video
+from app.pagination import decode_cursor, encode_cursor, split_page
+
+logger = logging.getLogger(__name__)
+
+SEARCH_SIMILARITY_THRESHOLD = float(os.getenv("SEARCH_SIMILARITY_THRESHOLD", 0.4))
+SEARCH_INDEX_NAME = "ix_videos_original_filename_trgm"
+
+
+def _is_postgres(bind) -> bool:
+    return bind.dialect.name == "postgresql"
+
+
+def configure_search(engine):
+    """
+    검색 설정 (서버 시작 시 한 번 호출)
+    - PostgreSQL: 연결마다 word_similarity 임계값 설정 (set_session_setting)
+    - 인덱스는 마이그레이션(alembic 0002)이 만듦, DB_SCHEMA_MODE=create 이면 ensure_search_index
+    """
+    if not _is_postgres(engine):
+        return
+
+    set_session_setting(engine, "pg_trgm.word_similarity_threshold", f"{SEARCH_SIMILARITY_THRESHOLD:f}")
+    # 이미 열린 연결에는 설정이 적용되지 않았으므로 새로 열도록 비움
+    engine.dispose()
+
+
+def ensure_search_index(engine):
+    """
+    pg_trgm 확장과 GIN 인덱스 생성 (DB_SCHEMA_MODE=create 로 시작할 때)
+    - 권한이 없어 확장을 만들 수 없으면 경고만 남기고 인덱스 없이 동작
+    """
+    if not _is_postgres(engine):
+        return
+
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS {SEARCH_INDEX_NAME} "
+                f"ON videos USING gin (lower(original_filename) gin_trgm_ops)"
+            ))
+    except Exception as e:
+        logger.warning(f"⚠️ 검색 인덱스(pg_trgm) 생성 실패, 순차 검색으로 동작합니다: {e}")
+
+
+def _match_and_score(bind, term: str):
+    """(WHERE 조건, 관련도 점수 식)"""
+    if not term:
+        return true(), literal(0.0, Float)
+
+    name = func.lower(Video.original_filename)
+    is_prefix = name.startswith(term, autoescape=True)
+    is_substring = name.contains(term, autoescape=True)
+
+    if _is_postgres(bind):
+        match = or_(is_substring, name.op("%>")(term))
+        score = cast(func.word_similarity(term, name), Float)
+    else:
+        match = is_substring
+        score = literal(0.0, Float)
+
+    bonus = case((is_prefix, 2.0), (is_substring, 1.0), else_=0.0)
+    return match, cast(bonus + score, Float)
+
+
+def search_videos_page(
+    db: Session,
+    q: str,
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+    include_total: bool,
+):
+    """
+    관련도 순 검색 페이지 조회
+    - cursor: 마지막 행의 (score, id), 없으면 skip 방식
+    Returns: (현재 페이지 Video 목록, 전체 일치 개수 또는 None, 다음 커서)
+    """
+    match, score = _match_and_score(db.get_bind(), q.strip().lower())
+
+    columns = [Video, score.label("score")]
+    if include_total:
+        columns.append(func.count().over().label("total"))
+    ranked = select(*columns).where(match).subquery()
+    video = aliased(Video, ranked)
+
+    statement = select(video, *[ranked.c[name] for name in ("score", "total") if name in ranked.c])
+    statement = statement.order_by(ranked.c.score.desc(), ranked.c.id.desc())
+    if cursor:
+        last = decode_cursor(cursor, "score", "id")
+        statement = statement.where(
+            or_(
+                ranked.c.score < last["score"],
+                and_(ranked.c.score == last["score"], ranked.c.id < last["id"]),
+            )
+        )
+    elif skip:
+        statement = statement.offset(skip)
+
+    rows, has_more = split_page(db.execute(statement.limit(limit + 1)).all(), limit)
+
+    total = None
+    if include_total:
+        # 창 함수는 커서/offset 적용 전(안쪽 쿼리)에서 계산되므로 항상 전체 일치 개수
+        # 빈 페이지면 알 수 없으므로 첫 페이지일 때만 0
+        if rows:
+            total = rows[0].total
+        elif not cursor and not skip:
+            total = 0
+
+    next_cursor = None
+    if has_more and rows:
+        next_cursor = encode_cursor(score=rows[-1].score, id=rows[-1][0].id)
+    return [row[0] for row in rows], total, next_cursor
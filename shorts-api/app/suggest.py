@@ -0,0 +1,164 @@
+# suggest.py
+# 검색어 자동완성 (search-as-you-type)용 메모리 접두어 인덱스
+#
+# - 원본 파일명을 정규화(NFKC, 소문자, 확장자 제거)한 뒤 단어 단위 토큰으로 나눔
+# - 토큰은 정렬된 리스트에 두고 bisect로 접두어 구간을 찾음 (DB 조회 없음)
+# - 서버 시작 시 videos 테이블에서 한 번 채우고, 업로드/수정/삭제 때 해당 동영상만 갱신
+# - 메모리 상한: 최신 SUGGEST_MAX_VIDEOS 개 동영상만 유지 (넘으면 id가 가장 작은 것부터 제거),
+#   동영상당 토큰 SUGGEST_MAX_TOKENS 개, 토큰 길이 SUGGEST_MAX_TOKEN_LENGTH 자까지
+#   → 단어가 모두 다른 최악의 경우 동영상 1개당 약 1.3KB (기본 5만 개 ≈ 65MB),
+#     실제 파일명은 단어가 많이 겹쳐서 이보다 작음. 현재 값은 GET /suggest/stats 의 approx_bytes
+# - uvicorn 워커마다 별도 인덱스라서 다른 워커에서 일어난 변경은 재시작 전까지 반영되지 않음
+
+import bisect
+import os
+import re
+import sys
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Set
+
+from sqlalchemy.orm import Session
+
+from app.models import Video
+
+SUGGEST_MAX_VIDEOS = int(os.getenv("SUGGEST_MAX_VIDEOS", 50_000))
+SUGGEST_MAX_TOKENS = 16
+SUGGEST_MAX_TOKEN_LENGTH = 32
+SUGGEST_SCAN_LIMIT = 1000  # 짧은 접두어("a")가 인덱스 전체를 훑지 않도록 확인할 후보 수 상한
+
+_TOKEN_SPLIT = re.compile(r"[\W_]+")
+
+
+def normalize(text: str) -> str:
+    """NFKC + 소문자 (전각 문자, 호환 한글 자모 등을 통일)"""
+    return unicodedata.normalize("NFKC", text).lower().strip()
+
+
+def normalize_title(title: str) -> str:
+    """확장자 제거 후 정규화"""
+    return normalize(Path(title).stem if Path(title).suffix else title)
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in _TOKEN_SPLIT.split(text):
+        # 자른 뒤에 중복 확인 (앞 32자가 같은 긴 단어는 같은 토큰)
+        token = token[:SUGGEST_MAX_TOKEN_LENGTH]
+        if token and token not in tokens:
+            tokens.append(token)
+        if len(tokens) >= SUGGEST_MAX_TOKENS:
+            break
+    return tokens
+
+
+class PrefixIndex:
+    def __init__(self, max_videos: int):
+        self.max_videos = max_videos
+        self._tokens: List[str] = []                # 정렬된 고유 토큰
+        self._postings: Dict[str, Set[int]] = {}    # 토큰 -> 동영상 id
+        self._titles: Dict[int, str] = {}           # 동영상 id -> 원본 파일명 (삭제 시 다시 토큰화)
+        self._lock = threading.Lock()
+
+    def build(self, db: Session):
+        """videos 테이블에서 최신 max_videos 개로 인덱스를 새로 만듦 (서버 시작 시)"""
+        rows = (
+            db.query(Video.id, Video.original_filename)
+            .order_by(Video.id.desc())
+            .limit(self.max_videos)
+            .all()
+        )
+        with self._lock:
+            self._tokens, self._postings, self._titles = [], {}, {}
+            for video_id, title in rows:
+                self._add_locked(video_id, title, keep_sorted=False)
+            self._tokens.sort()
+
+    def add(self, video_id: int, title: str):
+        """동영상 추가/이름 변경 (같은 id가 있으면 교체)"""
+        with self._lock:
+            self._remove_locked(video_id)
+            self._add_locked(video_id, title, keep_sorted=True)
+            while len(self._titles) > self.max_videos:
+                self._remove_locked(min(self._titles))
+
+    def remove(self, video_id: int):
+        with self._lock:
+            self._remove_locked(video_id)
+
+    def _add_locked(self, video_id: int, title: str, keep_sorted: bool):
+        self._titles[video_id] = title
+        for token in tokenize(normalize_title(title)):
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = set()
+                if keep_sorted:
+                    bisect.insort(self._tokens, token)
+                else:
+                    self._tokens.append(token)
+            posting.add(video_id)
+
+    def _remove_locked(self, video_id: int):
+        title = self._titles.pop(video_id, None)
+        if title is None:
+            return
+        for token in tokenize(normalize_title(title)):
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            posting.discard(video_id)
+            if not posting:
+                del self._postings[token]
+                position = bisect.bisect_left(self._tokens, token)
+                if position < len(self._tokens) and self._tokens[position] == token:
+                    del self._tokens[position]
+
+    def suggest(self, q: str, limit: int = 10) -> List[dict]:
+        """
+        자동완성 후보
+        - 마지막 단어는 접두어, 앞 단어들은 완전히 일치해야 함 ("고양이 브" → "고양이" + "브*")
+        - 정렬: 마지막 단어가 완전히 일치하는 동영상 우선, 그다음 최신(id 큰) 순
+        """
+        terms = tokenize(normalize(q))
+        if not terms:
+            return []
+        *words, prefix = terms
+
+        with self._lock:
+            required = None
+            for word in words:
+                posting = self._postings.get(word, set())
+                required = posting if required is None else required & posting
+                if not required:
+                    return []
+
+            exact = self._postings.get(prefix, ())
+            candidates = set()
+            position = bisect.bisect_left(self._tokens, prefix)
+            end = min(len(self._tokens), position + SUGGEST_SCAN_LIMIT)
+            while position < end and self._tokens[position].startswith(prefix):
+                candidates |= self._postings[self._tokens[position]]
+                position += 1
+
+            if required is not None:
+                candidates &= required
+            ranked = sorted(candidates, key=lambda video_id: (video_id not in exact, -video_id))[:limit]
+            return [{"id": video_id, "original_filename": self._titles[video_id]} for video_id in ranked]
+
+    def stats(self) -> dict:
+        """인덱스 크기 (approx_bytes는 컨테이너 + 문자열 크기의 대략적인 합)"""
+        with self._lock:
+            approx = sys.getsizeof(self._tokens) + sys.getsizeof(self._postings)
+            approx += sys.getsizeof(self._titles)
+            approx += sum(sys.getsizeof(token) + sys.getsizeof(posting) for token, posting in self._postings.items())
+            approx += sum(sys.getsizeof(title) for title in self._titles.values())
+            return {
+                "videos": len(self._titles),
+                "tokens": len(self._tokens),
+                "max_videos": self.max_videos,
+                "approx_bytes": approx,
+            }
+
+
+suggest_index = PrefixIndex(SUGGEST_MAX_VIDEOS)
@@ -0,0 +1,76 @@
+# thumbnails.py
+# 포스터 이미지 / 미리보기 스프라이트 (Pillow)
+#
+# - 변환 작업(app/transcode.py)이 원본을 내려받은 김에 ffmpeg 로 프레임 몇 장을 뽑으면 여기서 JPEG 로 만듦
+#     포스터:   renditions/{stem}/poster.jpg  (THUMBNAIL_WIDTH 폭)
+#     미리보기: renditions/{stem}/preview.jpg (PREVIEW_FRAMES 장을 가로로 이어 붙인 저해상도 스프라이트)
+# - 피드 카드는 <video> 첫 프레임 대신 포스터를 보여 줌 → 스크롤만 해도 /stream Range 요청이 나가던 문제 해결
+# - 제공: GET /api/videos/{id}/thumbnail, /preview (로컬 디스크 캐시 + ?v= 주소로 브라우저 장기 캐시)
+
+import os
+from pathlib import Path
+from typing import List, Optional
+
+from PIL import Image
+
+THUMBNAIL_WIDTH = int(os.getenv("THUMBNAIL_WIDTH", 540))            # 포스터 폭 (px, 원본보다 크게 만들지 않음)
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", 80))         # JPEG 품질 (1~95)
+PREVIEW_FRAME_WIDTH = int(os.getenv("PREVIEW_FRAME_WIDTH", 120))    # 미리보기 스프라이트 한 칸 폭 (px)
+PREVIEW_FRAMES = 10  # 스프라이트 칸 수 (클라이언트는 이미지 폭 / 10 으로 칸을 나눔)
+
+POSTER_NAME = "poster.jpg"
+PREVIEW_NAME = "preview.jpg"
+
+
+def poster_time(duration: Optional[float]) -> float:
+    """포스터로 쓸 시점 (초): 첫 프레임은 검은 화면인 경우가 많아 1초 (짧은 영상은 중간)"""
+    if not duration:
+        return 0.0
+    return min(1.0, duration / 2)
+
+
+def preview_times(duration: Optional[float]) -> List[float]:
+    """미리보기 프레임 시점: 전체를 PREVIEW_FRAMES 구간으로 나눈 각 구간의 가운데"""
+    if not duration:
+        return [0.0]
+    return [(i + 0.5) * duration / PREVIEW_FRAMES for i in range(PREVIEW_FRAMES)]
+
+
+def _resized(image: Image.Image, width: int) -> Image.Image:
+    image = image.convert("RGB")
+    if image.width <= width:
+        return image
+    return image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+
+
+def make_poster(frame: Path, out_path: Path) -> tuple:
+    """
+    프레임 이미지로 포스터 JPEG 생성
+    Returns: (가로, 세로)
+    """
+    with Image.open(frame) as image:
+        poster = _resized(image, THUMBNAIL_WIDTH)
+    poster.save(out_path, "JPEG", quality=THUMBNAIL_QUALITY, optimize=True, progressive=True)
+    return poster.size
+
+
+def make_preview_sprite(frames: List[Path], out_path: Path) -> tuple:
+    """
+    프레임 이미지들을 같은 크기로 줄여 가로로 이어 붙인 스프라이트 JPEG 생성
+    - 칸 수가 PREVIEW_FRAMES 보다 적으면 마지막 프레임을 반복해서 채움 (클라이언트가 칸 수를 고정으로 가정)
+    Returns: (가로, 세로)
+    """
+    frames = (frames + frames[-1:] * PREVIEW_FRAMES)[:PREVIEW_FRAMES]
+    tiles = []
+    for frame in frames:
+        with Image.open(frame) as image:
+            tiles.append(_resized(image, PREVIEW_FRAME_WIDTH))
+
+    width, height = tiles[0].size
+    sprite = Image.new("RGB", (width * len(tiles), height))
+    for index, tile in enumerate(tiles):
+        if tile.size != (width, height):
+            tile = tile.resize((width, height), Image.LANCZOS)
+        sprite.paste(tile, (index * width, 0))
+    sprite.save(out_path, "JPEG", quality=THUMBNAIL_QUALITY, optimize=True, progressive=True)
+    return sprite.size
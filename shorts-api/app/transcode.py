@@ -0,0 +1,342 @@
+# transcode.py
+# ffmpeg 로 원본 동영상을 HLS 화질 사다리(ABR) + 웹용 MP4(faststart)로 변환
+#
+# - 원본을 한 번만 디코딩하고 split 필터로 화질별 출력 여러 개를 한 번의 ffmpeg 실행으로 인코딩
+#   (웹용 MP4 는 같은 화질 HLS 인코딩 결과를 tee 로 함께 저장)
+# - 원본보다 큰 화질은 만들지 않음 (업스케일 없음, 세로 영상은 짧은 변 기준)
+# - 결과는 S3 renditions/{원본 키 stem}/ 아래에 올림 (원본 파일을 교체하면 경로도 바뀜)
+#     HLS: renditions/{stem}/{화질}/index.m3u8, seg_00000.ts ...
+#     MP4: renditions/{stem}/mp4/{화질}.mp4
+#     포스터 / 미리보기 스프라이트: renditions/{stem}/poster.jpg, preview.jpg (app/thumbnails.py)
+# - DB 기록/작업 상태는 app/worker.py 에서 처리 (여기서는 파일 변환과 업로드만)
+#
+# ffmpeg / ffprobe 가 PATH 에 있어야 함 (Dockerfile 에서 설치)
+
+import json
+import logging
+import os
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from app.s3_client import download_file_from_s3, upload_path_to_s3, delete_prefix_from_s3
+from app.thumbnails import POSTER_NAME, PREVIEW_NAME, make_poster, make_preview_sprite, poster_time, preview_times
+
+logger = logging.getLogger(__name__)
+
+FFMPEG_BIN = os.getenv("FFMPEG_BIN", "ffmpeg")
+FFPROBE_BIN = os.getenv("FFPROBE_BIN", "ffprobe")
+TRANSCODE_PRESET = os.getenv("TRANSCODE_PRESET", "veryfast")                 # x264 속도/압축률
+TRANSCODE_SEGMENT_SECONDS = int(os.getenv("TRANSCODE_SEGMENT_SECONDS", 4))   # HLS 세그먼트 길이 (초)
+TRANSCODE_MP4_RENDITION = os.getenv("TRANSCODE_MP4_RENDITION", "720p")       # 웹용 MP4 화질 (원본이 작으면 가장 큰 화질)
+TRANSCODE_TIMEOUT = int(os.getenv("TRANSCODE_TIMEOUT", 1800))                # ffmpeg 최대 실행 시간 (초)
+TRANSCODE_WORK_DIR = os.getenv("TRANSCODE_WORK_DIR") or None                 # 임시 작업 디렉토리 (기본: 시스템 임시 폴더)
+TRANSCODE_UPLOAD_CONCURRENCY = int(os.getenv("TRANSCODE_UPLOAD_CONCURRENCY", 8))
+
+RENDITION_PREFIX = "renditions"
+HLS_PLAYLIST = "index.m3u8"
+HLS_SEGMENT_PATTERN = "seg_%05d.ts"
+AUDIO_CODEC = "mp4a.40.2"  # AAC-LC
+SEGMENT_CACHE_CONTROL = "public, max-age=31536000, immutable"  # 원본 키별 경로라 내용이 바뀌지 않음
+
+
+@dataclass(frozen=True)
+class Rung:
+    """화질 사다리 한 단계 (short_side: 가로/세로 중 짧은 변 px)"""
+    name: str
+    short_side: int
+    video_kbps: int
+    audio_kbps: int
+    level: str          # H.264 레벨 (ffmpeg -level)
+    codec: str          # CODECS 속성용 (Main 프로파일 + 레벨)
+
+
+# 숏폼 기준 화질 사다리 (높은 화질부터)
+LADDER = (
+    Rung("1080p", 1080, 4500, 128, "4.0", "avc1.4d4028"),
+    Rung("720p", 720, 2500, 128, "3.1", "avc1.4d401f"),
+    Rung("480p", 480, 1200, 96, "3.0", "avc1.4d401e"),
+    Rung("360p", 360, 700, 64, "3.0", "avc1.4d401e"),
+)
+
+
+@dataclass
+class SourceInfo:
+    width: int          # 회전 메타데이터 반영한 표시 크기
+    height: int
+    duration: Optional[float]
+    has_audio: bool
+
+
+@dataclass
+class Output:
+    """변환 결과 하나 (VideoRendition 행으로 저장)"""
+    kind: str           # hls / mp4 / poster / preview
+    name: str           # 화질 이름 (이미지는 kind 와 같음)
+    width: int
+    height: int
+    s3_key: str
+    file_size: int
+    bandwidth: int = 0  # 최대 비트레이트 (bps, 인코딩 maxrate + 오디오), 이미지는 0
+    codecs: Optional[str] = None
+
+
+def _rung_output(kind: str, rung: Rung, width: int, height: int, s3_key: str, file_size: int) -> Output:
+    return Output(
+        kind, rung.name, width, height, s3_key, file_size,
+        bandwidth=(rung.video_kbps + rung.audio_kbps) * 1000,
+        codecs=f"{rung.codec},{AUDIO_CODEC}",
+    )
+
+
+class TranscodeError(Exception):
+    """ffmpeg/ffprobe 실패 (stderr 마지막 부분 포함)"""
+    pass
+
+
+def _run(args: List[str], timeout: int) -> str:
+    try:
+        result = subprocess.run(args, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        raise TranscodeError(f"{Path(args[0]).name} 시간 초과 ({timeout}초)")
+    if result.returncode != 0:
+        raise TranscodeError(f"{Path(args[0]).name} 실패 (코드 {result.returncode}): {result.stderr[-2000:]}")
+    return result.stdout
+
+
+def probe(path: str) -> SourceInfo:
+    """ffprobe 로 크기 / 재생 시간 / 오디오 유무 확인"""
+    output = _run([
+        FFPROBE_BIN, "-v", "error", "-print_format", "json", "-show_streams", "-show_format", path
+    ], timeout=60)
+    info = json.loads(output)
+    streams = info.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"), None)
+    if video is None:
+        raise TranscodeError("영상 스트림이 없습니다.")
+
+    width, height = int(video["width"]), int(video["height"])
+    # 휴대폰 세로 영상: 회전 메타데이터가 ±90 이면 표시 크기는 가로/세로가 바뀜 (ffmpeg 가 자동 회전)
+    rotation = video.get("tags", {}).get("rotate")
+    for side_data in video.get("side_data_list", []):
+        rotation = side_data.get("rotation", rotation)
+    if rotation is not None and abs(int(float(rotation))) % 180 == 90:
+        width, height = height, width
+
+    duration = info.get("format", {}).get("duration") or video.get("duration")
+    return SourceInfo(
+        width=width,
+        height=height,
+        duration=float(duration) if duration else None,
+        has_audio=any(s.get("codec_type") == "audio" for s in streams),
+    )
+
+
+def _even(value: float) -> int:
+    return max(2, int(round(value / 2)) * 2)
+
+
+def plan_rungs(source: SourceInfo) -> List[tuple]:
+    """
+    만들 화질 목록 [(Rung, 가로, 세로)] (높은 화질부터)
+    - 원본 짧은 변보다 큰 화질은 제외
+    - 원본이 가장 낮은 화질보다 작으면 원본 크기로 가장 낮은 화질 하나만
+    """
+    short = min(source.width, source.height)
+    rungs = [rung for rung in LADDER if rung.short_side <= short] or [LADDER[-1]]
+    planned = []
+    for rung in rungs:
+        scale = min(rung.short_side / short, 1.0)
+        planned.append((rung, _even(source.width * scale), _even(source.height * scale)))
+    return planned
+
+
+def _mp4_rung(planned: List[tuple]) -> tuple:
+    """웹용 MP4 로 만들 화질 (TRANSCODE_MP4_RENDITION, 없으면 만든 것 중 가장 높은 화질)"""
+    return next((p for p in planned if p[0].name == TRANSCODE_MP4_RENDITION), planned[0])
+
+
+def _video_args(rung: Rung) -> List[str]:
+    return [
+        "-c:v", "libx264", "-preset", TRANSCODE_PRESET, "-profile:v", "main", "-level", rung.level,
+        "-pix_fmt", "yuv420p",
+        "-b:v", f"{rung.video_kbps}k", "-maxrate", f"{rung.video_kbps}k", "-bufsize", f"{rung.video_kbps * 2}k",
+    ]
+
+
+def _audio_args(rung: Rung, source: SourceInfo) -> List[str]:
+    if not source.has_audio:
+        return []
+    return ["-c:a", "aac", "-b:a", f"{rung.audio_kbps}k", "-ac", "2"]
+
+
+def build_ffmpeg_command(src: str, out_dir: Path, source: SourceInfo, planned: List[tuple]) -> List[str]:
+    """
+    화질별 HLS + 웹용 MP4 를 한 번에 만드는 ffmpeg 명령
+    - 디코딩 1회 → split → 화질별 scale / 인코딩
+    - 웹용 MP4 는 같은 화질 HLS 의 인코딩 결과를 tee 로 함께 저장 (다시 인코딩하지 않음)
+    """
+    mp4_rung = _mp4_rung(planned)[0]
+    labels = [f"v{i}" for i in range(len(planned))]
+    filters = [f"[0:v]split={len(planned)}" + "".join(f"[{label}in]" for label in labels)]
+    for label, (_, w, h) in zip(labels, planned):
+        filters.append(f"[{label}in]scale={w}:{h}[{label}]")
+
+    # 세그먼트 경계마다 키프레임 (화질 전환이 세그먼트 단위로 맞도록)
+    keyframes = ["-force_key_frames", f"expr:gte(t,n_forced*{TRANSCODE_SEGMENT_SECONDS})", "-sc_threshold", "0"]
+
+    command = [FFMPEG_BIN, "-hide_banner", "-loglevel", "error", "-y", "-i", src,
+               "-filter_complex", ";".join(filters)]
+    for label, (rung, _, _) in zip(labels, planned):
+        rung_dir = out_dir / rung.name
+        rung_dir.mkdir(parents=True, exist_ok=True)
+        playlist, segments = rung_dir / HLS_PLAYLIST, rung_dir / HLS_SEGMENT_PATTERN
+        command += ["-map", f"[{label}]", "-map", "0:a:0?", *_video_args(rung), *keyframes, *_audio_args(rung, source)]
+        if rung is not mp4_rung:
+            command += ["-f", "hls", "-hls_time", str(TRANSCODE_SEGMENT_SECONDS), "-hls_playlist_type", "vod",
+                        "-hls_segment_filename", str(segments), str(playlist)]
+            continue
+        mp4_dir = out_dir / "mp4"
+        mp4_dir.mkdir(parents=True, exist_ok=True)
+        # MP4 는 코덱 설정(SPS/PPS)을 파일 헤더에 둬야 하므로 global_header (TS 는 muxer 가 알아서 변환)
+        command += ["-flags", "+global_header", "-f", "tee",
+                    f"[f=hls:hls_time={TRANSCODE_SEGMENT_SECONDS}:hls_playlist_type=vod:"
+                    f"hls_segment_filename={segments}]{playlist}"
+                    f"|[f=mp4:movflags=+faststart]{mp4_dir / f'{rung.name}.mp4'}"]
+    return command
+
+
+def extract_frame(src: str, at: float, out_path: Path) -> Optional[Path]:
+    """at 초 위치의 프레임 한 장을 PNG 로 저장 (재생 시간 끝을 넘었거나 ffmpeg 가 실패하면 None)"""
+    # -ss 를 -i 앞에 두면 가까운 키프레임으로 바로 이동한 뒤 그 위치까지만 디코딩
+    try:
+        _run([FFMPEG_BIN, "-hide_banner", "-loglevel", "error", "-y", "-ss", f"{at:.3f}", "-i", src,
+              "-frames:v", "1", str(out_path)], timeout=60)
+    except TranscodeError as e:
+        logger.warning(f"⚠️ 프레임 추출 실패 ({at:.3f}초): {str(e).strip()}")
+        return None
+    return out_path if out_path.exists() else None
+
+
+def make_thumbnails(src: str, source: SourceInfo, work_dir: Path, out_dir: Path) -> dict:
+    """
+    포스터 / 미리보기 스프라이트를 out_dir 에 생성
+    Returns: {kind: (파일 이름, 가로, 세로)}
+    """
+    frames_dir = work_dir / "frames"
+    frames_dir.mkdir(parents=True, exist_ok=True)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    poster = extract_frame(src, poster_time(source.duration), frames_dir / "poster.png") \
+        or extract_frame(src, 0, frames_dir / "poster.png")
+    if poster is None:
+        raise TranscodeError("포스터 프레임을 추출하지 못했습니다.")
+    results = {"poster": (POSTER_NAME, *make_poster(poster, out_dir / POSTER_NAME))}
+
+    frames = [
+        frame for index, at in enumerate(preview_times(source.duration))
+        if (frame := extract_frame(src, at, frames_dir / f"preview_{index:02d}.png")) is not None
+    ]
+    results["preview"] = (PREVIEW_NAME, *make_preview_sprite(frames or [poster], out_dir / PREVIEW_NAME))
+    return results
+
+
+def rendition_prefix(source_key: str) -> str:
+    """원본 키별 변환 결과 경로 (끝에 / 포함)"""
+    return f"{RENDITION_PREFIX}/{Path(source_key).stem}/"
+
+
+def _content_type(path: Path) -> tuple:
+    """(Content-Type, Cache-Control)"""
+    if path.suffix == ".m3u8":
+        return "application/vnd.apple.mpegurl", SEGMENT_CACHE_CONTROL
+    if path.suffix == ".ts":
+        return "video/mp2t", SEGMENT_CACHE_CONTROL
+    if path.suffix == ".jpg":
+        return "image/jpeg", SEGMENT_CACHE_CONTROL
+    return "video/mp4", SEGMENT_CACHE_CONTROL
+
+
+def _upload_dir(out_dir: Path, prefix: str) -> dict:
+    """out_dir 아래 파일을 prefix 아래로 업로드 (병렬), {상대 경로: 크기}"""
+    files = [path for path in sorted(out_dir.rglob("*")) if path.is_file()]
+
+    def upload(path: Path):
+        content_type, cache_control = _content_type(path)
+        upload_path_to_s3(str(path), prefix + path.relative_to(out_dir).as_posix(), content_type, cache_control)
+
+    with ThreadPoolExecutor(max_workers=TRANSCODE_UPLOAD_CONCURRENCY) as pool:
+        list(pool.map(upload, files))
+    return {path.relative_to(out_dir).as_posix(): path.stat().st_size for path in files}
+
+
+def transcode(source_key: str) -> tuple:
+    """
+    원본 S3 객체를 변환해서 S3 에 올림
+    Returns: (SourceInfo, [Output])
+    """
+    prefix = rendition_prefix(source_key)
+    with tempfile.TemporaryDirectory(prefix="transcode-", dir=TRANSCODE_WORK_DIR) as work:
+        work_dir = Path(work)
+        src = str(work_dir / f"source{Path(source_key).suffix}")
+        download_file_from_s3(source_key, src)
+
+        source = probe(src)
+        planned = plan_rungs(source)
+        out_dir = work_dir / "out"
+        # 썸네일은 프레임 몇 장만 디코딩하므로 본 변환보다 먼저 (out_dir 에 함께 두고 한 번에 업로드)
+        # 썸네일을 만들지 못해도 HLS / 웹용 MP4 변환은 계속 (포스터 없이 ready)
+        try:
+            thumbnails = make_thumbnails(src, source, work_dir, out_dir)
+        except Exception as e:
+            logger.warning(f"⚠️ 썸네일 생성 실패, 썸네일 없이 변환: {source_key}: {e}")
+            thumbnails = {}
+        command = build_ffmpeg_command(src, out_dir, source, planned)
+        logger.info(f"🎬 변환 시작: {source_key} ({source.width}x{source.height}) → {', '.join(r.name for r, _, _ in planned)}")
+        _run(command, timeout=TRANSCODE_TIMEOUT)
+
+        sizes = _upload_dir(out_dir, prefix)
+
+    outputs = []
+    for rung, width, height in planned:
+        rung_size = sum(size for path, size in sizes.items() if path.startswith(f"{rung.name}/"))
+        outputs.append(_rung_output("hls", rung, width, height, f"{prefix}{rung.name}/{HLS_PLAYLIST}", rung_size))
+    mp4_rung, width, height = _mp4_rung(planned)
+    mp4_path = f"mp4/{mp4_rung.name}.mp4"
+    outputs.append(_rung_output("mp4", mp4_rung, width, height, prefix + mp4_path, sizes[mp4_path]))
+    outputs.extend(_thumbnail_outputs(prefix, thumbnails, sizes))
+    return source, outputs
+
+
+def _thumbnail_outputs(prefix: str, thumbnails: dict, sizes: dict) -> List[Output]:
+    return [
+        Output(kind, kind, width, height, prefix + name, sizes[name])
+        for kind, (name, width, height) in thumbnails.items()
+    ]
+
+
+def transcode_thumbnails(source_key: str) -> tuple:
+    """
+    이미 변환된 동영상의 포스터 / 미리보기 스프라이트만 만들어서 올림 (썸네일 기능 이전 동영상 보충용)
+    - HLS / 웹용 MP4 는 다시 만들지 않음 (같은 키를 덮어쓰면 API 캐시가 예전 내용을 계속 보냄)
+    Returns: (SourceInfo, [Output]) 포스터 / 미리보기만
+    """
+    prefix = rendition_prefix(source_key)
+    with tempfile.TemporaryDirectory(prefix="thumbnails-", dir=TRANSCODE_WORK_DIR) as work:
+        work_dir = Path(work)
+        src = str(work_dir / f"source{Path(source_key).suffix}")
+        download_file_from_s3(source_key, src)
+
+        source = probe(src)
+        out_dir = work_dir / "out"
+        thumbnails = make_thumbnails(src, source, work_dir, out_dir)
+        sizes = _upload_dir(out_dir, prefix)
+    return source, _thumbnail_outputs(prefix, thumbnails, sizes)
+
+
+def delete_renditions(source_key: str) -> int:
+    """원본 키의 변환 결과를 S3 에서 삭제"""
+    return delete_prefix_from_s3(rendition_prefix(source_key))
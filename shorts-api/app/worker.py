@@ -0,0 +1,225 @@
+# worker.py
+# 변환 작업 워커 (API 서버와 별도 프로세스)
+#
+#   python -m app.worker                  # 작업을 계속 가져와서 처리 (TRANSCODE_POLL_INTERVAL 초마다 확인)
+#   python -m app.worker --once           # 지금 있는 작업만 처리하고 종료
+#   python -m app.worker --enqueue-missing  # 변환 안 된 기존 동영상(none/failed, 포스터 없는 ready)을 큐에 추가하고 종료
+#
+# 작업 하나에 ffmpeg 하나 (ffmpeg 가 여러 코어를 씀), 더 빨리 처리하려면 워커 프로세스를 늘림.
+# SIGTERM/SIGINT 를 받으면 지금 작업을 끝내고 종료.
+
+import argparse
+import logging
+import os
+import signal
+import threading
+
+from sqlalchemy import and_, exists, or_
+
+from app.cache import CACHE_TTL, invalidate_video, metadata_cache
+from app.database import SessionLocal, engine
+from app.jobs import claim_job, complete_job, enqueue_transcode, fail_job, fail_stale_jobs
+from app.models import (
+    Video, VideoRendition, TranscodeJob, JOB_PENDING, JOB_RUNNING, PROCESSING_NONE, PROCESSING_FAILED, PROCESSING_READY, PROCESSING_RUNNING, JOB_DONE, JOB_FAILED,
+)
+from app.schema import prepare_schema
+from app.transcode import delete_renditions, transcode, transcode_thumbnails
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TRANSCODE_POLL_INTERVAL = float(os.getenv("TRANSCODE_POLL_INTERVAL", 5))
+
+_stop = threading.Event()
+
+
+def _save_outputs(db, video: Video, source, outputs):
+    """변환 결과로 렌디션 교체 + 동영상 상태 ready"""
+    db.query(VideoRendition).filter(VideoRendition.video_id == video.id).delete()
+    _add_renditions(db, video, outputs)
+    video.duration = source.duration
+    video.processing_status = PROCESSING_READY
+
+
+def _add_renditions(db, video: Video, outputs):
+    for output in outputs:
+        db.add(VideoRendition(
+            video_id=video.id,
+            kind=output.kind,
+            name=output.name,
+            width=output.width,
+            height=output.height,
+            bandwidth=output.bandwidth,
+            codecs=output.codecs,
+            s3_key=output.s3_key,
+            file_size=output.file_size,
+        ))
+
+
+def process_job(db, job) -> bool:
+    """
+    작업 하나 처리
+    Returns: 성공(또는 건너뜀)이면 True
+    """
+    video = db.get(Video, job.video_id)
+    if video is None or video.filename != job.source_key:
+        # 그 사이 삭제되었거나 파일이 교체된 동영상 (교체 시 새 작업이 따로 있음)
+        job.status = JOB_DONE
+        db.commit()
+        logger.info(f"⚠️ 변환 건너뜀 (삭제/교체됨): job={job.id}")
+        return True
+
+    if video.processing_status == PROCESSING_READY and _has_stream_renditions(db, video.id):
+        # 이미 변환된 동영상 (enqueue_missing 의 썸네일 보충): HLS / 웹용 MP4 는 그대로 두고 썸네일만
+        return _process_thumbnails(db, job, video)
+
+    video.processing_status = PROCESSING_RUNNING
+    db.commit()
+    _invalidate(video.id)
+
+    try:
+        # 변환 중에는 트랜잭션을 열어 두지 않음 (commit 후 연결은 풀에 반납됨)
+        source, outputs = transcode(job.source_key)
+    except Exception as e:
+        db.rollback()
+        retry = fail_job(db, job, f"{type(e).__name__}: {e}")
+        _invalidate(job.video_id)
+        logger.error(f"❌ 변환 실패: job={job.id}, 시도 {job.attempts}회 {'(재시도 예정)' if retry else '(중단)'}: {e}")
+        if not retry:
+            _delete_quietly(job.source_key)
+        return False
+
+    current_key = db.query(Video.filename).filter(Video.id == job.video_id).scalar()
+    if current_key != job.source_key:
+        # 변환하는 동안 삭제되었거나 파일이 교체됨: 결과는 버림
+        job.status = JOB_DONE
+        db.commit()
+        _delete_quietly(job.source_key)
+        return True
+
+    _save_outputs(db, video, source, outputs)
+    complete_job(db, job)
+    db.commit()
+    _invalidate(video.id)
+    logger.info(f"✅ 변환 완료: video_id={video.id}, {', '.join(o.name + '/' + o.kind for o in outputs)}")
+    return True
+
+
+def _has_stream_renditions(db, video_id: int) -> bool:
+    return db.query(exists().where(VideoRendition.video_id == video_id, VideoRendition.kind == "hls")).scalar()
+
+
+def _process_thumbnails(db, job, video: Video) -> bool:
+    """
+    ready 동영상의 포스터 / 미리보기만 만들어서 렌디션에 추가 (재생 중인 동영상이라 상태는 ready 그대로)
+    - 썸네일은 없어도 재생에는 문제가 없으므로 실패해도 재시도하지 않고 작업만 failed
+    """
+    try:
+        _, outputs = transcode_thumbnails(job.source_key)
+    except Exception as e:
+        db.rollback()
+        job.status = JOB_FAILED
+        job.last_error = f"{type(e).__name__}: {e}"[-4000:]
+        db.commit()
+        logger.error(f"❌ 썸네일 생성 실패: job={job.id}: {e}")
+        return False
+
+    current_key = db.query(Video.filename).filter(Video.id == job.video_id).scalar()
+    if current_key != job.source_key:
+        job.status = JOB_DONE
+        db.commit()
+        _delete_quietly(job.source_key)
+        return True
+
+    db.query(VideoRendition).filter(
+        VideoRendition.video_id == video.id,
+        VideoRendition.kind.in_([output.kind for output in outputs]),
+    ).delete(synchronize_session=False)
+    _add_renditions(db, video, outputs)
+    complete_job(db, job)
+    db.commit()
+    _invalidate(video.id)
+    logger.info(f"✅ 썸네일 보충 완료: video_id={video.id}, {', '.join(o.kind for o in outputs)}")
+    return True
+
+
+def _invalidate(*video_ids: int):
+    """
+    API 서버의 메타데이터 캐시에서 동영상 제거
+    - 워커는 별도 프로세스라서 프로세스 간에 공유되는 redis 백엔드일 때만 의미가 있음
+    - memory 백엔드는 워커 자기 캐시만 지우게 되므로 호출하지 않음
+      (API 서버는 최대 CACHE_TTL 초 뒤에 바뀐 processing_status / 변환 결과를 봄)
+    """
+    if metadata_cache.shared:
+        invalidate_video(*video_ids)
+
+
+def _delete_quietly(source_key: str):
+    try:
+        delete_renditions(source_key)
+    except Exception as e:
+        logger.warning(f"⚠️ 변환 결과 삭제 실패: {source_key}: {e}")
+
+
+def run(once: bool = False):
+    """작업 처리 루프"""
+    logger.info("✅ 변환 워커 시작")
+    if metadata_cache.enabled and not metadata_cache.shared:
+        logger.warning(f"⚠️ 메타데이터 캐시가 프로세스별(memory)이라 변환 상태는 API 서버에 최대 {CACHE_TTL}초 늦게 반영됩니다 (CACHE_BACKEND=redis 권장)")
+    while not _stop.is_set():
+        db = SessionLocal()
+        try:
+            fail_stale_jobs(db)
+            job = claim_job(db)
+            if job is not None:
+                process_job(db, job)
+                continue
+        finally:
+            db.close()
+        if once:
+            break
+        _stop.wait(TRANSCODE_POLL_INTERVAL)
+    logger.info("✅ 변환 워커 종료")
+
+
+def enqueue_missing() -> int:
+    """
+    변환 결과가 없는 동영상(none / failed)과 썸네일 기능 이전에 변환되어 포스터가 없는 동영상을 큐에 추가
+    - 포스터 없는 ready 동영상은 썸네일만 만듦 (ready 그대로, HLS / 웹용 MP4 는 다시 변환하지 않음)
+    """
+    db = SessionLocal()
+    try:
+        has_poster = exists().where(VideoRendition.video_id == Video.id, VideoRendition.kind == "poster")
+        # 썸네일 보충은 상태가 ready 그대로라서 이미 큐에 있는지는 작업으로 확인
+        queued = exists().where(TranscodeJob.video_id == Video.id, TranscodeJob.status.in_([JOB_PENDING, JOB_RUNNING]))
+        videos = db.query(Video).filter(or_(
+            Video.processing_status.in_([PROCESSING_NONE, PROCESSING_FAILED]),
+            and_(Video.processing_status == PROCESSING_READY, ~has_poster, ~queued),
+        )).all()
+        for video in videos:
+            enqueue_transcode(db, video, thumbnails_only=video.processing_status == PROCESSING_READY)
+        db.commit()
+        _invalidate(*[video.id for video in videos])
+        return len(videos)
+    finally:
+        db.close()
+
+
+def _handle_signal(signum, frame):
+    logger.info("⚠️ 종료 신호 수신: 지금 작업을 끝내고 종료합니다.")
+    _stop.set()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="동영상 변환 워커")
+    parser.add_argument("--once", action="store_true", help="지금 있는 작업만 처리하고 종료")
+    parser.add_argument("--enqueue-missing", action="store_true", help="변환 안 된 기존 동영상을 큐에 추가하고 종료")
+    args = parser.parse_args()
+
+    prepare_schema(engine)
+    if args.enqueue_missing:
+        print(f"✅ 변환 작업 추가: {enqueue_missing()}개")
+    else:
+        signal.signal(signal.SIGTERM, _handle_signal)
+        signal.signal(signal.SIGINT, _handle_signal)
+        run(once=args.once)
@@ -0,0 +1,69 @@
+# env.py
+# alembic 실행 환경
+# - 접속 주소: app.database 의 DATABASE_URL (환경 변수 / .env)
+# - 비교 대상 스키마: app.models 의 Base.metadata (alembic check / revision --autogenerate)
+# - 마이그레이션마다 트랜잭션을 따로 씀 → CREATE INDEX CONCURRENTLY 는 migrations/online.py 헬퍼로
+#   (op.get_context().autocommit_block() 안에서 실행)
+# - 다른 코드에서 연결을 넘겨주면 (config.attributes["connection"]) 그 연결로 실행
+
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from app.database import Base, DATABASE_URL
+from app import models  # noqa: F401  (테이블 정보를 Base.metadata 에 등록)
+from app.search import SEARCH_INDEX_NAME
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    # 모델에 없는 검색용 트라이그램 인덱스 (0002 에서 생성)는 비교에서 제외
+    if type_ == "index" and name == SEARCH_INDEX_NAME:
+        return False
+    return True
+
+
+def _configure(**kwargs):
+    context.configure(
+        target_metadata=target_metadata,
+        include_object=include_object,
+        transaction_per_migration=True,
+        **kwargs,
+    )
+
+
+def run_migrations_offline() -> None:
+    """SQL 스크립트만 출력 (alembic upgrade head --sql)"""
+    _configure(url=DATABASE_URL, literal_binds=True, dialect_opts={"paramstyle": "named"})
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
+    engine = create_engine(DATABASE_URL, poolclass=NullPool)
+    with engine.connect() as connection:
+        _configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+    engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
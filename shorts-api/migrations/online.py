@@ -0,0 +1,52 @@
+# online.py
+# 큰 테이블용 온라인 스키마 변경 헬퍼 (마이그레이션 파일에서 사용)
+#
+# PostgreSQL 의 CREATE/DROP INDEX 는 끝날 때까지 테이블 쓰기를 막습니다.
+# CONCURRENTLY 를 붙이면 쓰기를 막지 않는 대신 트랜잭션 안에서 실행할 수 없으므로
+# autocommit_block() 안에서 실행합니다 (앞 단계는 먼저 커밋됨).
+# CONCURRENTLY 생성이 중간에 실패하면 INVALID 인덱스가 남으므로 다시 실행할 때 지우고 새로 만듭니다.
+#
+# PostgreSQL 이 아니면 (로컬 SQLite) 일반 CREATE/DROP INDEX 로 실행합니다.
+
+from alembic import op
+from sqlalchemy import text
+
+
+def is_postgres() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def _invalid_index_exists(name: str) -> bool:
+    return op.get_bind().execute(text(
+        "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+        "WHERE c.relname = :name AND c.relnamespace = to_regnamespace(current_schema()) "
+        "AND NOT i.indisvalid"
+    ), {"name": name}).first() is not None
+
+
+def create_index_concurrently(name: str, table: str, columns: str, unique: bool = False, using: str = None):
+    """
+    인덱스 생성 (이미 있으면 건너뜀)
+    - columns: 인덱스 정의 SQL, 예: "video_id, created_at DESC, id DESC"
+    - using: 인덱스 종류, 예: "gin" (PostgreSQL 전용)
+    """
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    if not is_postgres():
+        op.execute(f"CREATE {kind} IF NOT EXISTS {name} ON {table} ({columns})")
+        return
+
+    method = f" USING {using}" if using else ""
+    with op.get_context().autocommit_block():
+        if _invalid_index_exists(name):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        op.execute(f"CREATE {kind} CONCURRENTLY IF NOT EXISTS {name} ON {table}{method} ({columns})")
+
+
+def drop_index_concurrently(name: str):
+    """인덱스 삭제 (없으면 건너뜀)"""
+    if not is_postgres():
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+        return
+
+    with op.get_context().autocommit_block():
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
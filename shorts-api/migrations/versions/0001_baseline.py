@@ -0,0 +1,94 @@
+"""baseline: videos / likes / comments
+
+지금까지 서버 시작 시 Base.metadata.create_all 로 만들던 최초 스키마.
+이미 운영 중인 DB(create_all 로 만들어서 alembic_version 이 없음)는 있는 테이블을 건너뛰므로
+배포 시 자동으로 실행되는 alembic upgrade head 가 그대로 통과하고 0002 부터 적용됩니다.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(name: str) -> bool:
+    """예전 서버가 create_all 로 이미 만든 테이블인지 (SQL 출력 모드에서는 확인할 수 없으므로 없다고 봄)"""
+    if context.is_offline_mode():
+        return False
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    # 테이블을 만들 때 같이 만든 인덱스도 같이 건너뜀 (create_all 은 테이블과 인덱스를 함께 만듦)
+    if not _has_table("videos"):
+        _create_videos()
+    if not _has_table("likes"):
+        _create_likes()
+    if not _has_table("comments"):
+        _create_comments()
+
+
+def _create_videos():
+    op.create_table(
+        "videos",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("filename", sa.String(length=255), nullable=False),
+        sa.Column("original_filename", sa.String(length=500), nullable=False),
+        sa.Column("file_path", sa.String(length=1000), nullable=False),
+        sa.Column("file_size", sa.BigInteger(), nullable=False),
+        sa.Column("content_type", sa.String(length=100), nullable=True),
+        sa.Column("uploaded_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_videos_id", "videos", ["id"])
+    op.create_index("ix_videos_filename", "videos", ["filename"], unique=True)
+
+
+def _create_likes():
+    op.create_table(
+        "likes",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("video_id", sa.Integer(), nullable=False),
+        sa.Column("user_identifier", sa.String(length=100), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(["video_id"], ["videos.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_likes_id", "likes", ["id"])
+    op.create_index("ix_likes_video_id", "likes", ["video_id"])
+    op.create_index("ix_likes_user_identifier", "likes", ["user_identifier"])
+
+
+def _create_comments():
+    op.create_table(
+        "comments",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("video_id", sa.Integer(), nullable=False),
+        sa.Column("user_identifier", sa.String(length=100), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(["video_id"], ["videos.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_comments_id", "comments", ["id"])
+    op.create_index("ix_comments_video_id", "comments", ["video_id"])
+    op.create_index("ix_comments_user_identifier", "comments", ["user_identifier"])
+
+
+def downgrade() -> None:
+    op.drop_table("comments")
+    op.drop_table("likes")
+    op.drop_table("videos")
@@ -0,0 +1,103 @@
+"""counters and query indexes
+
+baseline 이후 models.py 에 추가된 스키마를 반영합니다.
+- videos.like_count / comment_count 비정규화 카운터 (새로 추가할 때만 원본 테이블에서 채움)
+- likes (video_id, user_identifier) 유니크 인덱스 (중복 좋아요는 가장 오래된 행만 남김)
+- comments (video_id, created_at DESC, id DESC) 댓글 목록 인덱스
+- 검색용 pg_trgm 트라이그램 인덱스 (PostgreSQL, 확장을 만들 수 없으면 건너뜀)
+- 위 인덱스의 앞 컬럼과 겹치는 likes.video_id / comments.video_id 단독 인덱스 삭제
+
+인덱스는 CONCURRENTLY 로 만들고 지우므로 (migrations/online.py) 실행 중에도 쓰기를 막지 않습니다.
+이전 서버 시작 코드가 이미 만든 컬럼/인덱스는 건너뛰므로 어느 상태의 DB에서든 실행할 수 있습니다.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 00:00:01
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.online import create_index_concurrently, drop_index_concurrently, is_postgres
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+_COUNTERS = (("like_count", "likes"), ("comment_count", "comments"))
+
+
+def _recount(column: str, table: str):
+    """카운터를 원본 테이블 행 수로 다시 계산 (값이 다른 동영상만 UPDATE)"""
+    op.execute(
+        f"UPDATE videos SET {column} = "
+        f"(SELECT count(*) FROM {table} WHERE {table}.video_id = videos.id) "
+        f"WHERE {column} <> (SELECT count(*) FROM {table} WHERE {table}.video_id = videos.id)"
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # 1. 카운터 컬럼 (PostgreSQL 11+ 는 상수 기본값 컬럼 추가가 테이블을 다시 쓰지 않음)
+    existing = {column["name"] for column in inspector.get_columns("videos")}
+    added = []
+    for column, table in _COUNTERS:
+        if column not in existing:
+            op.add_column("videos", sa.Column(column, sa.Integer(), nullable=False, server_default="0"))
+            added.append((column, table))
+
+    # 2. 중복 좋아요 정리 후 유니크 인덱스
+    like_indexes = {index["name"] for index in inspector.get_indexes("likes")}
+    removed = 0
+    if "uq_likes_video_user" not in like_indexes:
+        removed = bind.execute(sa.text(
+            "DELETE FROM likes WHERE id NOT IN "
+            "(SELECT MIN(id) FROM likes GROUP BY video_id, user_identifier)"
+        )).rowcount
+
+    # 새로 추가한 카운터 채우기 / 중복을 지웠으면 좋아요 카운터 다시 계산
+    for column, table in _COUNTERS:
+        if (column, table) in added or (column == "like_count" and removed):
+            _recount(column, table)
+
+    create_index_concurrently("uq_likes_video_user", "likes", "video_id, user_identifier", unique=True)
+
+    # 3. 댓글 목록 인덱스
+    create_index_concurrently("ix_comments_video_created_id", "comments", "video_id, created_at DESC, id DESC")
+
+    # 4. 검색 트라이그램 인덱스 (app/search.py)
+    if is_postgres():
+        try:
+            with op.get_context().autocommit_block():
+                op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        except Exception as e:
+            logger.warning(f"⚠️ pg_trgm 확장을 만들 수 없어 검색 인덱스를 건너뜁니다: {e}")
+        else:
+            create_index_concurrently(
+                "ix_videos_original_filename_trgm", "videos",
+                "lower(original_filename) gin_trgm_ops", using="gin",
+            )
+
+    # 5. 겹치는 단독 인덱스 삭제
+    drop_index_concurrently("ix_likes_video_id")
+    drop_index_concurrently("ix_comments_video_id")
+
+
+def downgrade() -> None:
+    create_index_concurrently("ix_comments_video_id", "comments", "video_id")
+    create_index_concurrently("ix_likes_video_id", "likes", "video_id")
+    drop_index_concurrently("ix_videos_original_filename_trgm")
+    drop_index_concurrently("ix_comments_video_created_id")
+    drop_index_concurrently("uq_likes_video_user")
+    op.drop_column("videos", "comment_count")
+    op.drop_column("videos", "like_count")
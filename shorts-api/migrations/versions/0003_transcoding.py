@@ -0,0 +1,73 @@
+"""transcoding: processing status, renditions, job queue
+
+- videos.processing_status / duration (기존 동영상은 'none': 원본만 재생)
+- video_renditions: HLS 화질별 플레이리스트 / 웹용 MP4
+- transcode_jobs: 변환 작업 큐 (python -m app.worker)
+
+기존 동영상 변환은 따로 실행합니다: python -m app.worker --enqueue-missing
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16 00:00:02
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 상수 기본값 컬럼 추가는 테이블을 다시 쓰지 않음 (PostgreSQL 11+)
+    op.add_column("videos", sa.Column("processing_status", sa.String(length=20), nullable=False, server_default="none"))
+    op.add_column("videos", sa.Column("duration", sa.Float(), nullable=True))
+
+    op.create_table(
+        "video_renditions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("video_id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(length=10), nullable=False),
+        sa.Column("name", sa.String(length=20), nullable=False),
+        sa.Column("width", sa.Integer(), nullable=False),
+        sa.Column("height", sa.Integer(), nullable=False),
+        sa.Column("bandwidth", sa.Integer(), nullable=False),
+        sa.Column("codecs", sa.String(length=100), nullable=True),
+        sa.Column("s3_key", sa.String(length=500), nullable=False),
+        sa.Column("file_size", sa.BigInteger(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(["video_id"], ["videos.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("uq_video_renditions_video_kind_name", "video_renditions", ["video_id", "kind", "name"], unique=True)
+
+    op.create_table(
+        "transcode_jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("video_id", sa.Integer(), nullable=False),
+        sa.Column("source_key", sa.String(length=255), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False, server_default="pending"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("run_after", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("locked_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(["video_id"], ["videos.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_transcode_jobs_status_run_after", "transcode_jobs", ["status", "run_after"])
+    op.create_index("ix_transcode_jobs_video_id", "transcode_jobs", ["video_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("transcode_jobs")
+    op.drop_table("video_renditions")
+    op.drop_column("videos", "duration")
+    op.drop_column("videos", "processing_status")
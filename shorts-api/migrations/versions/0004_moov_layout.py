@@ -0,0 +1,32 @@
+"""moov layout: videos.moov_offset / moov_size
+
+- 업로드 시 분석한 원본 파일의 moov 박스 위치 / 크기 (app/mp4.py)
+- 기존 동영상은 NULL (스트리밍은 지금처럼 동작하고 moov 미리 읽기만 하지 않음)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16 00:00:03
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # NULL 허용 컬럼 추가는 테이블을 다시 쓰지 않음
+    op.add_column("videos", sa.Column("moov_offset", sa.BigInteger(), nullable=True))
+    op.add_column("videos", sa.Column("moov_size", sa.BigInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("videos", "moov_size")
+    op.drop_column("videos", "moov_offset")
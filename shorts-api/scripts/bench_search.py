@@ -0,0 +1,111 @@
+# bench_search.py
+# 검색 쿼리 벤치마크: 기존 ilike '%q%' + count() vs app/search.py (pg_trgm + 창 함수 count)
+#
+# 사용법 (DATABASE_URL 의 DB에 벤치마크용 행을 넣었다가 끝나면 지웁니다):
+#   python scripts/bench_search.py --sizes 10000,100000,1000000
+#
+# - 크기마다 videos 테이블에 "bench-" 로 시작하는 행을 채운 뒤 (ANALYZE 포함)
+#   검색어마다 --repeat 번 실행해서 p50 / p95 지연시간(ms)을 출력
+# - --keep 을 주면 끝나고 행을 지우지 않음
+
+import argparse
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import delete, insert, text  # noqa: E402
+
+from app.database import Base, SessionLocal, engine, init_db  # noqa: E402
+from app.models import Video  # noqa: E402
+from app.search import configure_search, ensure_search_index, search_videos_page  # noqa: E402
+
+WORDS = [
+    "cat", "dog", "travel", "vlog", "dance", "cooking", "game", "music", "funny", "tutorial",
+    "고양이", "강아지", "여행", "브이로그", "춤", "요리", "게임", "음악", "웃긴", "강의",
+]
+QUERIES = ["cat", "고양이", "tutorail", "여행 브이", "zzzz"]
+BENCH_PREFIX = "bench-"
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def fill(db, count: int, batch_size: int = 10000):
+    rng = random.Random(count)
+    for offset in range(0, count, batch_size):
+        rows = []
+        for _ in range(min(batch_size, count - offset)):
+            key = f"{BENCH_PREFIX}{uuid.uuid4()}.mp4"
+            name = " ".join(rng.sample(WORDS, rng.randint(1, 4)))
+            rows.append({
+                "filename": key,
+                "original_filename": f"{name} {rng.randint(1, 9999)}.mp4",
+                "file_path": key,
+                "file_size": 1024,
+                "content_type": "video/mp4",
+            })
+        db.execute(insert(Video), rows)
+        db.commit()
+    if engine.dialect.name == "postgresql":
+        db.execute(text("ANALYZE videos"))
+        db.commit()
+
+
+def legacy_search(db, q: str, limit: int):
+    query = db.query(Video).filter(Video.original_filename.ilike(f"%{q}%"))
+    query.order_by(Video.id.desc()).limit(limit).all()
+    query.count()
+
+
+def indexed_search(db, q: str, limit: int):
+    search_videos_page(db, q, 0, limit, None, True)
+
+
+def measure(db, func, q: str, limit: int, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func(db, q, limit)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return percentile(samples, 50), percentile(samples, 95)
+
+
+def main(args):
+    engine.echo = False  # 쿼리 로그가 측정에 섞이지 않도록
+    init_db(engine, Base.metadata)
+    ensure_search_index(engine)
+    configure_search(engine)
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+
+    db = SessionLocal()
+    try:
+        inserted = 0
+        print(f"{'rows':>9} {'query':<12} {'ilike p50':>10} {'ilike p95':>10} {'index p50':>10} {'index p95':>10}")
+        for size in sizes:
+            fill(db, size - inserted)
+            inserted = size
+            for q in QUERIES:
+                legacy = measure(db, legacy_search, q, args.limit, args.repeat)
+                indexed = measure(db, indexed_search, q, args.limit, args.repeat)
+                print(f"{size:>9} {q:<12} {legacy[0]:>10.1f} {legacy[1]:>10.1f} {indexed[0]:>10.1f} {indexed[1]:>10.1f}")
+    finally:
+        if not args.keep:
+            db.rollback()
+            db.execute(delete(Video).where(Video.filename.startswith(BENCH_PREFIX)))
+            db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="검색 쿼리 벤치마크")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="누적 행 수 (쉼표 구분)")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="끝나고 벤치마크 행을 지우지 않음")
+    main(parser.parse_args())
@@ -0,0 +1,86 @@
+# like_race.py
+# 좋아요 동시성 테스트: 같은 동영상에 좋아요 토글/취소를 동시에 수백 번 보내고
+# DB에 중복 행이 없는지, videos.like_count 가 실제 likes 행 수와 같은지 확인
+#
+# 사용법 (httpx 필요, 서버와 같은 DATABASE_URL 로 실행):
+#   python scripts/like_race.py --base-url http://localhost:8000 --video-id 1 --requests 500
+#
+# 사용자 식별자는 요청 IP라서 이 스크립트의 요청은 모두 같은 사용자입니다.
+# (더블탭이 몰리는 상황과 같음 → 끝나고 좋아요 행은 0개 또는 1개여야 함)
+# LIKE_WRITE_MODE=buffered 서버라면 --settle 초만큼 기다린 뒤 확인합니다.
+
+import argparse
+import asyncio
+import random
+import sys
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import func  # noqa: E402
+
+from app.database import SessionLocal, engine  # noqa: E402
+from app.models import Like, Video  # noqa: E402
+
+
+async def fire(client, args):
+    semaphore = asyncio.Semaphore(args.concurrency)
+    statuses = {}
+
+    async def one():
+        async with semaphore:
+            # 토글 위주 + 명시적 취소 섞기
+            if random.random() < 0.8:
+                response = await client.post(f"/api/videos/{args.video_id}/like")
+            else:
+                response = await client.delete(f"/api/videos/{args.video_id}/like")
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    await asyncio.gather(*[one() for _ in range(args.requests)])
+    return statuses
+
+
+def check_db(video_id: int, api_status: dict) -> bool:
+    db = SessionLocal()
+    try:
+        rows = db.query(func.count(Like.id)).filter(Like.video_id == video_id).scalar()
+        duplicates = (
+            db.query(Like.user_identifier)
+            .filter(Like.video_id == video_id)
+            .group_by(Like.user_identifier)
+            .having(func.count(Like.id) > 1)
+            .count()
+        )
+        counter = db.query(Video.like_count).filter(Video.id == video_id).scalar()
+    finally:
+        db.close()
+
+    print(f"likes 행 수: {rows}, 중복 사용자: {duplicates}, videos.like_count: {counter}")
+    return duplicates == 0 and rows == counter and api_status["like_count"] == counter
+
+
+async def main(args):
+    engine.echo = False
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30) as client:
+        statuses = await fire(client, args)
+        print(f"응답 코드: {statuses}")
+        await asyncio.sleep(args.settle)
+        status = (await client.get(f"/api/videos/{args.video_id}/like")).json()
+        print(f"API 상태: {status}")
+
+    ok = check_db(args.video_id, status)
+    print("✅ 일관성 확인" if ok else "❌ 불일치")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="좋아요 동시성 테스트")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--video-id", type=int, default=1)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--settle", type=float, default=0.0, help="확인 전 대기 시간 (buffered 모드면 반영 주기 이상)")
+    asyncio.run(main(parser.parse_args()))
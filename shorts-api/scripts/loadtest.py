@@ -0,0 +1,88 @@
+# loadtest.py
+# 스트리밍 + 메타데이터 혼합 트래픽 부하 테스트
+#
+# 사용법 (httpx 필요: pip install httpx):
+#   python scripts/loadtest.py --base-url http://localhost:8000 --video-id 1 --duration 30
+#
+# - 스트리밍 워커: /api/videos/{id}/stream 에 Range 요청을 반복
+# - 메타데이터 워커: /api/videos/feed, /api/videos/{id}, /api/videos/{id}/like 를 번갈아 요청
+# - 끝나면 종류별 요청 수, 에러 수, p50 / p95 / p99 지연시간(ms)을 출력
+
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[index]
+
+
+async def stream_worker(client, args, deadline, results):
+    while time.perf_counter() < deadline:
+        start = random.randint(0, max(args.file_size - args.range_size, 0))
+        headers = {"Range": f"bytes={start}-{start + args.range_size - 1}"}
+        t0 = time.perf_counter()
+        try:
+            response = await client.get(f"/api/videos/{args.video_id}/stream", headers=headers)
+            ok = response.status_code in (200, 206)
+        except httpx.HTTPError:
+            ok = False
+        results["stream"].append((time.perf_counter() - t0, ok))
+
+
+async def metadata_worker(client, args, deadline, results):
+    paths = [
+        "/api/videos/feed?limit=20",
+        f"/api/videos/{args.video_id}",
+        f"/api/videos/{args.video_id}/like",
+    ]
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        t0 = time.perf_counter()
+        try:
+            response = await client.get(path)
+            ok = response.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        results["metadata"].append((time.perf_counter() - t0, ok))
+
+
+async def main(args):
+    results = {"stream": [], "metadata": []}
+    limits = httpx.Limits(max_connections=args.stream_workers + args.metadata_workers)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        deadline = time.perf_counter() + args.duration
+        workers = [stream_worker(client, args, deadline, results) for _ in range(args.stream_workers)]
+        workers += [metadata_worker(client, args, deadline, results) for _ in range(args.metadata_workers)]
+        await asyncio.gather(*workers)
+
+    print(f"{'kind':<10} {'count':>7} {'errors':>7} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9}")
+    for kind, samples in results.items():
+        latencies = [elapsed * 1000 for elapsed, _ in samples]
+        errors = sum(1 for _, ok in samples if not ok)
+        print(
+            f"{kind:<10} {len(samples):>7} {errors:>7} "
+            f"{percentile(latencies, 50):>9.1f} {percentile(latencies, 95):>9.1f} {percentile(latencies, 99):>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="스트리밍/메타데이터 혼합 부하 테스트")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--video-id", type=int, default=1)
+    parser.add_argument("--file-size", type=int, default=1024 * 1024, help="대상 동영상 크기 (bytes)")
+    parser.add_argument("--range-size", type=int, default=256 * 1024, help="Range 요청 1회 크기 (bytes)")
+    parser.add_argument("--stream-workers", type=int, default=20)
+    parser.add_argument("--metadata-workers", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30.0, help="테스트 시간 (초)")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    asyncio.run(main(parser.parse_args()))